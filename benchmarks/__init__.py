@@ -0,0 +1,9 @@
+"""
+Benchmarks for the search engine.
+
+- corpus: deterministic synthetic HTML corpora with a Zipfian vocabulary
+- suite:  build / parse / query / prefix / memory measurements, JSON
+          results and regression comparison (python -m benchmarks)
+
+The bench_*.py scripts are standalone micro-benchmarks.
+"""
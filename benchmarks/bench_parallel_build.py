@@ -0,0 +1,79 @@
+"""
+Benchmark: serial vs. parallel index build.
+
+Generates a synthetic HTML corpus in a temporary folder, then times
+SearchEngine.build_index() with 1, 2, 4, ... worker processes (up to the
+number of CPU cores) and checks every parallel build is identical to the
+serial one.
+
+Usage:
+    python benchmarks/bench_parallel_build.py [--docs 2000] [--words 800]
+                                              [--max-workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from search_engine import SearchEngine  # noqa: E402
+
+
+def make_corpus(folder: str, docs: int, words: int, seed: int = 0) -> None:
+    # Simple synthetic pages with a skewed vocabulary
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+
+    for i in range(docs):
+        body = " ".join(rng.choices(vocab, weights, k=words))
+        with open(os.path.join(folder, f"doc{i:06d}.html"), "w",
+                  encoding="utf-8") as f:
+            f.write(f"<html><head><title>Doc {i}</title></head>"
+                    f"<body><p>{body}</p><script>var x = {i};</script>"
+                    f"</body></html>")
+
+
+def timed_build(folder: str, workers: int) -> tuple:
+    engine = SearchEngine(folder)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.build_index(workers=workers)
+    return time.perf_counter() - start, engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=800)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as folder:
+        make_corpus(folder, args.docs, args.words)
+        print(f"{args.docs} docs x {args.words} words, {cores} cores")
+
+        baseline, reference = timed_build(folder, workers=1)
+        print(f"workers= 1  {baseline:8.2f}s  speedup 1.00x")
+
+        for workers in worker_counts[1:]:
+            elapsed, engine = timed_build(folder, workers)
+            same = (engine.index.index == reference.index.index
+                    and engine.titles == reference.titles)
+            print(f"workers={workers:2d}  {elapsed:8.2f}s  "
+                  f"speedup {baseline / elapsed:4.2f}x  identical={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Load test: concurrent HTTP clients against the asyncio query service.
+
+Builds an in-memory engine over a synthetic skewed corpus, starts
+server.SearchServer on a free local port, then runs --clients
+concurrent keep-alive clients (asyncio streams) that each send
+--requests queries drawn from the corpus vocabulary. Reports
+throughput and latency percentiles, with and without the query cache.
+
+Usage:
+    python benchmarks/bench_server.py [--docs 5000] [--clients 32]
+                                      [--requests 200] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from search_engine import SearchEngine  # noqa: E402
+from server import SearchServer  # noqa: E402
+
+
+def make_engine(docs: int, words: int, cache_size: int, seed: int = 0):
+    # Synthetic documents with a Zipf-like vocabulary
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+
+    engine = SearchEngine("unused", cache_size=cache_size)
+    with engine.batch() as index, index.bulk_load():
+        for i in range(docs):
+            engine.add_document(f"doc{i:06d}",
+                                " ".join(rng.choices(vocab, weights, k=words)))
+    return engine, vocab, weights
+
+
+def make_queries(vocab: list, weights: list, count: int, seed: int) -> list:
+    # One or two words, skewed like the corpus, so popular queries repeat
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        terms = rng.choices(vocab[:1000], weights[:1000], k=rng.randint(1, 2))
+        queries.append("/search?k=10&q=" + "+".join(terms))
+    return queries
+
+
+async def client(port: int, paths: list, latencies: list) -> int:
+    # One keep-alive connection; returns the number of non-200 answers
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    failures = 0
+    try:
+        for path in paths:
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+
+            latencies.append(time.perf_counter() - start)
+            failures += status != 200
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return failures
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_load(engine, workers: int, clients: int, requests: int,
+                   queries: list) -> None:
+    server = SearchServer(engine, port=0, workers=workers,
+                          max_pending=clients * 2)
+    await server.start()
+    try:
+        latencies = []
+        start = time.perf_counter()
+        failures = await asyncio.gather(*(
+            client(server.port, queries[i * requests:(i + 1) * requests], latencies)
+            for i in range(clients)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"  {total} requests in {elapsed:.2f}s  "
+          f"{total / elapsed:8.0f} req/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:6.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms  "
+          f"errors {sum(failures)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests per client")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for cache_size in (0, 1024):
+        engine, vocab, weights = make_engine(args.docs, args.words, cache_size)
+        queries = make_queries(vocab, weights, args.clients * args.requests, seed=1)
+        print(f"{args.docs} docs, {args.clients} clients x {args.requests} "
+              f"requests, {args.workers} workers, cache_size={cache_size}")
+        asyncio.run(run_load(engine, args.workers, args.clients,
+                             args.requests, queries))
+
+
+if __name__ == "__main__":
+    main()
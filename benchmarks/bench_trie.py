@@ -0,0 +1,171 @@
+"""
+Benchmark: radix-tree Trie vs. the original per-character Trie.
+
+Generates a synthetic vocabulary and reports, for both structures, the
+memory allocated while building (tracemalloc), build time, and the time
+for exact lookups and short-prefix searches. The radix Trie is built
+both by repeated insert() and by Trie.from_sorted(). Finally it times
+fuzzy_search() for misspelled words at edit distance 1 and 2.
+
+Usage:
+    python benchmarks/bench_trie.py [--terms 200000] [--lookups 100000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from trie import Trie  # noqa: E402
+
+
+class CharTrieNode:
+    # The original node layout: one object + dict per character
+    def __init__(self):
+        self.children = {}
+        self.is_end_of_word = False
+        self.term = None
+
+
+class CharTrie:
+    """The original Trie, kept here as the benchmark baseline."""
+
+    def __init__(self):
+        self.root = CharTrieNode()
+
+    def insert(self, term):
+        node = self.root
+        for char in term:
+            if char not in node.children:
+                node.children[char] = CharTrieNode()
+            node = node.children[char]
+        node.is_end_of_word = True
+        node.term = term
+
+    def search_exact(self, term):
+        node = self.root
+        for char in term:
+            if char not in node.children:
+                return False
+            node = node.children[char]
+        return node.is_end_of_word
+
+    def search_prefix(self, prefix):
+        node = self.root
+        for char in prefix:
+            if char not in node.children:
+                return []
+            node = node.children[char]
+        results = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.is_end_of_word:
+                results.append(node.term)
+            stack.extend(node.children.values())
+        return results
+
+
+def make_vocabulary(count: int, seed: int = 0) -> list:
+    # Word-like terms built from a pool of stems and suffixes, so that
+    # prefixes are shared the way they are in real vocabularies
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase
+    stems = ["".join(rng.choices(letters, k=rng.randint(3, 7)))
+             for _ in range(max(1, count // 8))]
+    suffixes = ["", "s", "ed", "ing", "er", "ers", "ly", "ness", "tion", "able"]
+
+    terms = set()
+    while len(terms) < count:
+        term = rng.choice(stems) + rng.choice(suffixes)
+        if rng.random() < 0.3:
+            term += "".join(rng.choices(letters, k=rng.randint(1, 4)))
+        terms.add(term)
+    return list(terms)
+
+
+def measure_build(build) -> tuple:
+    # Timed without tracing (tracemalloc slows allocation down a lot),
+    # then built again to measure the memory it keeps
+    start = time.perf_counter()
+    trie = build()
+    elapsed = time.perf_counter() - start
+    del trie
+
+    tracemalloc.start()
+    trie = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return trie, elapsed, size
+
+
+def time_lookups(trie, probes: list, prefixes: list) -> tuple:
+    start = time.perf_counter()
+    for term in probes:
+        trie.search_exact(term)
+    exact = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for prefix in prefixes:
+        trie.search_prefix(prefix)
+    prefix_time = time.perf_counter() - start
+    return exact, prefix_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--terms", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    terms = make_vocabulary(args.terms)
+    rng = random.Random(1)
+    probes = [rng.choice(terms) for _ in range(args.lookups // 2)]
+    probes += [term + "x" for term in probes]   # half are misses
+    prefixes = [rng.choice(terms)[:3] for _ in range(200)]
+
+    builds = [
+        ("char trie (insert)", lambda: _insert_all(CharTrie(), terms)),
+        ("radix trie (insert)", lambda: _insert_all(Trie(), terms)),
+        ("radix trie (from_sorted)", lambda: Trie.from_sorted(sorted(terms))),
+    ]
+
+    print(f"{len(terms)} terms, {len(probes)} exact lookups, "
+          f"{len(prefixes)} 3-letter prefix searches")
+    print(f"{'structure':26s} {'memory':>10s} {'build':>8s} "
+          f"{'exact':>8s} {'prefix':>8s}")
+
+    for name, build in builds:
+        trie, build_time, size = measure_build(build)
+        exact, prefix_time = time_lookups(trie, probes, prefixes)
+        print(f"{name:26s} {size / 2**20:8.1f}MB {build_time:7.2f}s "
+              f"{exact:7.2f}s {prefix_time:7.2f}s")
+
+    # Typo lookups: drop one character from a random term
+    typos = []
+    for term in rng.sample(terms, 200):
+        cut = rng.randrange(len(term))
+        typos.append(term[:cut] + term[cut + 1:])
+
+    for distance in (1, 2):
+        start = time.perf_counter()
+        for word in typos:
+            trie.fuzzy_search(word, distance, limit=1)   # as in search()
+        per_query = (time.perf_counter() - start) / len(typos)
+        print(f"fuzzy_search distance {distance}: "
+              f"{per_query * 1000:6.2f}ms per query")
+
+
+def _insert_all(trie, terms):
+    for term in terms:
+        trie.insert(term)
+    return trie
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Deterministic synthetic HTML corpora for benchmarks.
+
+Words are made of random syllables, so the vocabulary has realistic
+word lengths and shared prefixes (which matters for the Trie). Word
+frequencies follow a Zipf law: the word of rank r is drawn with
+probability proportional to 1 / r**s.
+
+Every page is generated from its own seed ("<seed>:<doc number>"), so a
+corpus is identical across runs and any page can be regenerated on its
+own. Pages look like real pages: a title, a few
+paragraphs, a link list and <script> / <style> noise that the
+extractors must skip.
+"""
+
+import json
+import os
+import random
+import sys
+from itertools import accumulate
+from typing import NamedTuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tokenizer import STOP_WORDS  # noqa: E402
+
+_SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"] + \
+             [c + v + "n" for c in "bdklmst" for v in "aeiou"]
+
+# Written next to the pages; a folder with a matching spec is reused
+SPEC_FILE = "corpus.json"
+
+
+class CorpusSpec(NamedTuple):
+    """Parameters that fully determine a corpus."""
+    docs: int
+    words_per_doc: int = 300
+    vocab_size: int = 50_000
+    zipf_s: float = 1.0
+    seed: int = 0
+
+
+def make_vocabulary(size: int, seed: int = 0) -> list:
+    """
+    Return `size` distinct pseudo-words (never stop words), most
+    frequent rank first. Short words tend to get low ranks, as in
+    natural text.
+    """
+    rng = random.Random(f"vocab:{seed}")
+    words = []
+    seen = set(STOP_WORDS)
+    syllables = 1
+    while len(words) < size:
+        # Grow the word length as the short combinations run out
+        for _ in range(size * 4):
+            word = "".join(rng.choices(_SYLLABLES, k=syllables + rng.randint(0, 1)))
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+                if len(words) == size:
+                    break
+        syllables += 1
+    return words
+
+
+def zipf_cumulative(size: int, s: float = 1.0) -> list:
+    """Cumulative Zipf weights for ranks 1..size (for random.choices)."""
+    return list(accumulate(1 / rank ** s for rank in range(1, size + 1)))
+
+
+class ZipfSampler:
+    """Draw words from a vocabulary with Zipf-distributed frequencies."""
+
+    def __init__(self, vocabulary: list, s: float = 1.0):
+        self.vocabulary = vocabulary
+        self.cum_weights = zipf_cumulative(len(vocabulary), s)
+
+    def sample(self, rng: random.Random, k: int) -> list:
+        return rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=k)
+
+
+def render_page(number: int, spec: CorpusSpec, sampler: ZipfSampler) -> str:
+    """HTML for page `number` of the corpus described by spec."""
+    rng = random.Random(f"{spec.seed}:{number}")
+    words = sampler.sample(rng, max(1, int(rng.gauss(spec.words_per_doc,
+                                                     spec.words_per_doc / 4))))
+    title = " ".join(words[:rng.randint(2, 6)]).title()
+
+    paragraphs = []
+    start = 0
+    while start < len(words):
+        end = start + rng.randint(20, 80)
+        paragraphs.append(f"<p>{' '.join(words[start:end])}.</p>")
+        start = end
+
+    links = "".join(
+        f'<li><a href="doc{rng.randrange(spec.docs):07d}.html">{word}</a></li>'
+        for word in sampler.sample(rng, 3)
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{title}</title>"
+        f"<style>p {{ margin: {number % 7}px; }}</style></head><body>"
+        f"<h1>{title}</h1>{''.join(paragraphs)}<ul>{links}</ul>"
+        f"<script>var page = {number};</script></body></html>"
+    )
+
+
+def generate_corpus(folder: str, spec: CorpusSpec) -> list:
+    """
+    Write the corpus described by spec into folder (created if needed)
+    as doc0000000.html, doc0000001.html, ...
+
+    If the folder already holds a corpus with the same spec it is
+    reused as is.
+
+    Returns:-
+    list
+        The vocabulary, most frequent word first.
+    """
+    vocabulary = make_vocabulary(spec.vocab_size, spec.seed)
+    spec_path = os.path.join(folder, SPEC_FILE)
+
+    if os.path.exists(spec_path):
+        with open(spec_path, encoding="utf-8") as f:
+            if f.read() == json.dumps(spec._asdict()):
+                return vocabulary
+
+    os.makedirs(folder, exist_ok=True)
+    sampler = ZipfSampler(vocabulary, spec.zipf_s)
+    for number in range(spec.docs):
+        path = os.path.join(folder, f"doc{number:07d}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_page(number, spec, sampler))
+
+    # Written last: an interrupted run is regenerated next time
+    with open(spec_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(spec._asdict()))
+    return vocabulary
+
+
+def make_queries(vocabulary: list, count: int, s: float = 1.0,
+                 seed: int = 0, max_terms: int = 3) -> list:
+    """
+    Query log of `count` queries of 1..max_terms words. Words are drawn
+    from the same Zipf law as the pages, so popular queries repeat.
+    """
+    rng = random.Random(f"queries:{seed}")
+    sampler = ZipfSampler(vocabulary, s)
+    return [" ".join(sampler.sample(rng, rng.randint(1, max_terms)))
+            for _ in range(count)]
+
+
+def make_prefixes(vocabulary: list, count: int, s: float = 1.0,
+                  seed: int = 0) -> list:
+    """Completion prefixes: the first 1-4 letters of Zipf-drawn words."""
+    rng = random.Random(f"prefixes:{seed}")
+    sampler = ZipfSampler(vocabulary, s)
+    return [word[:rng.randint(1, 4)] for word in sampler.sample(rng, count)]
@@ -0,0 +1,321 @@
+"""
+Benchmark suite for the indexing and query paths.
+
+For each corpus size it generates (or reuses) a synthetic corpus with
+benchmarks.corpus and measures, in a fresh worker process:
+
+- build:   SearchEngine.build_index() wall time and documents / second
+- parse:   parser.load_page() latency per page
+- search:  SearchEngine.search() latency per query, full ranking and
+           top 10, with the query cache disabled
+- prefix:  Trie.search_prefix() latency for top-10 completions
+- memory:  peak resident set size of the worker process
+
+Latencies are reported as p50 / p90 / p99 / max in milliseconds.
+Results are written as JSON; `compare` checks two result files and
+flags every metric that got worse by more than a threshold.
+
+Usage:
+    python -m benchmarks run [--sizes 1000 10000 ...] [--out results.json]
+    python -m benchmarks compare base.json new.json [--threshold 0.10]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from benchmarks.corpus import (CorpusSpec, generate_corpus,  # noqa: E402
+                               make_prefixes, make_queries)
+
+try:
+    import resource
+except ImportError:   # not available on Windows
+    resource = None
+
+# Metrics where a larger value is better; everything else is a time or
+# a size, where smaller is better
+HIGHER_IS_BETTER = {"docs_per_s"}
+
+
+def percentiles(samples: list) -> dict:
+    """p50 / p90 / p99 / max of latencies given in seconds, in ms."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        "p50_ms": round(at(0.50) * 1000, 4),
+        "p90_ms": round(at(0.90) * 1000, 4),
+        "p99_ms": round(at(0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+def time_each(func, items) -> list:
+    # Latency of func(item) for every item
+    samples = []
+    clock = time.perf_counter
+    for item in items:
+        start = clock()
+        func(item)
+        samples.append(clock() - start)
+    return samples
+
+
+def peak_rss_mb():
+    # Peak resident set size of this process (ru_maxrss is KiB on Linux,
+    # bytes on macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def measure(folder: str, vocabulary: list, options: dict) -> dict:
+    """Run every measurement on one generated corpus."""
+    from parser import load_page
+    from search_engine import SearchEngine
+
+    engine = SearchEngine(folder, extractor=options["extractor"], cache_size=0)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.build_index(workers=options["workers"])
+    build = time.perf_counter() - start
+    docs = len(engine.titles)
+
+    pages = sorted(engine.titles)[:options["parse_pages"]]
+    parse = time_each(
+        lambda name: load_page(os.path.join(folder, name), options["extractor"]),
+        pages
+    )
+
+    queries = make_queries(vocabulary, options["queries"], seed=1)
+    search_full = time_each(engine.search, queries)
+    search_top = time_each(lambda query: engine.search(query, top_k=10), queries)
+
+    prefixes = make_prefixes(vocabulary, options["queries"], seed=2)
+    trie = engine.index.trie
+    prefix = time_each(lambda text: trie.search_prefix(text, 10), prefixes)
+
+    return {
+        "docs": docs,
+        "terms": len(engine.index.index),
+        "build_s": round(build, 4),
+        "docs_per_s": round(docs / build, 1) if build else None,
+        "parse": percentiles(parse),
+        "search": percentiles(search_full),
+        "search_top10": percentiles(search_top),
+        "prefix": percentiles(prefix),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _worker(folder, vocabulary, options, queue):
+    queue.put(measure(folder, vocabulary, options))
+
+
+# Seconds between checks that the measuring process is still alive
+_POLL_S = 1.0
+
+
+def run_size(size: int, options: dict) -> dict:
+    """
+    Generate the corpus for one size and measure it in a new process.
+
+    If that process dies without a result (e.g. killed for running out
+    of memory), the result only has an "error" entry besides the corpus
+    details.
+    """
+    spec = CorpusSpec(docs=size, words_per_doc=options["words"],
+                      vocab_size=options["vocab"], zipf_s=options["zipf"],
+                      seed=options["seed"])
+    folder = os.path.join(options["corpus_dir"],
+                          f"docs{size}-w{spec.words_per_doc}-v{spec.vocab_size}"
+                          f"-s{spec.zipf_s}-seed{spec.seed}")
+
+    start = time.perf_counter()
+    vocabulary = generate_corpus(folder, spec)
+    generated = time.perf_counter() - start
+
+    # A fresh process per size, so the peak RSS belongs to this size only
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_worker,
+                              args=(folder, vocabulary, options, queue))
+    process.start()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=_POLL_S)
+        except queue_module.Empty:
+            if not process.is_alive():
+                break
+    if result is None:
+        # A result put just before the process exited may still be in
+        # transit
+        try:
+            result = queue.get(timeout=_POLL_S)
+        except queue_module.Empty:
+            result = {"error": "measuring process exited with code "
+                               f"{process.exitcode}"}
+    process.join()
+
+    result["corpus"] = spec._asdict()
+    result["generate_s"] = round(generated, 4)
+    return result
+
+
+def run(options: dict) -> dict:
+    """Run the suite for every size; returns the JSON-ready results."""
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "options": {key: value for key, value in options.items()
+                        if key != "corpus_dir"},
+        },
+        "sizes": {},
+    }
+    for size in options["sizes"]:
+        print(f"docs={size} ...", flush=True)
+        result = results["sizes"][str(size)] = run_size(size, options)
+        if "error" in result:
+            print(f"  failed: {result['error']}", flush=True)
+            continue
+        print(f"  build {result['build_s']:.2f}s ({result['docs_per_s']} docs/s), "
+              f"search p99 {result['search']['p99_ms']} ms, "
+              f"prefix p99 {result['prefix']['p99_ms']} ms, "
+              f"peak RSS {result['peak_rss_mb']} MB", flush=True)
+    return results
+
+
+def flatten(result: dict, prefix: str = "") -> dict:
+    # {"search": {"p99_ms": 1}} -> {"search.p99_ms": 1}; numbers only
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+# Counts that describe the corpus rather than its speed, and the single
+# slowest sample, which is too noisy to compare
+_NOT_COMPARED = {"docs", "terms", "generate_s", "max_ms"}
+
+
+def compare(base: dict, new: dict, threshold: float = 0.10) -> list:
+    """
+    Compare two result files.
+
+    Returns:-
+    list of (size, metric, base value, new value, change, regressed)
+        change is the relative change (new - base) / base; regressed is
+        True if the metric got worse by more than threshold.
+    """
+    rows = []
+    for size, new_result in new["sizes"].items():
+        base_result = base["sizes"].get(size)
+        if base_result is None:
+            continue
+        base_flat, new_flat = flatten(base_result), flatten(new_result)
+        for metric, new_value in new_flat.items():
+            base_value = base_flat.get(metric)
+            if (metric.rsplit(".", 1)[-1] in _NOT_COMPARED
+                    or metric.startswith("corpus.") or not base_value):
+                continue
+            change = (new_value - base_value) / base_value
+            if metric.rsplit(".", 1)[-1] in HIGHER_IS_BETTER:
+                regressed = change < -threshold
+            else:
+                regressed = change > threshold
+            rows.append((size, metric, base_value, new_value, change, regressed))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000],
+                            help="corpus sizes in documents (up to 10^6)")
+    run_parser.add_argument("--words", type=int, default=300,
+                            help="average words per document")
+    run_parser.add_argument("--vocab", type=int, default=50_000)
+    run_parser.add_argument("--zipf", type=float, default=1.0,
+                            help="Zipf exponent of the word frequencies")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--queries", type=int, default=1000)
+    run_parser.add_argument("--parse-pages", type=int, default=200)
+    run_parser.add_argument("--extractor", default="bs4", choices=["bs4", "fast"])
+    run_parser.add_argument("--workers", type=int, default=None,
+                            help="build_index worker processes")
+    run_parser.add_argument("--corpus-dir", default=None,
+                            help="keep generated corpora here for reuse "
+                                 "(default: a temporary folder)")
+    run_parser.add_argument("--out", default="bench_results.json")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative change counted as a regression")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        rows = compare(base, new, args.threshold)
+        for size, metric, old, current, change, regressed in rows:
+            flag = "REGRESSION" if regressed else ""
+            print(f"{size:>8} {metric:<24} {old:>12g} -> {current:<12g} "
+                  f"{change:+7.1%} {flag}")
+        regressions = sum(row[-1] for row in rows)
+        print(f"{regressions} regression(s) over {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    options = {
+        "sizes": args.sizes, "words": args.words, "vocab": args.vocab,
+        "zipf": args.zipf, "seed": args.seed, "queries": args.queries,
+        "parse_pages": args.parse_pages, "extractor": args.extractor,
+        "workers": args.workers,
+    }
+    with contextlib.ExitStack() as stack:
+        if args.corpus_dir is None:
+            options["corpus_dir"] = stack.enter_context(tempfile.TemporaryDirectory())
+        else:
+            options["corpus_dir"] = args.corpus_dir
+        results = run(options)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+    failed = [size for size, result in results["sizes"].items() if "error" in result]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
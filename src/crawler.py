@@ -0,0 +1,483 @@
+"""
+Link-following crawler that feeds fetched pages into a SearchEngine.
+
+Starting from seed URLs (http://, https://, file://) or file paths, the
+crawler fetches pages, extracts their <a href> links and follows them:
+
+- Frontier: an asyncio queue served by `concurrency` worker tasks, so
+  many fetches are in flight at once on one event loop.
+- Dedupe: every URL is normalized (fragment dropped, scheme and host
+  lower-cased, default port removed) and enqueued at most once.
+- Politeness: at most `per_host` requests to the same host at a time,
+  and request starts to one host at least `delay` seconds apart.
+- Scope: only links to the seeds' hosts (or `allowed_hosts`) are
+  followed, up to `max_depth` links away from a seed and `max_pages`
+  fetches in total.
+
+Fetched HTML / text pages are parsed (parser.parse_content), tokenized
+and indexed through SearchEngine.add_document, `batch_size` pages per
+published index generation, so searches see the crawl progress. The
+links of every fetched page are recorded in a LinkGraph.
+
+Only the standard library is used: HTTP requests are plain HTTP/1.0
+GETs over asyncio streams, files are read in a worker thread.
+
+Usage:
+    python src/crawler.py SEED [SEED ...] [--concurrency 8] [--max-pages N]
+                          [--graph links.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import time
+from urllib.parse import unquote, urljoin, urlsplit, urlunsplit
+from urllib.request import url2pathname
+
+from parser import extract_links, parse_content
+
+_SCHEMES = {"http", "https", "file"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_REDIRECTS = {301, 302, 303, 307, 308}
+
+# Content types that are parsed and indexed; anything else is skipped
+_TEXT_TYPES = {"text/html", "text/plain", "application/xhtml+xml"}
+
+_USER_AGENT = "search-engine-crawler/1.0"
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be fetched (network error, bad status)."""
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of an absolute URL, used for deduplication: the
+    fragment is dropped, scheme and host are lower-cased, a default
+    port is removed and an empty path becomes "/".
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if parts.port is not None and _DEFAULT_PORTS.get(scheme) == parts.port:
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path or "/"
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+def seed_url(seed: str) -> str:
+    """URL of a seed given as a URL or as a file path."""
+    if urlsplit(seed).scheme in _SCHEMES:
+        return normalize_url(seed)
+    return normalize_url("file://" + os.path.abspath(seed).replace(os.sep, "/"))
+
+
+def _host(url: str) -> str:
+    # Politeness / scope key: host[:port] ("" for files)
+    return urlsplit(url).netloc
+
+
+class LinkGraph:
+    """
+    Directed graph of the links between crawled pages.
+
+    Attributes:-
+    edges : dict
+        page URL -> list of the distinct normalized URLs it links to,
+        in page order (followed or not). Only fetched pages are keys.
+    """
+
+    def __init__(self):
+        self.edges = {}
+
+    def add(self, source: str, targets) -> None:
+        """Record the outgoing links of a page (added to earlier ones)."""
+        links = self.edges.setdefault(source, [])
+        known = set(links)
+        for target in targets:
+            if target not in known:
+                known.add(target)
+                links.append(target)
+
+    def outgoing(self, url: str) -> list:
+        return list(self.edges.get(url, ()))
+
+    def incoming(self, url: str) -> list:
+        """Pages linking to url, in crawl order."""
+        return [source for source, targets in self.edges.items()
+                if url in targets]
+
+    def __contains__(self, url) -> bool:
+        return url in self.edges
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def to_dict(self) -> dict:
+        """Plain-dict form (e.g. for JSON): url -> list of urls."""
+        return {source: list(targets) for source, targets in self.edges.items()}
+
+
+async def fetch(url: str, timeout: float = 10.0,
+                max_bytes: int = 1 << 21) -> tuple:
+    """
+    Fetch one http(s):// or file:// URL.
+
+    Returns:-
+    tuple
+        (status, headers, body): the HTTP status (200 for files), the
+        response headers with lower-cased names, and the body bytes
+        (at most max_bytes).
+
+    Raises FetchError on network and file errors or a timeout.
+    """
+    scheme = urlsplit(url).scheme
+    try:
+        if scheme == "file":
+            body = await asyncio.wait_for(
+                asyncio.to_thread(_read_file, url, max_bytes), timeout
+            )
+            return 200, {}, body
+        return await asyncio.wait_for(_fetch_http(url, max_bytes), timeout)
+    except asyncio.TimeoutError:
+        raise FetchError(f"timed out after {timeout}s") from None
+    except (OSError, ValueError) as error:
+        raise FetchError(str(error) or type(error).__name__) from error
+
+
+def _read_file(url: str, max_bytes: int) -> bytes:
+    path = url2pathname(unquote(urlsplit(url).path))
+    with open(path, "rb") as f:
+        return f.read(max_bytes)
+
+
+async def _fetch_http(url: str, max_bytes: int) -> tuple:
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or _DEFAULT_PORTS[parts.scheme]
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, port,
+        ssl=ssl.create_default_context() if secure else None
+    )
+    try:
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        # HTTP/1.0 with Connection: close -> no chunked encoding, the
+        # body ends at EOF
+        writer.write(
+            f"GET {target} HTTP/1.0\r\nHost: {parts.netloc}\r\n"
+            f"User-Agent: {_USER_AGENT}\r\n"
+            f"Accept: text/html, text/plain;q=0.9, */*;q=0.1\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+        status_line = (await reader.readline()).decode("latin-1").split(None, 2)
+        if len(status_line) < 2 or not status_line[1].isdigit():
+            raise FetchError("malformed HTTP response")
+        status = int(status_line[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        # read() returns what is buffered, so read on until EOF
+        body = bytearray()
+        while len(body) < max_bytes:
+            chunk = await reader.read(max_bytes - len(body))
+            if not chunk:
+                break
+            body += chunk
+        return status, headers, bytes(body)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+def _decode(body: bytes, content_type: str) -> str:
+    # Body text using the charset of the Content-Type header (UTF-8 if
+    # missing or unknown)
+    charset = "utf-8"
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"')
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+class _HostSlot:
+    # Politeness state of one host
+    def __init__(self, per_host: int):
+        self.semaphore = asyncio.Semaphore(per_host)
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+
+
+class Crawler:
+    """
+    Concurrent crawler indexing into a SearchEngine.
+
+    Parameters:-
+    engine : SearchEngine
+        Receives every fetched page (add_document) in batch() blocks.
+    concurrency : int
+        Number of pages fetched at the same time.
+    per_host : int
+        Most requests in flight to one host.
+    delay : float
+        Least time in seconds between two request starts to one host.
+    max_pages : int, optional
+        Stop after this many fetches (failed ones included).
+    max_depth : int, optional
+        Follow links at most this many steps away from a seed.
+    allowed_hosts : Iterable[str], optional
+        host[:port] values whose links are followed; defaults to the
+        hosts of the seeds (file seeds allow every file:// link).
+    timeout : float
+        Seconds allowed per fetch.
+    max_bytes : int
+        Pages are truncated to this many bytes.
+    batch_size : int
+        Pages indexed per published index generation.
+
+    Attributes:-
+    graph : LinkGraph
+        Links of every fetched page.
+    pages : dict
+        URL -> document id of every indexed page, in fetch order.
+    errors : dict
+        URL -> reason, for failed fetches and skipped (non-text) pages.
+    """
+
+    def __init__(self, engine, concurrency: int = 8, per_host: int = 2,
+                 delay: float = 0.0, max_pages: int = None,
+                 max_depth: int = None, allowed_hosts=None,
+                 timeout: float = 10.0, max_bytes: int = 1 << 21,
+                 batch_size: int = 20):
+        if concurrency < 1 or per_host < 1:
+            raise ValueError("concurrency and per_host must be at least 1")
+        self.engine = engine
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.allowed_hosts = set(allowed_hosts) if allowed_hosts is not None else None
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+
+        self.graph = LinkGraph()
+        self.pages = {}
+        self.errors = {}
+        self._seen = set()
+        self._slots = {}
+        self._pending = []   # parsed pages not indexed yet
+        self._fetches = 0
+
+    async def crawl(self, seeds) -> LinkGraph:
+        """
+        Crawl from the seeds until the frontier is empty (or max_pages
+        is reached) and index every fetched page.
+
+        Parameters:-
+        seeds : Iterable[str]
+            URLs or file paths.
+
+        Returns:-
+        LinkGraph
+            self.graph
+        """
+        seeds = [seed_url(seed) for seed in seeds]
+        if self.allowed_hosts is None:
+            self.allowed_hosts = {_host(url) for url in seeds}
+
+        queue = asyncio.Queue()
+        for url in seeds:
+            self._enqueue(queue, url, 0)
+
+        workers = [asyncio.create_task(self._worker(queue))
+                   for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self._flush()
+        return self.graph
+
+    def _enqueue(self, queue: asyncio.Queue, url: str, depth: int) -> None:
+        if url in self._seen:
+            return
+        if urlsplit(url).scheme not in _SCHEMES or _host(url) not in self.allowed_hosts:
+            return
+        if self.max_depth is not None and depth > self.max_depth:
+            return
+        self._seen.add(url)
+        queue.put_nowait((url, depth))
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            url, depth = await queue.get()
+            try:
+                if self.max_pages is None or self._fetches < self.max_pages:
+                    self._fetches += 1
+                    await self._visit(queue, url, depth)
+            except FetchError as error:
+                self.errors[url] = str(error)
+            except Exception as error:
+                # A page that breaks the parser (or the index) must not
+                # take its worker down: queue.join() would never return
+                self.errors[url] = f"{type(error).__name__}: {error}"
+            finally:
+                queue.task_done()
+
+    async def _visit(self, queue: asyncio.Queue, url: str, depth: int) -> None:
+        status, headers, body = await self._polite_fetch(url)
+
+        if status in _REDIRECTS and "location" in headers:
+            target = normalize_url(urljoin(url, headers["location"]))
+            self.graph.add(url, [target])
+            self._enqueue(queue, target, depth)
+            return
+        if status != 200:
+            raise FetchError(f"HTTP {status}")
+
+        content_type = headers.get("content-type", "text/html")
+        if content_type.split(";")[0].strip().lower() not in _TEXT_TYPES:
+            self.errors[url] = f"skipped {content_type}"
+            return
+
+        # Parsing is CPU-bound, keep the event loop free for fetches
+        content = _decode(body, content_type)
+        title, text, links = await asyncio.to_thread(
+            self._parse, url, content
+        )
+        self.graph.add(url, links)
+        for link in links:
+            self._enqueue(queue, link, depth + 1)
+
+        self._pending.append((url, text, title))
+        if len(self._pending) >= self.batch_size:
+            await self._flush()
+
+    async def _polite_fetch(self, url: str) -> tuple:
+        slot = self._slots.get(_host(url))
+        if slot is None:
+            slot = self._slots[_host(url)] = _HostSlot(self.per_host)
+
+        async with slot.semaphore:
+            if self.delay > 0:
+                async with slot.lock:
+                    wait = slot.next_start - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    slot.next_start = time.monotonic() + self.delay
+            return await fetch(url, self.timeout, self.max_bytes)
+
+    def _parse(self, url: str, content: str) -> tuple:
+        # (title, text, absolute links) of a page
+        name = urlsplit(url).path.rstrip("/") or url
+        title, text = parse_content(content, name, self.engine.extractor)
+        links = []
+        for href in extract_links(content):
+            link = urljoin(url, href)
+            if urlsplit(link).scheme in _SCHEMES:
+                links.append(normalize_url(link))
+        return title, text, links
+
+    async def _flush(self) -> None:
+        # Index the parsed pages as one new index generation, in a
+        # thread so fetching goes on meanwhile. If indexing fails the
+        # whole batch is dropped (batch() publishes nothing).
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            doc_ids = await asyncio.to_thread(self._index_pages, pending)
+        except Exception as error:
+            for url, _, _ in pending:
+                self.errors[url] = f"{type(error).__name__}: {error}"
+            return
+        for (url, _, _), doc_id in zip(pending, doc_ids):
+            self.pages[url] = doc_id
+
+    def _index_pages(self, pending: list) -> list:
+        doc_ids = []
+        with self.engine.batch():
+            for url, text, title in pending:
+                doc_ids.append(self.doc_id(url))
+                self.engine.add_document(doc_ids[-1], text, title)
+        return doc_ids
+
+    def doc_id(self, url: str) -> str:
+        """
+        Document id of a page: for a file inside the engine's data
+        folder its relative path (as build_index would name it), else
+        the URL.
+        """
+        if urlsplit(url).scheme == "file":
+            path = url2pathname(unquote(urlsplit(url).path))
+            folder = os.path.abspath(self.engine.data_folder)
+            if os.path.commonpath([folder, path]) == folder:
+                return os.path.relpath(path, folder).replace(os.sep, "/")
+        return url
+
+
+def crawl(engine, seeds, **options) -> Crawler:
+    """
+    Run a Crawler (options as for Crawler) to completion from
+    synchronous code; returns it for its graph, pages and errors.
+    """
+    crawler = Crawler(engine, **options)
+    asyncio.run(crawler.crawl(seeds))
+    return crawler
+
+
+def main() -> None:
+    from search_engine import SearchEngine
+
+    parser = argparse.ArgumentParser(description="Crawl and index linked pages.")
+    parser.add_argument("seeds", nargs="+", help="seed URLs or files")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="seconds between requests to one host")
+    parser.add_argument("--max-pages", type=int)
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--graph", help="write the link graph to this JSON file")
+    parser.add_argument("--snapshot", help="save the crawled index here")
+    args = parser.parse_args()
+
+    engine = SearchEngine(".")
+    crawler = crawl(engine, args.seeds, concurrency=args.concurrency,
+                    per_host=args.per_host, delay=args.delay,
+                    max_pages=args.max_pages, max_depth=args.max_depth)
+    print(f"Indexed {len(crawler.pages)} pages, {len(crawler.errors)} failed "
+          f"or skipped.")
+    for url, reason in crawler.errors.items():
+        print(f"- {url}: {reason}")
+
+    if args.graph:
+        with open(args.graph, "w", encoding="utf-8") as f:
+            json.dump(crawler.graph.to_dict(), f, indent=2)
+    if args.snapshot:
+        engine.save_snapshot(args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
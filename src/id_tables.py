@@ -0,0 +1,234 @@
+"""
+Dense integer ids for documents and terms.
+
+The inverted index works on integers internally: each document gets a
+doc id and each term a term id, both handed out in insertion order and
+not reused (removed slots hold None) until the index is compacted,
+which renumbers the live ids densely in their old order. Postings are
+then sorted arrays of doc ids, so intersecting and scoring compare
+small ints instead of hashing file names, and no posting repeats a
+file name string.
+
+DocumentTable maps doc ids to document names, titles and lengths;
+TermDictionary maps terms to term ids. The read-only Mapping views
+(TitlesView, LengthsView) present them keyed by name again, for callers
+that think in file names.
+"""
+
+from array import array
+from collections.abc import Mapping
+
+
+class DocumentTable:
+    """
+    doc id -> (name, title, length), plus name -> doc id.
+
+    Attributes:-
+    names : list
+        Document name per doc id (None once deleted).
+    titles : list
+        Display title per doc id (None once deleted).
+    lengths : array('I')
+        Token count per doc id (0 once deleted).
+    ids : dict
+        document name -> doc id, live documents only, in id order.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.titles = []
+        self.lengths = array("I")
+        self.ids = {}
+
+    def add(self, name: str, length: int, title: str = None) -> int:
+        """Give a new document the next doc id and return it."""
+        doc = len(self.names)
+        self.names.append(name)
+        self.titles.append(name if title is None else title)
+        self.lengths.append(length)
+        self.ids[name] = doc
+        return doc
+
+    def remove(self, name: str):
+        """Free a document's slot; returns its doc id, or None if unknown."""
+        doc = self.ids.pop(name, None)
+        if doc is not None:
+            self.names[doc] = None
+            self.titles[doc] = None
+            self.lengths[doc] = 0
+        return doc
+
+    def set_title(self, name: str, title: str) -> None:
+        self.titles[self.ids[name]] = title
+
+    def copy(self) -> "DocumentTable":
+        table = DocumentTable()
+        table.names = list(self.names)
+        table.titles = list(self.titles)
+        table.lengths = self.lengths[:]
+        table.ids = dict(self.ids)
+        return table
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def live_ids(self) -> list:
+        """Doc ids of the live documents, ascending."""
+        return list(self.ids.values())
+
+    def free_slots(self) -> int:
+        """Number of doc ids held by deleted documents."""
+        return len(self.names) - len(self.ids)
+
+    def compact(self) -> list:
+        """
+        Drop the slots of deleted documents, renumbering the live ones
+        0, 1, 2, ... in their old order.
+
+        Returns:-
+        list
+            The old doc id of each new doc id.
+        """
+        kept = self.live_ids()
+        self.names = [self.names[doc] for doc in kept]
+        self.titles = [self.titles[doc] for doc in kept]
+        self.lengths = array("I", [self.lengths[doc] for doc in kept])
+        self.ids = {name: doc for doc, name in enumerate(self.names)}
+        return kept
+
+    def to_state(self) -> dict:
+        return {"names": self.names, "titles": self.titles,
+                "lengths": self.lengths.tobytes()}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "DocumentTable":
+        table = cls()
+        table.names = state["names"]
+        table.titles = state["titles"]
+        table.lengths.frombytes(state["lengths"])
+        table.ids = {name: doc for doc, name in enumerate(table.names)
+                     if name is not None}
+        return table
+
+    @classmethod
+    def from_names(cls, names, titles, lengths) -> "DocumentTable":
+        """Table over parallel name / title / length sequences."""
+        table = cls()
+        for name, title, length in zip(names, titles, lengths):
+            table.add(name, length, title)
+        return table
+
+
+class TermDictionary:
+    """
+    term -> term id, plus term id -> term.
+
+    Attributes:-
+    ids : dict
+        term -> term id, live terms only, in insertion order.
+    terms : list
+        Term per term id (None once removed).
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.terms = []
+
+    def add(self, term: str) -> int:
+        """Give a new term the next term id and return it."""
+        term_id = self.ids[term] = len(self.terms)
+        self.terms.append(term)
+        return term_id
+
+    def remove(self, term: str) -> int:
+        term_id = self.ids.pop(term)
+        self.terms[term_id] = None
+        return term_id
+
+    def get(self, term: str):
+        """Term id of term, or None if it is not indexed."""
+        return self.ids.get(term)
+
+    def free_slots(self) -> int:
+        """Number of term ids held by removed terms."""
+        return len(self.terms) - len(self.ids)
+
+    def compact(self) -> list:
+        """
+        Drop the slots of removed terms, renumbering the live ones in
+        their old order.
+
+        Returns:-
+        list
+            The old term id of each new term id.
+        """
+        kept = [term_id for term_id, term in enumerate(self.terms)
+                if term is not None]
+        self.terms = [self.terms[term_id] for term_id in kept]
+        self.ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        return kept
+
+    def copy(self) -> "TermDictionary":
+        dictionary = TermDictionary()
+        dictionary.ids = dict(self.ids)
+        dictionary.terms = list(self.terms)
+        return dictionary
+
+    def __contains__(self, term) -> bool:
+        return term in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_terms(cls, terms: list) -> "TermDictionary":
+        """Dictionary over a term-id-ordered list (None for free ids)."""
+        dictionary = cls()
+        dictionary.terms = terms
+        dictionary.ids = {term: term_id for term_id, term in enumerate(terms)
+                          if term is not None}
+        return dictionary
+
+
+class TitlesView(Mapping):
+    """Read-only document name -> title view of a DocumentTable."""
+
+    def __init__(self, table: DocumentTable):
+        self.table = table
+
+    def __getitem__(self, name: str) -> str:
+        return self.table.titles[self.table.ids[name]]
+
+    def __contains__(self, name) -> bool:
+        return name in self.table.ids
+
+    def __iter__(self):
+        return iter(self.table.ids)
+
+    def __len__(self) -> int:
+        return len(self.table.ids)
+
+
+class LengthsView(Mapping):
+    """Read-only document name -> token count view of a DocumentTable."""
+
+    def __init__(self, table: DocumentTable):
+        self.table = table
+
+    def __getitem__(self, name: str) -> int:
+        return self.table.lengths[self.table.ids[name]]
+
+    def __contains__(self, name) -> bool:
+        return name in self.table.ids
+
+    def __iter__(self):
+        return iter(self.table.ids)
+
+    def __len__(self) -> int:
+        return len(self.table.ids)
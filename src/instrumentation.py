@@ -0,0 +1,231 @@
+"""
+Low-overhead timers and counters for the indexing and query hot paths.
+
+An Instrumentation object collects, per named stage, the number of
+calls, the total time and the slowest call (time.perf_counter), plus
+plain integer counters. Stages are named "<area>.<stage>":
+
+    build.total, build.load_page, build.tokenize, build.parse_parallel
+    index.add_document, index.trie, index.trie_build
+    query.total, query.parse, query.fallback, query.search
+
+Counters include build.documents, query.count, query.cache_hits,
+query.postings (posting-list entries of the query terms),
+query.candidates and query.scored.
+
+When instrumentation is off, DISABLED stands in for it: its timer() hands
+out one shared no-op context manager and its add_time() / count() do
+nothing, so the instrumented code costs a method call per document or
+per query and nothing per posting.
+
+A QueryTrace records what happened while answering one query (stage
+times, corrections, posting-list lengths, candidate counts). Pass one
+to SearchEngine.search(); it is filled in whether or not
+instrumentation is enabled.
+"""
+
+import threading
+import time
+
+clock = time.perf_counter
+
+
+class _Timer:
+    """Context manager timing one stage into instrumentation and trace."""
+
+    __slots__ = ("instrumentation", "stage", "trace", "start")
+
+    def __init__(self, instrumentation, stage: str, trace):
+        self.instrumentation = instrumentation
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = clock() - self.start
+        if self.instrumentation.enabled:
+            self.instrumentation.add_time(self.stage, elapsed)
+        if self.trace is not None:
+            self.trace.stages[self.stage] = self.trace.stages.get(self.stage, 0.0) + elapsed
+        return False
+
+
+class _NullTimer:
+    """Shared do-nothing timer handed out when nothing is recorded."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    """
+    Per-stage timers and named counters (thread-safe).
+
+    Attributes:-
+    timers : dict
+        stage -> [calls, total seconds, slowest call in seconds]
+    counters : dict
+        name -> int
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str, trace=None):
+        """Context manager adding the time spent in its block to stage."""
+        return _Timer(self, stage, trace)
+
+    def add_time(self, stage: str, elapsed: float) -> None:
+        with self._lock:
+            timer = self.timers.get(stage)
+            if timer is None:
+                self.timers[stage] = [1, elapsed, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+                if elapsed > timer[2]:
+                    timer[2] = elapsed
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_query(self, trace: "QueryTrace") -> None:
+        """Add a finished query's counts to the counters."""
+        with self._lock:
+            counters = self.counters
+            for name, amount in (
+                ("query.count", 1),
+                ("query.cache_hits", int(trace.cache_hit)),
+                ("query.postings", sum(trace.postings.values())),
+                ("query.candidates", trace.candidates),
+                ("query.scored", trace.scored),
+            ):
+                counters[name] = counters.get(name, 0) + amount
+
+    def snapshot(self) -> dict:
+        """Copy of the timers (in ms) and counters, e.g. for JSON."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "mean_ms": round(total * 1000 / calls, 4),
+                    "max_ms": round(slowest * 1000, 4),
+                }
+                for stage, (calls, total, slowest) in sorted(self.timers.items())
+            }
+            return {"stages": stages, "counters": dict(sorted(self.counters.items()))}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+
+class _Disabled(Instrumentation):
+    """Instrumentation that records nothing (see DISABLED)."""
+
+    enabled = False
+
+    def timer(self, stage: str, trace=None):
+        if trace is None:
+            return _NULL_TIMER
+        return _Timer(self, stage, trace)
+
+    def add_time(self, stage: str, elapsed: float) -> None:
+        pass
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def record_query(self, trace: "QueryTrace") -> None:
+        pass
+
+
+DISABLED = _Disabled()
+
+
+class QueryTrace:
+    """
+    Record of one search (pass an instance to SearchEngine.search).
+
+    Attributes:-
+    query : str
+        Raw query text.
+    terms : list
+        Indexed terms searched for, after corrections.
+    corrections : dict
+        query word -> indexed term it was replaced with.
+    stages : dict
+        stage -> seconds spent ("query.parse", "query.search", ...).
+    postings : dict
+        term -> length of its posting list.
+    candidates : int
+        Documents that contained every term (for top-k: documents of
+        the rarest term that were examined).
+    scored : int
+        Documents scored completely (after phrase / NEAR checks).
+    results : int
+        Rows returned.
+    cache_hit : bool
+        True if the results came from the query cache.
+    plan : query_planner.PlanNode or None
+        Plan of a boolean query.
+    """
+
+    def __init__(self):
+        self.query = ""
+        self.terms = []
+        self.corrections = {}
+        self.stages = {}
+        self.postings = {}
+        self.candidates = 0
+        self.scored = 0
+        self.results = 0
+        self.cache_hit = False
+        self.plan = None
+
+    def to_dict(self) -> dict:
+        trace = {
+            "query": self.query,
+            "terms": list(self.terms),
+            "corrections": dict(self.corrections),
+            "stages_ms": {stage: round(seconds * 1000, 4)
+                          for stage, seconds in self.stages.items()},
+            "postings": dict(self.postings),
+            "candidates": self.candidates,
+            "scored": self.scored,
+            "results": self.results,
+            "cache_hit": self.cache_hit,
+        }
+        if self.plan is not None:
+            trace["plan"] = self.plan.to_dict()
+        return trace
+
+    def __str__(self) -> str:
+        lines = [f"query {self.query!r}: {self.results} results"
+                 + (" (cached)" if self.cache_hit else "")]
+        for word, term in self.corrections.items():
+            lines.append(f"  corrected {word} -> {term}")
+        for term, length in self.postings.items():
+            lines.append(f"  postings {term}: {length}")
+        lines.append(f"  candidates {self.candidates}, scored {self.scored}")
+        for stage, seconds in self.stages.items():
+            lines.append(f"  {stage}: {seconds * 1000:.3f} ms")
+        return "\n".join(lines)
@@ -7,62 +7,1161 @@ its frequency in each document. This matches the simplified model from
 zyBooks Section 23.6.
 
 Additionally, all unique terms are stored inside a Trie so that index
-terms can be looked up or matched by prefix if needed.
+terms can be looked up or matched by prefix if needed. Bulk builds
+(bulk_load, snapshots, segments) build the Trie once from the sorted
+term list instead of inserting term by term.
+
+Documents and terms are numbered (id_tables.DocumentTable and
+TermDictionary) and each term's postings are two parallel array('I')
+columns of ascending doc ids and frequencies, so the index holds no
+per-posting Python objects; results are mapped back to document names.
+
+AND queries are answered by intersecting sorted doc id arrays, rarest
+term first, with galloping (exponential) search, so their cost follows
+the shortest posting list rather than the longest. When only the best
+top_k documents are needed, a bounded heap and per-term score upper
+bounds let most candidates be dropped before all their terms are probed.
+
+A positional index (InvertedIndex(positional=True)) also keeps, for
+every (term, doc) pair, the token positions of the term as a
+delta-encoded varint byte string. Phrase and proximity checks decode
+them only for documents that already contain every query term.
 """
 
-from collections import defaultdict
+import copy
+import heapq
+from bisect import bisect_left
+from array import array
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Iterable
 from trie import Trie
+from id_tables import DocumentTable, LengthsView, TermDictionary
+from instrumentation import DISABLED
+from scoring import CollectionStats, get_scorer
+from segment import SegmentReader, decode_varints, encode_varints
+
+# needs_compaction() ignores fewer freed doc ids / term ids than this,
+# so small indexes are not renumbered after every few updates
+COMPACT_MIN_FREE = 64
+
+
+def count_terms(tokens: Iterable[str]) -> dict:
+    """
+    Count term frequencies in one pass over a token iterable.
+
+    Returns:-
+    dict
+        term -> frequency, in first-occurrence order.
+    """
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+def count_positions(tokens: Iterable[str]) -> tuple[dict, dict]:
+    """
+    Like count_terms, but also record where each term occurs.
+
+    Returns:-
+    tuple[dict, dict]
+        term -> frequency, and term -> encode_positions() of its token
+        positions, both in first-occurrence order.
+    """
+    positions = {}
+    for pos, token in enumerate(tokens):
+        term_positions = positions.get(token)
+        if term_positions is None:
+            positions[token] = [pos]
+        else:
+            term_positions.append(pos)
+
+    counts = {term: len(plist) for term, plist in positions.items()}
+    encoded = {term: encode_positions(plist) for term, plist in positions.items()}
+    return counts, encoded
+
+
+def encode_positions(positions: list) -> bytes:
+    """
+    Encode ascending token positions as varint gaps from the previous
+    position (the first one from 0). Most gaps fit in one byte.
+    """
+    out = bytearray()
+    previous = 0
+    gaps = []
+    for pos in positions:
+        gaps.append(pos - previous)
+        previous = pos
+    encode_varints(gaps, out)
+    return bytes(out)
+
+
+def decode_positions(data: bytes, count: int) -> list:
+    """Decode count positions written by encode_positions()."""
+    gaps, _ = decode_varints(data, 0, count)
+    pos = 0
+    positions = []
+    for gap in gaps:
+        pos += gap
+        positions.append(pos)
+    return positions
+
+
+def gallop(docs: list, doc, lo: int = 0) -> int:
+    """
+    Return the position of the first item >= doc in docs[lo:].
+
+    Doubles the step from lo until it passes doc, then binary searches
+    the last step, so finding a nearby item costs O(log(distance)).
+    """
+    n = len(docs)
+    bound = 1
+    while lo + bound < n and docs[lo + bound] < doc:
+        bound *= 2
+    return bisect_left(docs, doc, lo + bound // 2, min(lo + bound + 1, n))
+
+
+def intersect_sorted(candidates: list, docs: list) -> list:
+    """
+    Intersect two sorted lists by galloping through the longer one.
+
+    For each candidate, an exponential search from the previous match
+    position finds where it would be in docs, so the cost is
+    O(len(candidates) * log(gap)) instead of O(len(docs)).
+
+    Parameters:-
+    candidates : list
+        Sorted list, ideally the shorter of the two.
+    docs : list
+        Sorted list to search in.
+
+    Returns:-
+    list
+        Items of candidates that also appear in docs, in order.
+    """
+    result = []
+    lo = 0
+    n = len(docs)
+
+    for doc in candidates:
+        lo = gallop(docs, doc, lo)
+        if lo == n:
+            break
+        if docs[lo] == doc:
+            result.append(doc)
+            lo += 1
+
+    return result
+
+
+def subtract_sorted(candidates: list, docs: list) -> list:
+    """
+    Items of the sorted list candidates that do not appear in the sorted
+    list docs, found by galloping through docs like intersect_sorted.
+    """
+    result = []
+    lo = 0
+    n = len(docs)
+
+    for doc in candidates:
+        lo = gallop(docs, doc, lo)
+        if lo == n or docs[lo] != doc:
+            result.append(doc)
+
+    return result
+
+
+class _LaterName:
+    """
+    Heap key for top-k selection: of two equal scores, the entry with
+    the later document name is the weaker one (closer to the root).
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __lt__(self, other) -> bool:
+        return self.name > other.name
+
+
+class PostingsView(Mapping):
+    """
+    Read-only term -> { document_name : frequency } view of an index,
+    for callers that want postings keyed by name (e.g. write_segment).
+    Each lookup builds a new dict from the term's posting arrays.
+    """
+
+    def __init__(self, index: "InvertedIndex"):
+        self._index = index
+
+    def __getitem__(self, term: str) -> dict:
+        postings = self._index.postings(term)
+        if postings is None:
+            raise KeyError(term)
+        names = self._index.docs.names
+        docs, freqs = postings
+        return {names[doc]: freq for doc, freq in zip(docs, freqs)}
+
+    def __contains__(self, term) -> bool:
+        return self._index.has_term(term)
+
+    def __iter__(self):
+        if self._index.segment is not None:
+            return self._index.segment.terms()
+        return iter(self._index.terms)
+
+    def __len__(self) -> int:
+        if self._index.segment is not None:
+            return self._index.segment.term_count
+        return len(self._index.terms)
 
 
 class InvertedIndex:
     """
     Stores:
-    - index:    term -> { document_name : frequency }
-    - trie:     stores all unique terms for fast lookup / prefix search
+    - docs:        DocumentTable, doc id -> name / title / token count
+    - terms:       TermDictionary, term -> term id
+    - doc_arrays:  term id -> array('I') of doc ids, ascending
+    - freq_arrays: term id -> array('I') of frequencies, aligned with
+                   doc_arrays
+    - doc_terms:   doc id -> array('I') of the term ids of the document
+    - positions:   term id -> list of encoded positions aligned with
+                   doc_arrays, only when positional=True (phrase / NEAR
+                   queries)
+    - trie:        stores all unique terms for fast lookup / prefix search
+
+    The name-keyed views index (term -> {name: frequency}) and
+    doc_lengths (name -> token count) present the same data by name.
     """
 
-    def __init__(self):
-        # term -> {doc: frequency}
-        self.index = defaultdict(lambda: defaultdict(int))
+    def __init__(self, positional: bool = False):
+        # doc id <-> document name, title and length; term <-> term id
+        self.docs = DocumentTable()
+        self.terms = TermDictionary()
+
+        # Postings per term id: sorted doc ids and their frequencies.
+        # New documents get the largest doc id, so adding one appends.
+        # Removed terms leave None.
+        self.doc_arrays = []
+        self.freq_arrays = []
 
         # store all unique terms in Trie
         self.trie = Trie()
 
-    def add_document(self, doc_id: str, tokens: list):
-      
+        # doc id -> array of term ids; None until needed (see _forward_index)
+        self.doc_terms = []
+
+        # running totals for CollectionStats; min_length is None when it
+        # has to be recomputed
+        self.total_length = 0
+        self.min_length = 0
+
+        # term id -> encoded positions per posting; None if not positional
+        self.positions = {} if positional else None
+
+        # term -> highest frequency in its postings (top-k upper bounds)
+        self.max_freqs = {}
+
+        # set when the postings come from a memory-mapped segment
+        self.segment = None
+
+        # bumped on every add / replace / delete (query cache invalidation)
+        self.generation = 0
+
+        # stage timers (instrumentation.Instrumentation); off by default
+        self.instrumentation = DISABLED
+
+        # term ids whose arrays this index may change in place; None
+        # until copy() makes it share arrays with another index
+        self._owned = None
+
+    @property
+    def index(self) -> PostingsView:
+        """term -> { document_name : frequency } (read-only view)."""
+        return PostingsView(self)
+
+    @property
+    def doc_lengths(self) -> LengthsView:
+        """document_name -> number of tokens (read-only view)."""
+        return LengthsView(self.docs)
+
+    def add_document(self, doc_id: str, tokens: Iterable[str]):
+
         #Insert all tokens from one document into the inverted index.
-        for token in tokens:
+        #Adding a doc_id that is already indexed replaces that document.
+        #tokens may be any iterable (e.g. tokenizer.iter_tokens), it is
+        #consumed once and never stored as a list.
+
+        # Count the document's terms first (first-occurrence order)
+        if self.positions is not None:
+            self.add_term_counts(doc_id, *count_positions(tokens))
+        else:
+            self.add_term_counts(doc_id, count_terms(tokens))
+
+    def add_term_counts(self, doc_id: str, counts: dict,
+                        positions: dict = None):
+        """
+        Insert a document given as precomputed term frequencies.
+
+        Parameters:-
+        doc_id : str
+            Document name.
+        counts : dict
+            term -> frequency, in first-occurrence order (this is the
+            order new terms are added to the Trie).
+        positions : dict, optional
+            term -> encode_positions() of the term's token positions.
+            Required by a positional index, ignored otherwise.
+        """
+        self._check_writable()
+        if self.positions is not None and positions is None:
+            raise ValueError("a positional index needs term positions")
+
+        if doc_id in self.docs:
+            self.delete_document(doc_id)
+
+        length = sum(counts.values())
+        doc = self.docs.add(doc_id, length)
+
+        term_ids = self.terms.ids
+        doc_arrays = self.doc_arrays
+        freq_arrays = self.freq_arrays
+        max_freqs = self.max_freqs
+        owned = self._owned
+        term_list = array("I")
+        new_terms = []
+        for token, freq in counts.items():
+
+            term_id = term_ids.get(token)
+            if term_id is None:
+                term_id = self.terms.add(token)
+                doc_arrays.append(array("I"))
+                freq_arrays.append(array("I"))
+                if self.positions is not None:
+                    self.positions[term_id] = []
+                if owned is not None:
+                    owned.add(term_id)
+                new_terms.append(token)
+            else:
+                if owned is not None and term_id not in owned:
+                    self._own(term_id)
+                best = max_freqs.get(token)
+                if best is not None and freq > best:
+                    max_freqs[token] = freq
+
+            # doc is the largest doc id, so the arrays stay sorted
+            doc_arrays[term_id].append(doc)
+            freq_arrays[term_id].append(freq)
+            if self.positions is not None:
+                self.positions[term_id].append(positions[token])
+            term_list.append(term_id)
+
+        # Insert new terms into the Trie (unless bulk loading); completions
+        # of known terms are ranked by their new document frequency
+        trie = self.trie
+        if trie is not None:
+            with self.instrumentation.timer("index.trie"):
+                for token in new_terms:
+                    trie.insert(token, 1)
+                if len(new_terms) < len(counts):
+                    new = set(new_terms)
+                    for token in counts:
+                        if token not in new:
+                            trie.set_weight(token, len(doc_arrays[term_ids[token]]))
+
+        # Remember which terms the document used so it can be removed
+        if self.doc_terms is not None:
+            self.doc_terms.append(term_list)
+        self.generation += 1
 
-            # Insert into Trie if term is new
-            if token not in self.index:
-                self.trie.insert(token)
+        self.total_length += length
+        if len(self.docs) == 1:
+            self.min_length = length
+        elif self.min_length is not None:
+            self.min_length = min(self.min_length, length)
 
-            # Increase term frequency
-            self.index[token][doc_id] += 1
+    @contextmanager
+    def bulk_load(self):
+        """
+        Context manager for adding many documents at once.
+
+        Inside the block new terms are not inserted into the Trie one by
+        one; on exit the Trie is rebuilt in one pass from the sorted term
+        list with Trie.from_sorted().
+        """
+        self._check_writable()
+        self.trie = None
+        try:
+            yield self
+        finally:
+            self._build_trie()
+
+    def _build_trie(self) -> None:
+        # Trie over every term, weighted by document frequency
+        with self.instrumentation.timer("index.trie_build"):
+            term_ids = self.terms.ids
+            terms = sorted(term_ids)
+            self.trie = Trie.from_sorted(
+                terms, (len(self.doc_arrays[term_ids[term]]) for term in terms)
+            )
+
+    def update_document(self, doc_id: str, tokens: Iterable[str]):
+        """
+        Replace the indexed contents of a document (or add it if new).
+        """
+        self.add_document(doc_id, tokens)
+
+    def delete_document(self, doc_id: str) -> bool:
+        """
+        Remove a document from the index.
+
+        Terms that no longer occur in any document are dropped from both
+        the index and the Trie.
+
+        Returns:-
+        bool
+            True if the document was indexed; False otherwise.
+        """
+        self._check_writable()
+
+        if doc_id not in self.docs:
+            return False
+        forward = self._forward_index()
+        doc = self.docs.ids[doc_id]
+        term_list = forward[doc]
+        forward[doc] = None
+
+        self.generation += 1
+        length = self.docs.lengths[doc]
+        self.docs.remove(doc_id)
+        self.total_length -= length
+        if length == self.min_length:
+            self.min_length = None
+
+        for term_id in term_list:
+            term = self.terms.terms[term_id]
+            self.max_freqs.pop(term, None)
+            if self._owned is not None and term_id not in self._owned:
+                self._own(term_id)
+            docs = self.doc_arrays[term_id]
+            i = bisect_left(docs, doc)
+            del docs[i]
+            del self.freq_arrays[term_id][i]
+            if self.positions is not None:
+                del self.positions[term_id][i]
+            if not docs:
+                self.terms.remove(term)
+                self.doc_arrays[term_id] = self.freq_arrays[term_id] = None
+                if self.positions is not None:
+                    del self.positions[term_id]
+                if self.trie is not None:
+                    self.trie.delete(term)
+            elif self.trie is not None:
+                self.trie.set_weight(term, len(docs))
+
+        return True
+
+    def copy(self) -> "InvertedIndex":
+        """
+        Return a writable copy that shares the posting arrays.
+
+        Only the per-document and per-term tables and the Trie are
+        copied, O(documents + terms), not O(postings). Afterwards both
+        indexes copy a term's arrays before changing them for the first
+        time (copy-on-write), so neither sees the other's changes.
+        """
+        self._check_writable()
+        clone = copy.copy(self)
+        clone.docs = self.docs.copy()
+        clone.terms = self.terms.copy()
+        clone.doc_arrays = list(self.doc_arrays)
+        clone.freq_arrays = list(self.freq_arrays)
+        if self.positions is not None:
+            clone.positions = dict(self.positions)
+        if self.doc_terms is not None:
+            clone.doc_terms = list(self.doc_terms)
+        clone.max_freqs = dict(self.max_freqs)
+        if self.trie is not None:
+            clone.trie = self.trie.copy()
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def needs_compaction(self) -> bool:
+        """
+        True when freed doc ids or term ids outnumber the live ones
+        (and there are more than COMPACT_MIN_FREE of them).
+        """
+        if self.segment is not None:
+            return False
+        return any(
+            table.free_slots() > max(COMPACT_MIN_FREE, len(table))
+            for table in (self.docs, self.terms)
+        )
+
+    def compact(self) -> None:
+        """
+        Renumber doc ids and term ids densely, dropping the slots that
+        deleted documents and terms leave behind (every replaced
+        document frees one doc id, so without this the tables of a
+        long-running index grow with every update).
 
-    def search(self, query_tokens: list) -> dict:
+        Ids keep their relative order, so postings stay sorted. Posting
+        arrays shared with another generation are never changed: doc
+        id arrays are rebuilt when doc ids move, and arrays that are
+        only re-slotted stay shared under copy-on-write.
+        O(postings) when documents were deleted, O(terms) otherwise.
+        """
+        self._check_writable()
+        docs, terms = self.docs, self.terms
+        if not docs.free_slots() and not terms.free_slots():
+            return
+
+        with self.instrumentation.timer("index.compact"):
+            doc_map = None
+            if docs.free_slots():
+                doc_map = [0] * len(docs.names)
+                kept_docs = docs.compact()
+                for new, old in enumerate(kept_docs):
+                    doc_map[old] = new
+                if self.doc_terms is not None:
+                    self.doc_terms = [self.doc_terms[old] for old in kept_docs]
+
+            old_term_count = len(terms.terms)
+            kept_terms = terms.compact()
+            doc_arrays = [self.doc_arrays[old] for old in kept_terms]
+            if doc_map is not None:
+                remap = doc_map.__getitem__
+                doc_arrays = [array("I", map(remap, ids)) for ids in doc_arrays]
+            self.doc_arrays = doc_arrays
+            self.freq_arrays = [self.freq_arrays[old] for old in kept_terms]
+            if self.positions is not None:
+                self.positions = {new: self.positions[old]
+                                  for new, old in enumerate(kept_terms)}
+
+            if len(kept_terms) < old_term_count:
+                term_map = {old: new for new, old in enumerate(kept_terms)}
+                if self.doc_terms is not None:
+                    remap = term_map.__getitem__
+                    self.doc_terms = [array("I", map(remap, term_list))
+                                      for term_list in self.doc_terms]
+                if self._owned is not None:
+                    self._owned = {term_map[old] for old in self._owned
+                                   if old in term_map}
+
+    def _own(self, term_id: int) -> None:
+        # Replace arrays shared with a copy by private ones before a change
+        self.doc_arrays[term_id] = self.doc_arrays[term_id][:]
+        self.freq_arrays[term_id] = self.freq_arrays[term_id][:]
+        if self.positions is not None:
+            self.positions[term_id] = list(self.positions[term_id])
+        self._owned.add(term_id)
+
+    def has_document(self, doc_id: str) -> bool:
+        """Return True if doc_id is currently indexed."""
+        return doc_id in self.docs
+
+    def has_term(self, term: str) -> bool:
+        """Return True if term occurs in at least one document."""
+        if self.segment is not None:
+            return isinstance(term, str) and self.segment.find(term) >= 0
+        return term in self.terms
+
+    def _check_writable(self) -> None:
+        if self.segment is not None:
+            raise RuntimeError("index is backed by a read-only segment")
+
+    def _forward_index(self) -> list:
+        """
+        doc id -> array of term ids, the per-document term lists used
+        to delete or replace a document (None for deleted doc ids).
+
+        Indexes restored from a snapshot rebuild it from the postings on
+        first use, so loading a snapshot does not pay for it.
+        """
+        if self.doc_terms is None:
+            forward = [array("I") if name is not None else None
+                       for name in self.docs.names]
+            for term_id, docs in enumerate(self.doc_arrays):
+                if docs is not None:
+                    for doc in docs:
+                        forward[doc].append(term_id)
+            self.doc_terms = forward
+        return self.doc_terms
+
+    def stats(self) -> CollectionStats:
+        """Return the collection statistics used by the scorers."""
+        doc_count = len(self.docs)
+        if self.min_length is None:
+            lengths = self.docs.lengths
+            self.min_length = min((lengths[doc] for doc in self.docs.ids.values()),
+                                  default=0)
+        avg_length = self.total_length / doc_count if self.total_length else 1.0
+        return CollectionStats(doc_count, avg_length, self.min_length)
+
+    def doc_freq(self, term: str) -> int:
+        """Number of documents containing term (0 if unknown)."""
+        if self.segment is not None:
+            i = self.segment.find(term)
+            return self.segment.doc_freq(i) if i >= 0 else 0
+        term_id = self.terms.get(term)
+        return 0 if term_id is None else len(self.doc_arrays[term_id])
+
+    def postings(self, term: str):
+        """
+        (doc ids, frequencies) of a term as two aligned array('I'), doc
+        ids ascending; None if the term is not indexed. Read-only: the
+        arrays may be the index's own. Segment postings are decoded on
+        every call and not kept.
+        """
+        if self.segment is not None:
+            i = self.segment.find(term)
+            return self.segment.postings_arrays(i) if i >= 0 else None
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return None
+        return self.doc_arrays[term_id], self.freq_arrays[term_id]
+
+    def doc_list(self, term: str):
+        """
+        Ascending doc ids of the documents containing term (empty if
+        unknown). Read-only: may be the index's own array.
+        """
+        postings = self.postings(term)
+        return postings[0] if postings is not None else array("I")
+
+    def all_docs(self) -> list:
+        """Ascending doc ids of every indexed document."""
+        return self.docs.live_ids()
+
+    def _max_freq(self, term: str, freqs) -> int:
+        # Highest frequency of a term, cached until the term changes
+        if self.segment is not None:
+            return max(freqs)
+
+        best = self.max_freqs.get(term)
+        if best is None:
+            best = self.max_freqs[term] = max(freqs)
+        return best
+
+    def term_positions(self, term: str, doc_id: str) -> list:
+        """
+        Ascending token positions of term in the document named doc_id
+        ([] if it does not occur). Raises ValueError if the index is not
+        positional.
+        """
+        if self.positions is None:
+            raise ValueError("index has no positions "
+                             "(build it with positional=True)")
+        doc = self.docs.ids.get(doc_id)
+        if doc is None:
+            return []
+        return self._term_positions(term, doc)
+
+    def _term_positions(self, term: str, doc: int) -> list:
+        # Positions of term in doc id doc ([] if it does not occur)
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return []
+        i = self._locate(term_id, doc)
+        if i < 0:
+            return []
+        return decode_positions(self.positions[term_id][i],
+                                self.freq_arrays[term_id][i])
+
+    def _locate(self, term_id: int, doc: int) -> int:
+        # Position of doc in the term's posting arrays, or -1
+        docs = self.doc_arrays[term_id]
+        i = bisect_left(docs, doc)
+        return i if i < len(docs) and docs[i] == doc else -1
+
+    def _freq(self, term: str, doc: int) -> int:
+        # Frequency of term in doc id doc (0 if absent)
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return 0
+        i = self._locate(term_id, doc)
+        return self.freq_arrays[term_id][i] if i >= 0 else 0
+
+    def phrase_match(self, doc: int, terms) -> bool:
+        """
+        Return True if terms occur in doc (a doc id) as consecutive
+        tokens.
+
+        Each term's positions are shifted back by its offset in the
+        phrase; the phrase matches where all shifted lists meet. The
+        term with the fewest occurrences seeds the candidate starts.
+        """
+        by_freq = sorted(
+            enumerate(terms),
+            key=lambda item: self._freq(item[1], doc)
+        )
+        starts = None
+        for offset, term in by_freq:
+            shifted = [pos - offset for pos in self._term_positions(term, doc)]
+            starts = shifted if starts is None else intersect_sorted(starts, shifted)
+            if not starts:
+                return False
+        return True
+
+    def near_match(self, doc: int, left: str, right: str,
+                   distance: int) -> bool:
+        """
+        Return True if left and right occur in doc (a doc id) at most
+        `distance` positions apart, in either order (two different
+        occurrences when left == right).
+        """
+        a = self._term_positions(left, doc)
+        if left == right:
+            return any(later - earlier <= distance
+                       for earlier, later in zip(a, a[1:]))
+
+        b = self._term_positions(right, doc)
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if abs(a[i] - b[j]) <= distance:
+                return True
+            # Advance the smaller position, the only one that can get closer
+            if a[i] < b[j]:
+                i += 1
+            else:
+                j += 1
+        return False
+
+    def search(self, query_tokens: list, top_k: int = None,
+               scorer=None, doc_filter=None, trace=None,
+               collection: tuple = None) -> dict:
         """
         Perform AND-based search:
         A document is returned only if it contains ALL query tokens.
+
+        By default Score(doc) = sum of the frequencies of the query tokens
+        in doc (a repeated query token counts once per repetition). Results
+        are ordered by descending score, then by document name.
+
+        Parameters:-
+        query_tokens : list
+            Tokens of the query.
+        top_k : int, optional
+            Only return the best top_k documents. Uses bounded-heap
+            selection and skips documents whose score upper bound
+            cannot reach the current top_k.
+        scorer : str or scorer object, optional
+            Ranking function, e.g. "frequency" (default), "tfidf",
+            "bm25" or scoring.BM25Scorer(k1, b).
+        doc_filter : callable, optional
+            doc id -> bool, called only for documents that contain every
+            query token (e.g. phrase_match); documents for which it
+            returns False are dropped.
+        trace : instrumentation.QueryTrace, optional
+            Receives the posting-list length of every term and the
+            candidate / scored document counts.
+        collection : tuple, optional
+            (CollectionStats, term -> document frequency) of a larger
+            collection this index is one shard of. Term weights and the
+            term order come from it, so scores (floats included) equal
+            those of one index over the whole collection.
+
+        Returns:-
+        dict
+            document_name -> score, best first.
         """
-        if not query_tokens:
+        scorer = get_scorer(scorer)
+        if not query_tokens or (top_k is not None and top_k <= 0):
             return {}
 
-        doc_scores = defaultdict(int)
-
         # AND logic -> if any token missing, return nothing
-        for token in query_tokens:
-            if token not in self.index:
+        terms = list(dict.fromkeys(query_tokens))
+        if trace is not None:
+            trace.postings = {term: self.doc_freq(term) for term in terms}
+        term_postings = {}
+        for term in terms:
+            postings = self.postings(term)
+            if postings is None:
                 return {}
+            term_postings[term] = postings
+
+        stats, doc_freqs = self._collection_stats(term_postings, collection)
+
+        # Intersect rarest first, so the candidate list only shrinks.
+        # Equal document frequencies are ordered by term: shards must add
+        # up score contributions in the same order as one whole index.
+        terms.sort(key=lambda term: (doc_freqs[term], term))
+
+        weights = self._term_weights(query_tokens, terms, doc_freqs,
+                                     scorer, stats)
+
+        if top_k is not None:
+            return self._search_top_k(
+                terms, term_postings, weights, scorer, stats, top_k,
+                doc_filter, trace
+            )
+
+        return self._search_all(terms, term_postings, weights, scorer, stats,
+                                doc_filter, trace)
+
+    def _search_all(self, terms: list, term_postings: dict, weights: dict,
+                    scorer, stats: CollectionStats, doc_filter=None,
+                    trace=None) -> dict:
+        """
+        Document-at-a-time AND search returning every match.
+
+        Candidates come from the rarest term and are looked up in the
+        other terms by galloping, as in _search_top_k; the positions
+        found there give the frequencies, so each posting list is
+        searched once. Contributions are added in the order of terms
+        in both methods, so they produce identical (float) scores.
+        """
+        score_term = scorer.score
+        lengths = self.docs.lengths
+        names = self.docs.names
 
-            for doc, freq in self.index[token].items():
-                doc_scores[doc] += freq
+        lead_docs, lead_freqs = term_postings[terms[0]]
+        lead_weight = weights[terms[0]]
+        others = [(term_postings[term][0], term_postings[term][1], weights[term])
+                  for term in terms[1:]]
 
-        # Sort documents by descending score
-        return dict(
-            sorted(
-                doc_scores.items(),
-                key=lambda item: item[1],
-                reverse=True
+        results = []
+        if not others:
+            # One term: every document of its list matches
+            matches = len(lead_docs)
+            for doc, freq in zip(lead_docs, lead_freqs):
+                if doc_filter is None or doc_filter(doc):
+                    results.append((names[doc], score_term(
+                        freq, lengths[doc], lead_weight, stats)))
+        else:
+            matches = self._match_all(lead_docs, lead_freqs, lead_weight,
+                                      others, score_term, stats,
+                                      doc_filter, results)
+
+        if trace is not None:
+            trace.candidates, trace.scored = matches, len(results)
+
+        # Sort documents by descending score, then name
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return dict(results)
+
+    def _match_all(self, lead_docs, lead_freqs, lead_weight, others: list,
+                   score_term, stats: CollectionStats, doc_filter,
+                   results: list) -> int:
+        # Append (name, score) of every lead document found in all the
+        # other lists to results; returns the number found (filter aside)
+        lengths = self.docs.lengths
+        names = self.docs.names
+        positions = [0] * len(others)
+        matches = 0
+        for i, doc in enumerate(lead_docs):
+            for j, (docs, _, _) in enumerate(others):
+                pos = positions[j] = gallop(docs, doc, positions[j])
+                if pos == len(docs):
+                    return matches   # this term has no documents left
+                if docs[pos] != doc:
+                    break
+            else:
+                matches += 1
+                if doc_filter is not None and not doc_filter(doc):
+                    continue
+                length = lengths[doc]
+                score = score_term(lead_freqs[i], length, lead_weight, stats)
+                for j, (_, freqs, weight) in enumerate(others):
+                    score += score_term(freqs[positions[j]], length, weight, stats)
+                results.append((names[doc], score))
+        return matches
+
+    def _score_terms(self, docs, terms: list, term_postings: dict,
+                     weights: dict, scorer, stats: CollectionStats) -> list:
+        """
+        Scores of ascending doc ids: the contributions of terms, added in
+        the order of terms. Each term's frequencies are found by galloping
+        through its doc ids from the previous document's position; a
+        term a document lacks adds nothing.
+        """
+        score = scorer.score
+        lengths = self.docs.lengths
+        totals = [0] * len(docs)
+        for term in terms:
+            term_docs, freqs = term_postings[term]
+            weight = weights[term]
+            n = len(term_docs)
+            pos = 0
+            for i, doc in enumerate(docs):
+                if term_docs[pos] != doc:
+                    pos = gallop(term_docs, doc, pos)
+                    if pos == n:
+                        break
+                    if term_docs[pos] != doc:
+                        continue
+                totals[i] += score(freqs[pos], lengths[doc], weight, stats)
+                pos += 1
+                if pos == n:
+                    break
+        return totals
+
+    def score_documents(self, docs, query_tokens: list, top_k: int = None,
+                        scorer=None, collection: tuple = None) -> dict:
+        """
+        Rank given documents (e.g. the matches of a boolean query) by the
+        query tokens they contain, like search() ranks its matches:
+        tokens a document lacks simply add nothing.
+
+        Parameters:-
+        docs : Iterable[int]
+            Ascending doc ids to rank (e.g. query_planner.execute_plan).
+        query_tokens : list
+            Tokens that contribute to the score (repeats count again).
+        top_k : int, optional
+            Only return the best top_k documents.
+        scorer : str or scorer object, optional
+            Ranking function, as for search().
+        collection : tuple, optional
+            Statistics of the whole collection, as for search().
+
+        Returns:-
+        dict
+            document_name -> score, best first.
+        """
+        scorer = get_scorer(scorer)
+        if top_k is not None and top_k <= 0:
+            return {}
+
+        term_postings = {}
+        for term in dict.fromkeys(query_tokens):
+            postings = self.postings(term)
+            if postings is not None:
+                term_postings[term] = postings
+        stats, doc_freqs = self._collection_stats(term_postings, collection)
+        # Same term order as search()
+        terms = sorted(term_postings, key=lambda term: (doc_freqs[term], term))
+
+        weights = self._term_weights(query_tokens, terms, doc_freqs,
+                                     scorer, stats)
+
+        docs = list(docs)
+        totals = self._score_terms(docs, terms, term_postings, weights,
+                                   scorer, stats)
+
+        names = self.docs.names
+
+        def order(i):
+            return -totals[i], names[docs[i]]
+
+        if top_k is not None:
+            ranked = heapq.nsmallest(top_k, range(len(docs)), key=order)
+        else:
+            ranked = sorted(range(len(docs)), key=order)
+        return {names[docs[i]]: totals[i] for i in ranked}
+
+    def _collection_stats(self, term_postings: dict, collection) -> tuple:
+        # (CollectionStats, term -> df) used for scoring: this index's
+        # own, or the whole collection's when searching one shard of it
+        if collection is None:
+            return self.stats(), {term: len(postings[0])
+                                  for term, postings in term_postings.items()}
+        return collection
+
+    @staticmethod
+    def _term_weights(query_tokens: list, terms: list, doc_freqs: dict,
+                      scorer, stats: CollectionStats) -> dict:
+        # Per-term weights: scorer factor times repetitions in the query
+        weights = {}
+        for token in query_tokens:
+            weights[token] = weights.get(token, 0) + 1
+        for term in terms:
+            weights[term] *= scorer.term_weight(doc_freqs[term], stats)
+        return weights
+
+    def _search_top_k(self, terms: list, term_postings: dict, weights: dict,
+                      scorer, stats: CollectionStats, top_k: int,
+                      doc_filter=None, trace=None) -> dict:
+        """
+        Document-at-a-time AND search keeping only the best top_k docs.
+
+        Candidates come from the rarest term in doc id order and are
+        looked up in the other terms by galloping. Each term's score
+        contribution is bounded by scorer.upper_bound (MaxScore); once
+        the heap is full, a document is dropped as soon as its partial
+        score plus the bounds of the terms not yet checked cannot beat the
+        weakest document in the heap, without probing the remaining lists.
+        Doc ids need not follow name order, so a document that can at
+        best tie with the weakest one is only dropped if its name sorts
+        after it. doc_filter is applied last, only to documents that
+        would enter the heap. trace.candidates counts the rarest term's
+        documents examined, trace.scored those scored completely (matched
+        every term and passed doc_filter without being pruned by the
+        bounds).
+        """
+        score_term = scorer.score
+        lengths = self.docs.lengths
+        names = self.docs.names
+
+        bounds = []
+        for term in terms:
+            bound = scorer.upper_bound(
+                self._max_freq(term, term_postings[term][1]), weights[term], stats
             )
+            if isinstance(bound, float):
+                bound *= 1 + 1e-9   # absorb rounding in float sums
+            bounds.append(bound)
+
+        # rest_bounds[j] bounds what terms j.. can still add
+        rest_bounds = [0] * (len(terms) + 1)
+        for j in range(len(terms) - 1, -1, -1):
+            rest_bounds[j] = rest_bounds[j + 1] + bounds[j]
+
+        lead_docs, lead_freqs = term_postings[terms[0]]
+        lead_weight = weights[terms[0]]
+        others = [(term_postings[term][0], term_postings[term][1], weights[term])
+                  for term in terms[1:]]
+        positions = [0] * len(others)
+
+        # Min-heap of (score, _LaterName(name), doc): the root is the
+        # weakest result (lowest score, then latest name)
+        heap = []
+        threshold = -1
+        weakest = None   # name of the root document
+        i = -1
+        scored = 0
+
+        for i, doc in enumerate(lead_docs):
+            length = lengths[doc]
+            score = score_term(lead_freqs[i], length, lead_weight, stats)
+            best = score + rest_bounds[1]
+            if best < threshold or (best == threshold and names[doc] > weakest):
+                continue
+
+            matched = True
+            for j, (docs, freqs, weight) in enumerate(others):
+                pos = positions[j] = gallop(docs, doc, positions[j])
+                if pos == len(docs):
+                    # This term has no documents left -> nothing can match
+                    if trace is not None:
+                        trace.candidates, trace.scored = i + 1, scored
+                    return self._heap_results(heap)
+                if docs[pos] != doc:
+                    matched = False
+                    break
+
+                score += score_term(freqs[pos], length, weight, stats)
+                best = score + rest_bounds[j + 2]
+                if best < threshold or (best == threshold and names[doc] > weakest):
+                    matched = False
+                    break
+
+            if not matched or (doc_filter is not None and not doc_filter(doc)):
+                continue
+
+            scored += 1
+            name = names[doc]
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, _LaterName(name), doc))
+                if len(heap) == top_k:
+                    threshold, weakest = heap[0][0], heap[0][1].name
+            elif score > threshold or (score == threshold and name < weakest):
+                heapq.heapreplace(heap, (score, _LaterName(name), doc))
+                threshold, weakest = heap[0][0], heap[0][1].name
+
+        if trace is not None:
+            trace.candidates, trace.scored = i + 1, scored
+        return self._heap_results(heap)
+
+    @staticmethod
+    def _heap_results(heap: list) -> dict:
+        # Best score first; equal scores in ascending name order
+        return {key.name: score for score, key, _ in sorted(heap, reverse=True)}
+
+    def to_state(self) -> dict:
+        """
+        Return the index contents as plain builtin types for snapshotting.
+
+        Posting arrays are stored as raw bytes, so a snapshot loads them
+        without any per-posting work. Term ids (and so the term order)
+        are kept. Positional indexes add a "positions" entry.
+        """
+        if self.segment is not None:
+            # Copy the segment into an in-memory layout first
+            terms = list(self.index)
+            arrays = [self.postings(term) for term in terms]
+        else:
+            terms = self.terms.terms
+            arrays = zip(self.doc_arrays, self.freq_arrays)
+
+        doc_arrays, freq_arrays = [], []
+        for docs, freqs in arrays:
+            if docs is None:
+                doc_arrays.append(None)
+                freq_arrays.append(None)
+            else:
+                doc_arrays.append(docs.tobytes())
+                freq_arrays.append(freqs.tobytes())
+
+        state = {"docs": self.docs.to_state(), "terms": terms,
+                 "doc_arrays": doc_arrays, "freq_arrays": freq_arrays}
+        if self.positions is not None:
+            state["positions"] = self.positions
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> "InvertedIndex":
+        """
+        Rebuild an index from a state produced by to_state().
+
+        The posting arrays are restored from their bytes and the
+        document table is used as-is; only the Trie is rebuilt, in one
+        pass over the sorted terms.
+        """
+        inverted = cls()
+        inverted.docs = DocumentTable.from_state(state["docs"])
+        inverted.terms = TermDictionary.from_terms(state["terms"])
+        inverted.doc_arrays = [_array_from(data) for data in state["doc_arrays"]]
+        inverted.freq_arrays = [_array_from(data) for data in state["freq_arrays"]]
+        inverted.positions = state.get("positions")
+        inverted.total_length = sum(inverted.docs.lengths)
+        inverted.min_length = None
+        inverted.doc_terms = None
+        inverted._build_trie()
+        return inverted
+
+    @classmethod
+    def open_segment(cls, path: str) -> "InvertedIndex":
+        """
+        Open a read-only index over a segment written by
+        segment.write_segment().
+
+        The postings stay in the memory-mapped file and are decoded per
+        lookup, so processes opening the same segment share its pages.
+        The segment's doc ids (name order) are used as-is. The Trie is
+        built from the segment's sorted term dictionary. Segments store
+        no positions, so the index is never positional.
+        """
+        reader = SegmentReader(path)
+        inverted = cls()
+        inverted.segment = reader
+        names = reader.doc_names
+        inverted.docs = DocumentTable.from_names(
+            names, (reader.titles[name] for name in names),
+            (reader.doc_lengths[name] for name in names)
+        )
+        inverted.total_length = sum(inverted.docs.lengths)
+        inverted.min_length = None
+        inverted.doc_terms = None
+        inverted.trie = Trie.from_sorted(
+            reader.terms(), (reader.doc_freq(i) for i in range(reader.term_count))
         )
+        return inverted
+
+    def close(self) -> None:
+        """Release the segment mapping, if any."""
+        if self.segment is not None:
+            self.segment.close()
+
+
+def _array_from(data):
+    # array('I') from to_state() bytes (None stays None)
+    if data is None:
+        return None
+    values = array("I")
+    values.frombytes(data)
+    return values
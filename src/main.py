@@ -11,14 +11,22 @@ Tasks performed:
 
 from search_engine import SearchEngine
 
+# Number of results shown for a query
+RESULTS_PER_PAGE = 10
+
+# Number of completions shown for a prefix (most frequent terms first)
+COMPLETIONS_SHOWN = 10
+
 
 def main():
     print("Building search index...")
-    engine = SearchEngine(data_folder="data")
+    engine = SearchEngine(data_folder="data", positional=True)
     engine.build_index()
 
     print("\nSearch Engine Ready.")
-    print("Type a query OR:")
+    print("Type a query (OR, NOT/-, parentheses, \"exact phrase\" and")
+    print("word NEAR/3 word supported) OR:")
+    print("  explain <query> → show the query plan")
     print("  prefix <text>   → Trie prefix search (optional)")
     print("  exit            → quit the program\n")
 
@@ -33,7 +41,7 @@ def main():
         # Prefix search (Trie-based)
         if query.lower().startswith("prefix "):
             prefix = query[7:].strip()
-            matches = engine.prefix_search(prefix)
+            matches = engine.prefix_search(prefix, limit=COMPLETIONS_SHOWN)
 
             if not matches:
                 print("No terms found with that prefix.\n")
@@ -44,12 +52,19 @@ def main():
                 print()
             continue
 
+        # Query plan
+        if query.lower().startswith("explain "):
+            plan = engine.explain(query[8:])
+            print(plan if plan is not None else "Empty query.")
+            print()
+            continue
+
         # Standard search
         if not query:
             print("Empty query. Please enter a valid search.\n")
             continue
 
-        results = engine.search(query)
+        results = engine.search(query, top_k=RESULTS_PER_PAGE)
 
         if not results:
             print("No matching documents found.\n")
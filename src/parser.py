@@ -8,32 +8,219 @@ BeautifulSoup is used to:
 - Remove HTML tags safely
 - Extract optional <title> content
 - Return visible, human-readable text
+
+A second, "fast" extractor produces the same (title, text) output in a
+single streaming pass over html.parser events, without building a
+BeautifulSoup tree. It is selected with load_page(path, extractor="fast").
+
+PageStream uses the fast extractor to read a page block by block and
+yield its visible text in chunks, for pages too large to load at once.
+
+parse_content() extracts (title, text) from a page already in memory
+(e.g. fetched by crawler.py), and extract_links() lists the href
+targets of its <a> tags.
 """
 
 import os
+import re
+from html.entities import html5
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
 
+# Title given to a page that cannot be read or decoded (it is indexed
+# without any text)
+UNREADABLE_TITLE = "[Unreadable File]"
 
-def load_page(filepath: str) -> tuple[str, str]:
-    """
-    Load and parse a page file (HTML or plain text).
+# Tags whose strings BeautifulSoup does not treat as visible text
+# (HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS); <script> and <style> are
+# also removed explicitly by the BeautifulSoup extractor.
+_HIDDEN_TAGS = {"script", "style", "template", "rt", "rp"}
 
-    Parameters:-
-    filepath : str
-        The full path to the file inside the data/ directory.
+# Tags inside which whitespace-only strings are kept as-is
+_PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+
+# Empty-element tags, closed as soon as they are opened
+_VOID_TAGS = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command",
+    "embed", "frame", "hr", "image", "img", "input", "isindex", "keygen",
+    "link", "menuitem", "meta", "nextid", "param", "source", "spacer",
+    "track", "wbr",
+}
+
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Named entities without their trailing ";" (first spelling wins)
+_ENTITIES = {}
+for _name, _char in sorted(html5.items()):
+    _ENTITIES.setdefault(_name[:-1] if _name.endswith(";") else _name, _char)
+
+
+_DECIMAL_REFERENCE = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE = re.compile("^([0-9a-f]+)(.*)")
+
+
+def _numeric_reference(name: str) -> tuple[str, str]:
+    """
+    Resolve a numeric character reference the way BeautifulSoup does.
 
     Returns:-
     tuple[str, str]
-        title          - extracted <title> text or the file name
-        text_content   - visible cleaned text returned for tokenization
+        The referenced character ("" if none) and any trailing text that
+        was not part of the reference.
     """
+    base = 10
+    pattern = _DECIMAL_REFERENCE
+    if name[:1] in ("x", "X"):
+        name = name[1:]
+        base = 16
+        pattern = _HEX_REFERENCE
+
+    extra = ""
     try:
-        # Read the entire file
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-    except Exception:
-        return ("[Unreadable File]", "")
+        number = int(name, base)
+    except ValueError:
+        match = pattern.match(name)
+        if match is None:
+            return "", name
+        number = int(match.group(1), base)
+        extra = match.group(2)
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd", extra
+    if 0x80 <= number <= 0x9F:
+        try:
+            # Windows-1252 bytes written as numeric references
+            return bytes([number]).decode("cp1252"), extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number), extra
+
+
+class _FastTextExtractor(HTMLParser):
+    """
+    Collects the page title and visible strings from html.parser events.
+
+    A stack of open tag names stands in for the BeautifulSoup tree: it
+    is only used to know whether the current string is inside a hidden
+    tag, a whitespace-preserving tag, or the first <title>.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []
+        self.hidden = 0        # open tags from _HIDDEN_TAGS
+        self.preserve = 0      # open tags from _PRESERVE_WHITESPACE_TAGS
+        self.title_level = None
+        self.title_parts = None
+        self.strings = []
+        self.pending = []
+        # void tags opened without "/>": one later </tag> each is ignored
+        self.closed_void = []
+        # set by PageStream when it handed out the start of a string
+        self.partial = False
+
+    def _flush(self, visible: bool = True) -> None:
+        # End the current string (BeautifulSoup's endData)
+        pending = self.pending
+        self.pending = []
+
+        if self.partial:
+            # Rest of a string whose start PageStream already yielded;
+            # kept unstripped so it joins up with that start.
+            self.partial = False
+            self.strings.append("".join(pending))
+            return
+
+        if not pending:
+            return
+        data = "".join(pending)
+
+        if not self.preserve and not data.strip(_ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        if not visible:
+            return
+
+        if self.title_level is not None:
+            self.title_parts.append(data)
+
+        stripped = data.strip()
+        if stripped:
+            self.strings.append(stripped)
+
+    def _push(self, tag: str) -> None:
+        self.stack.append(tag)
+        if tag in _HIDDEN_TAGS:
+            self.hidden += 1
+        if tag in _PRESERVE_WHITESPACE_TAGS:
+            self.preserve += 1
+        if tag == "title" and self.title_parts is None:
+            self.title_level = len(self.stack)
+            self.title_parts = []
+
+    def _pop(self) -> None:
+        tag = self.stack.pop()
+        if tag in _HIDDEN_TAGS:
+            self.hidden -= 1
+        if tag in _PRESERVE_WHITESPACE_TAGS:
+            self.preserve -= 1
+        if self.title_level is not None and len(self.stack) < self.title_level:
+            self.title_level = None
+
+    def handle_starttag(self, tag, attrs):
+        self._flush(not self.hidden)
+        self._push(tag)
+        if tag in _VOID_TAGS:
+            self._pop()
+            self.closed_void.append(tag)
 
+    def handle_startendtag(self, tag, attrs):
+        self._flush(not self.hidden)
+        self._push(tag)
+        self._pop()
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_void:
+            # Redundant end tag of an already closed void element
+            self.closed_void.remove(tag)
+            return
+
+        self._flush(not self.hidden)
+        if tag in self.stack:
+            while self.stack[-1] != tag:
+                self._pop()
+            self._pop()
+
+    def handle_data(self, data):
+        self.pending.append(data)
+
+    def handle_entityref(self, name):
+        self.pending.append(_ENTITIES.get(name, "&" + name))
+
+    def handle_charref(self, name):
+        char, extra = _numeric_reference(name)
+        self.pending.append(char)
+        self.pending.append(extra)
+
+    def _skip(self, data) -> None:
+        # Comments, declarations and processing instructions end the
+        # current string and are not part of the visible text.
+        self._flush(not self.hidden)
+
+    handle_comment = handle_decl = handle_pi = _skip
+
+    def unknown_decl(self, data):
+        self._flush(not self.hidden)
+        if data.upper().startswith("CDATA["):
+            # CDATA sections count as text even inside hidden tags
+            self.pending.append(data[6:])
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush(not self.hidden)
+
+
+def _extract_bs4(content: str, filepath: str) -> tuple[str, str]:
     # Parse HTML using BeautifulSoup
     soup = BeautifulSoup(content, "html.parser")
 
@@ -53,3 +240,154 @@ def load_page(filepath: str) -> tuple[str, str]:
     text = soup.get_text(separator=" ", strip=True)
 
     return title, text
+
+
+def _extract_fast(content: str, filepath: str) -> tuple[str, str]:
+    # Single pass over parser events, no tree
+    extractor = _FastTextExtractor()
+    extractor.feed(content)
+    extractor.close()
+
+    if extractor.title_parts is not None:
+        title = "".join(extractor.title_parts).strip()
+    else:
+        title = os.path.basename(filepath)
+
+    return title, " ".join(extractor.strings)
+
+
+class PageStream:
+    """
+    Visible text of a page, read and yielded in chunks.
+
+    Iterating feeds the file to the fast extractor one block at a time
+    and yields the text found so far, so memory use does not grow with
+    the page size. Chunk boundaries may fall inside a word; pass the
+    chunks to tokenizer.iter_tokens(), which joins them back.
+
+    Attributes:-
+    title : str or None
+        Page title (or file name), set once iteration has finished.
+        UNREADABLE_TITLE if the file could not be read. A decode
+        error can come after chunks were already yielded; callers must
+        then discard them (load_page returns no text for such a file).
+    """
+
+    def __init__(self, filepath: str, chunk_size: int = 1 << 16):
+        self.filepath = filepath
+        self.chunk_size = chunk_size
+        self.title = None
+
+    def __iter__(self):
+        extractor = _FastTextExtractor()
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                for block in iter(lambda: f.read(self.chunk_size), ""):
+                    extractor.feed(block)
+                    yield from self._drain(extractor)
+        except (OSError, UnicodeDecodeError):
+            self.title = UNREADABLE_TITLE
+            return
+
+        extractor.close()
+        yield from self._drain(extractor)
+
+        if extractor.title_parts is not None:
+            self.title = "".join(extractor.title_parts).strip()
+        else:
+            self.title = os.path.basename(self.filepath)
+
+    @staticmethod
+    def _drain(extractor: _FastTextExtractor):
+        if extractor.strings:
+            yield " ".join(extractor.strings) + " "
+            extractor.strings.clear()
+
+        # Long runs of text without tags would otherwise pile up in the
+        # pending buffer; hand visible, non-title text over as it comes.
+        if (extractor.pending and not extractor.hidden
+                and extractor.title_level is None):
+            pending = "".join(extractor.pending)
+            extractor.pending = []
+            extractor.partial = True
+            yield pending
+
+
+EXTRACTORS = {
+    "bs4": _extract_bs4,
+    "fast": _extract_fast,
+}
+
+
+class _LinkExtractor(HTMLParser):
+    """Collects the href of every <a> tag, in document order."""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value and value.strip():
+                    self.links.append(value.strip())
+
+    handle_startendtag = handle_starttag
+
+
+def extract_links(content: str) -> list:
+    """
+    Return the href values of the <a> tags of an HTML page, in document
+    order and unresolved (relative links stay relative).
+    """
+    extractor = _LinkExtractor()
+    extractor.feed(content)
+    extractor.close()
+    return extractor.links
+
+
+def parse_content(content: str, name: str, extractor: str = "bs4") -> tuple[str, str]:
+    """
+    Extract (title, text) from page content that is already in memory.
+
+    Parameters:-
+    content : str
+        HTML or plain text of the page.
+    name : str
+        Used as the title when the page has no <title> (its base name,
+        as for load_page).
+    extractor : str
+        "bs4" or "fast", as for load_page.
+    """
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"unknown extractor: {extractor!r}")
+    return EXTRACTORS[extractor](content, name)
+
+
+def load_page(filepath: str, extractor: str = "bs4") -> tuple[str, str]:
+    """
+    Load and parse a page file (HTML or plain text).
+
+    Parameters:-
+    filepath : str
+        The full path to the file inside the data/ directory.
+    extractor : str
+        "bs4" (default) builds a BeautifulSoup tree; "fast" streams
+        html.parser events and returns the same result without a tree.
+
+    Returns:-
+    tuple[str, str]
+        title          - extracted <title> text or the file name
+        text_content   - visible cleaned text returned for tokenization
+    """
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"unknown extractor: {extractor!r}")
+
+    try:
+        # Read the entire file
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
+    except Exception:
+        return (UNREADABLE_TITLE, "")
+
+    return EXTRACTORS[extractor](content, filepath)
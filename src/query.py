@@ -0,0 +1,293 @@
+"""
+Parses raw query text into a query tree.
+
+Syntax (operators are upper case; lower-case "and" / "or" are stop words):
+    machine learning            every term must occur (implicit AND)
+    machine AND learning        the same, with an explicit operator
+    +machine learning           '+' marks a required term (the default)
+    python OR java              either side must match
+    NOT java, -java             the document must not match
+    (python OR java) -coffee    parentheses group sub-queries
+    "machine learning"          phrase: the terms as consecutive tokens
+    machine NEAR/3 learning     proximity: at most 3 tokens apart,
+                                in either order
+
+Implicit AND binds tighter than OR, so "a b OR c" means (a AND b) OR c.
+
+Words are tokenized exactly like page text (tokenizer.tokenize), so stop
+words inside a phrase are skipped on both sides and positions count
+indexed tokens only. A missing closing quote or parenthesis ends at the
+end of the query.
+
+parse() returns the tree; parse_query() additionally flattens a purely
+conjunctive query into terms, phrases and NEAR constraints, which
+InvertedIndex.search answers directly.
+"""
+
+import re
+from typing import NamedTuple
+from tokenizer import tokenize
+
+# A quoted phrase, a parenthesis, a NEAR/k operator, a +/- prefix at the
+# start of a word, or any other run of text
+_TOKEN = re.compile(
+    r'"([^"]*)(?:"|$)|([()])|\bNEAR/(\d+)\b|(?<![^\s(])([+-])(?=\S)|([^"\s()]+)'
+)
+
+_OPERATORS = {"AND", "OR", "NOT"}
+
+
+class Term(NamedTuple):
+    """A single (tokenized) query term."""
+    term: str
+
+
+class Phrase(NamedTuple):
+    """Terms that must appear consecutively, in this order."""
+    terms: tuple
+
+
+class Near(NamedTuple):
+    """Two terms that must appear at most `distance` positions apart."""
+    left: str
+    right: str
+    distance: int
+
+
+class And(NamedTuple):
+    """Every child must match."""
+    children: tuple
+
+
+class Or(NamedTuple):
+    """At least one child must match."""
+    children: tuple
+
+
+class Not(NamedTuple):
+    """The child must not match (an exclusion inside an And)."""
+    child: object
+
+
+class ParsedQuery(NamedTuple):
+    """
+    terms:   free terms (may be corrected by prefix / fuzzy fallback);
+             phrase and NEAR terms are matched exactly
+    phrases: Phrase constraints
+    near:    Near constraints
+    tree:    the query tree when the query uses OR / NOT / grouping,
+             None for a plain conjunction (described by the fields above)
+    """
+    terms: tuple
+    phrases: tuple = ()
+    near: tuple = ()
+    tree: object = None
+
+    @property
+    def boolean(self) -> bool:
+        """True if the query needs the boolean planner."""
+        return self.tree is not None
+
+    @property
+    def positional(self) -> bool:
+        """True if the query needs positional postings."""
+        if self.tree is not None:
+            return any(isinstance(node, (Phrase, Near))
+                       for node in iter_nodes(self.tree))
+        return bool(self.phrases or self.near)
+
+    def positional_terms(self) -> list:
+        """Terms of the phrase and NEAR constraints, in query order."""
+        terms = []
+        for phrase in self.phrases:
+            terms.extend(phrase.terms)
+        for near in self.near:
+            terms.extend((near.left, near.right))
+        return terms
+
+    def __bool__(self) -> bool:
+        return bool(self.terms or self.phrases or self.near
+                    or self.tree is not None)
+
+
+def iter_nodes(node):
+    """Yield node and all its descendants, depth first."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, (And, Or)):
+            stack.extend(reversed(node.children))
+        elif isinstance(node, Not):
+            stack.append(node.child)
+
+
+def _lex(text: str) -> list:
+    # -> list of (kind, value): "phrase", "paren", "near", "prefix",
+    # "op" or "word"
+    tokens = []
+    for phrase, paren, distance, prefix, word in _TOKEN.findall(text):
+        if paren:
+            tokens.append(("paren", paren))
+        elif distance:
+            tokens.append(("near", int(distance)))
+        elif prefix:
+            tokens.append(("prefix", prefix))
+        elif word in _OPERATORS:
+            tokens.append(("op", word))
+        elif word:
+            tokens.append(("word", word))
+        else:
+            tokens.append(("phrase", phrase))
+    return tokens
+
+
+def _combine(cls, children: list):
+    # Flatten nested nodes of the same kind; None for no children
+    flat = []
+    for child in children:
+        if child is None:
+            continue
+        if isinstance(child, cls):
+            flat.extend(child.children)
+        else:
+            flat.append(child)
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return cls(tuple(flat))
+
+
+class _Parser:
+    """Recursive-descent parser over the lexed tokens."""
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> tuple:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def parse(self):
+        node = self.parse_or()
+        # A stray ')' ends the group early; keep parsing what follows
+        while self.pos < len(self.tokens):
+            self.pos += 1
+            node = _combine(And, [node, self.parse_or()])
+        return node
+
+    def parse_or(self):
+        # Empty branches (e.g. only stop words) are dropped
+        branches = [self.parse_and()]
+        while self.peek() == ("op", "OR"):
+            self.pos += 1
+            branches.append(self.parse_and())
+        return _combine(Or, branches)
+
+    def parse_and(self):
+        children = []
+        while True:
+            token = self.peek()
+            if token[0] is None or token in (("paren", ")"), ("op", "OR")):
+                break
+            if token == ("op", "AND"):
+                self.pos += 1
+                continue
+            children.append(self.parse_unary())
+        return _combine(And, children)
+
+    def parse_unary(self):
+        token = self.peek()
+        if token in (("op", "NOT"), ("prefix", "-")):
+            self.pos += 1
+            child = self.parse_unary()
+            return Not(child) if child is not None else None
+        if token[0] == "prefix":   # '+': required, which is the default
+            self.pos += 1
+            return self.parse_unary()
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.peek()
+        self.pos += 1
+
+        if kind == "paren":
+            if value == ")":
+                return None
+            node = self.parse_or()
+            if self.peek() == ("paren", ")"):
+                self.pos += 1
+            return node
+
+        if kind == "phrase":
+            terms = tokenize(value)
+            if len(terms) > 1:
+                return Phrase(tuple(terms))
+            return Term(terms[0]) if terms else None
+
+        if kind != "word":
+            return None   # stray NEAR/k or operator
+
+        terms = tokenize(value)
+        if not terms:
+            return None
+
+        # word NEAR/k word [NEAR/k word ...]
+        left = terms[0]
+        near = []
+        while self.peek()[0] == "near" and self.pos + 1 < len(self.tokens):
+            next_kind, next_word = self.tokens[self.pos + 1]
+            right = tokenize(next_word) if next_kind == "word" else []
+            if not right:
+                break
+            near.append(Near(left, right[0], self.peek()[1]))
+            left = right[0]
+            self.pos += 2
+
+        if near:
+            return _combine(And, near)
+        return Term(left)
+
+
+def parse(text: str):
+    """
+    Parse query text into a tree of Term, Phrase, Near, And, Or and Not
+    nodes. Returns None if nothing is left after tokenization.
+    """
+    return _Parser(_lex(text)).parse()
+
+
+def parse_query(text: str) -> ParsedQuery:
+    """
+    Parse query text (see the module docstring for the syntax).
+
+    A plain conjunction of terms, phrases and NEAR constraints is
+    returned flattened into terms / phrases / near; anything using OR,
+    NOT or a nested group is returned as a tree.
+
+    Parameters:-
+    text : str
+        Raw query text.
+
+    Returns:-
+    ParsedQuery
+    """
+    tree = parse(text)
+    if tree is None:
+        return ParsedQuery(())
+
+    nodes = tree.children if isinstance(tree, And) else (tree,)
+    if not all(isinstance(node, (Term, Phrase, Near)) for node in nodes):
+        return ParsedQuery((), tree=tree)
+
+    terms = [node.term for node in nodes if isinstance(node, Term)]
+    phrases = [node for node in nodes if isinstance(node, Phrase)]
+    near = [node for node in nodes if isinstance(node, Near)]
+
+    # NEAR operands are matched exactly, like phrase terms
+    operands = {word for constraint in near for word in constraint[:2]}
+    terms = [term for term in terms if term not in operands]
+    return ParsedQuery(tuple(terms), tuple(phrases), tuple(near))
@@ -0,0 +1,126 @@
+"""
+Bounded LRU cache for final search results.
+
+Query traffic is heavily skewed, so the same few queries are answered
+over and over. QueryCache keeps the formatted results of recent queries,
+keyed on the normalized (tokenized) query plus the search options.
+
+Entries are tied to an index generation number: InvertedIndex bumps its
+generation whenever a document is added, replaced or removed, and the
+first lookup with a new generation empties the cache, so results are
+never served from an older index. Generations only move forward: a
+query still running on an older generation (see SearchEngine.batch)
+gets a miss and its results are not stored, instead of emptying the
+cache again.
+
+Size is bounded both by the number of entries and by the total number
+of cached result rows; the least recently used entries are evicted
+first.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    LRU cache: key -> list of result rows.
+
+    Parameters:-
+    max_entries : int
+        Largest number of cached queries (0 disables the cache).
+    max_results : int
+        Largest total number of result rows over all entries. A single
+        result list longer than this is not cached.
+
+    Attributes:-
+    hits, misses, evictions : int
+        Counters since creation (or the last reset_stats()).
+    """
+
+    def __init__(self, max_entries: int = 1024, max_results: int = 100_000):
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0            # total result rows currently cached
+        self._generation = None   # index generation the entries belong to
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, generation):
+        """
+        Return the cached results for key, or None on a miss.
+
+        A newer generation than the one the entries were stored under
+        empties the cache first; an older one is always a miss.
+        """
+        with self._lock:
+            if not self._check_generation(generation):
+                self.misses += 1
+                return None
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def put(self, key, generation, results: list) -> None:
+        """Store results for key under the given index generation."""
+        if self.max_entries <= 0 or len(results) > self.max_results:
+            return
+
+        with self._lock:
+            if not self._check_generation(generation):
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+
+            self._entries[key] = tuple(results)
+            self._size += len(results)
+
+            while (len(self._entries) > self.max_entries
+                   or self._size > self.max_results):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._generation = None
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Counters and current size, e.g. for logging."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "results": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _check_generation(self, generation) -> bool:
+        # Caller holds the lock. False for a generation older than the
+        # entries' one.
+        if generation != self._generation:
+            if self._generation is not None and generation < self._generation:
+                return False
+            self._entries.clear()
+            self._size = 0
+            self._generation = generation
+        return True
@@ -0,0 +1,245 @@
+"""
+Plans and runs boolean queries (query.parse trees) on an InvertedIndex.
+
+plan_query() turns a query tree into a tree of PlanNode operators with an
+estimated result size and cost for each, computed from document
+frequencies only:
+
+- AND intersects its inputs rarest first (smallest estimate first), so
+  the candidate list only shrinks; phrase / NEAR checks run on the
+  intersection, and exclusions (NOT) are applied last, to the fewest
+  candidates
+- OR merges its sorted inputs with a heap (heapq.merge)
+- NOT is only evaluated as an exclusion; an AND made only of exclusions
+  starts from all documents
+
+A cost counts the postings read, the positions checks and the heap
+steps, so printing a plan (SearchEngine.explain) shows which part of a
+query is expensive. execute_plan() evaluates a plan to a sorted list of
+documents.
+"""
+
+import heapq
+import math
+from typing import NamedTuple
+from inverted_index import intersect_sorted, subtract_sorted
+from query import And, Near, Not, Or, Phrase, Term
+
+
+class PlanNode(NamedTuple):
+    """
+    One operator of a query plan.
+
+    op:       "TERM", "ALL", "AND", "OR", "NOT", "PHRASE" or "NEAR"
+    label:    what the operator reads (term, correction, phrase text)
+    estimate: estimated number of matching documents (an upper bound)
+    cost:     estimated work: postings and positions read, heap steps
+    children: input operators, in evaluation order
+    arg:      indexed term for TERM (None if nothing matched), the
+              query node for PHRASE / NEAR
+    """
+    op: str
+    label: str
+    estimate: int
+    cost: int
+    children: tuple = ()
+    arg: object = None
+
+    def format(self, indent: int = 0) -> str:
+        """Indented, one operator per line, e.g. for printing."""
+        head = f"{self.op} {self.label}".rstrip()
+        lines = [f"{'  ' * indent}{head}  est={self.estimate} cost={self.cost}"]
+        for child in self.children:
+            lines.append(child.format(indent + 1))
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.format()
+
+    def to_dict(self) -> dict:
+        """Plain-dict form of the plan (e.g. for JSON)."""
+        plan = {"op": self.op, "label": self.label,
+                "estimate": self.estimate, "cost": self.cost}
+        if self.children:
+            plan["children"] = [child.to_dict() for child in self.children]
+        return plan
+
+
+class _Planner:
+    """Builds PlanNodes bottom-up from a query tree."""
+
+    def __init__(self, index, correct):
+        self.index = index
+        self.correct = correct
+        self.doc_count = len(index.docs)
+
+    def plan(self, node, positive: bool = True) -> PlanNode:
+        # positive is False below a NOT: excluded words are not corrected
+        if isinstance(node, Term):
+            return self.term(node.term, correct=positive)
+        if isinstance(node, Or):
+            return self.plan_or(node.children, positive)
+        if isinstance(node, And):
+            return self.plan_and(node.children, positive)
+        # Phrase, Near and Not only make sense as parts of an AND
+        return self.plan_and((node,), positive)
+
+    def term(self, word: str, correct: bool = False) -> PlanNode:
+        term = word
+        if correct and self.correct is not None:
+            term = self.correct(word)
+
+        if term is None:
+            return PlanNode("TERM", f"{word} (no match)", 0, 0)
+        df = self.index.doc_freq(term)
+        label = word if term == word else f"{word} -> {term}"
+        return PlanNode("TERM", label, df, df, arg=term)
+
+    def plan_and(self, children, positive: bool = True) -> PlanNode:
+        inputs, constraints, exclusions = [], [], []
+        for child in children:
+            if isinstance(child, Not):
+                exclusions.append(self.plan(child.child, positive=False))
+            elif isinstance(child, (Phrase, Near)):
+                # Phrase / NEAR words are intersected like any term and
+                # matched exactly; positions are checked afterwards
+                constraints.append(child)
+                words = child.terms if isinstance(child, Phrase) else child[:2]
+                inputs.extend(self.term(word) for word in words)
+            else:
+                inputs.append(self.plan(child, positive))
+
+        # Each indexed term is read once
+        seen = set()
+        unique = []
+        for plan in inputs:
+            if plan.op == "TERM" and plan.arg is not None:
+                if plan.arg in seen:
+                    continue
+                seen.add(plan.arg)
+            unique.append(plan)
+
+        if unique:
+            unique.sort(key=lambda plan: plan.estimate)
+            estimate = unique[0].estimate
+        else:
+            # Only exclusions: start from every document
+            unique = [PlanNode("ALL", "documents", self.doc_count, self.doc_count)]
+            estimate = self.doc_count
+        cost = sum(plan.cost for plan in unique)
+
+        steps = list(unique)
+        for constraint in constraints:
+            if isinstance(constraint, Phrase):
+                op, label = "PHRASE", '"' + " ".join(constraint.terms) + '"'
+                width = len(constraint.terms)
+            else:
+                op, width = "NEAR", 2
+                label = (f"{constraint.left} NEAR/{constraint.distance} "
+                         f"{constraint.right}")
+            # Decodes the positions of every word for each candidate
+            steps.append(PlanNode(op, label, estimate, estimate * width, arg=constraint))
+            cost += estimate * width
+
+        exclusions.sort(key=lambda plan: plan.estimate)
+        for plan in exclusions:
+            # A term is excluded by one lookup per candidate; anything
+            # else is evaluated and subtracted
+            work = estimate if plan.op == "TERM" else plan.cost + estimate
+            steps.append(PlanNode("NOT", "", estimate, work, (plan,)))
+            cost += work
+
+        if len(steps) == 1:
+            return steps[0]
+        return PlanNode("AND", "", estimate, cost, tuple(steps))
+
+    def plan_or(self, children, positive: bool = True) -> PlanNode:
+        plans = sorted((self.plan(child, positive) for child in children),
+                       key=lambda plan: plan.estimate)
+        total = sum(plan.estimate for plan in plans)
+        # heapq.merge pops every input document through a heap of
+        # len(plans) entries
+        merge = math.ceil(total * math.log2(len(plans)))
+        cost = sum(plan.cost for plan in plans) + merge
+        return PlanNode("OR", "", min(total, self.doc_count), cost, tuple(plans))
+
+
+def plan_query(tree, index, correct=None) -> PlanNode:
+    """
+    Build the plan for a query tree.
+
+    Parameters:-
+    tree : query node
+        Result of query.parse().
+    index : InvertedIndex
+        Index whose document frequencies drive the estimates.
+    correct : callable, optional
+        word -> indexed term or None, applied to free terms that are not
+        excluded (e.g. the engine's prefix / fuzzy fallback). Without
+        it terms are matched exactly.
+
+    Returns:-
+    PlanNode
+    """
+    return _Planner(index, correct).plan(tree)
+
+
+def execute_plan(plan: PlanNode, index) -> list:
+    """
+    Evaluate a plan; returns the doc ids of the matching documents in
+    ascending order (possibly the index's own array: do not modify it).
+    """
+    op = plan.op
+
+    if op == "TERM":
+        return index.doc_list(plan.arg) if plan.arg is not None else []
+
+    if op == "ALL":
+        return index.all_docs()
+
+    if op == "OR":
+        merged = []
+        for doc in heapq.merge(*(execute_plan(child, index)
+                                 for child in plan.children)):
+            if not merged or merged[-1] != doc:
+                merged.append(doc)
+        return merged
+
+    # AND: inputs first (rarest first), then positions, then exclusions
+    candidates = None
+    for step in plan.children:
+        if candidates is not None and not candidates:
+            return []
+
+        if step.op == "PHRASE":
+            candidates = [doc for doc in candidates
+                          if index.phrase_match(doc, step.arg.terms)]
+        elif step.op == "NEAR":
+            candidates = [doc for doc in candidates
+                          if index.near_match(doc, *step.arg)]
+        elif step.op == "NOT":
+            excluded = step.children[0]
+            candidates = subtract_sorted(candidates,
+                                         execute_plan(excluded, index))
+        else:
+            docs = execute_plan(step, index)
+            candidates = docs if candidates is None else intersect_sorted(candidates, docs)
+
+    return candidates
+
+
+def scoring_terms(plan: PlanNode) -> list:
+    """
+    Indexed terms a plan matches positively (outside any NOT), once per
+    TERM operator, for InvertedIndex.score_documents.
+    """
+    terms = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if node.op == "NOT":
+            continue
+        if node.op == "TERM" and node.arg is not None:
+            terms.append(node.arg)
+        stack.extend(reversed(node.children))
+    return terms
@@ -0,0 +1,157 @@
+"""
+Ranking functions for InvertedIndex.search.
+
+A scorer turns the frequency of a query term in a document into a score
+contribution. Everything a scorer needs about the collection (number of
+documents, average and shortest document length) comes from a
+CollectionStats tuple that the index keeps up to date at indexing time,
+so nothing is recomputed per query.
+
+Every scorer implements three methods:
+
+    term_weight(df, stats)           per-term factor, computed once per query
+    score(tf, length, weight, stats) contribution of one term to one doc
+    upper_bound(max_tf, weight, stats)
+                                     largest possible contribution of the
+                                     term, used by top-k pruning
+
+The built-in scorers also define term_factor(tf, length, stats), the
+query-independent part of a contribution, with
+
+    score(tf, length, weight, stats) == weight * term_factor(tf, length, stats)
+
+so it can be precomputed per posting (term_matrix.TermMatrix).
+
+score() must not decrease when tf grows or when length shrinks, so that
+upper_bound(max_tf, ...) evaluated at the shortest document length really
+bounds every document.
+
+A scorer may also define cache_key(), a hashable description of its
+parameters; SearchEngine only caches results of scorers that have one.
+
+Available scorers:
+- "frequency": sum of raw term frequencies (the original ranking)
+- "tfidf":     sublinear tf times smoothed idf
+- "bm25":      Okapi BM25 with tunable k1 and b
+"""
+
+import math
+from typing import NamedTuple
+
+
+class CollectionStats(NamedTuple):
+    """Collection-wide statistics used by the scorers."""
+    doc_count: int
+    avg_length: float
+    min_length: int
+
+
+class FrequencyScorer:
+    """Score(doc) = sum of the query terms' frequencies in doc."""
+
+    name = "frequency"
+
+    def cache_key(self) -> tuple:
+        return (self.name,)
+
+    def term_weight(self, df: int, stats: CollectionStats) -> int:
+        return 1
+
+    def term_factor(self, tf: int, length: int, stats: CollectionStats) -> int:
+        return tf
+
+    def score(self, tf: int, length: int, weight, stats: CollectionStats):
+        return weight * tf
+
+    def upper_bound(self, max_tf: int, weight, stats: CollectionStats):
+        return weight * max_tf
+
+
+class TfIdfScorer:
+    """
+    TF-IDF with sublinear term frequency:
+
+        (1 + ln tf) * (ln((1 + N) / (1 + df)) + 1)
+
+    The smoothed idf stays positive for terms found in every document.
+    """
+
+    name = "tfidf"
+
+    def cache_key(self) -> tuple:
+        return (self.name,)
+
+    def term_weight(self, df: int, stats: CollectionStats) -> float:
+        return math.log((1 + stats.doc_count) / (1 + df)) + 1
+
+    def term_factor(self, tf: int, length: int, stats: CollectionStats) -> float:
+        return 1 + math.log(tf)
+
+    def score(self, tf: int, length: int, weight, stats: CollectionStats) -> float:
+        return weight * (1 + math.log(tf))
+
+    def upper_bound(self, max_tf: int, weight, stats: CollectionStats) -> float:
+        return weight * (1 + math.log(max_tf))
+
+
+class BM25Scorer:
+    """
+    Okapi BM25:
+
+        idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+
+    with the non-negative idf ln(1 + (N - df + 0.5) / (df + 0.5)).
+
+    Parameters:-
+    k1 : float
+        Term frequency saturation (0 -> binary, larger -> closer to raw tf).
+    b : float
+        Length normalisation (0 -> none, 1 -> full).
+    """
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        if k1 < 0 or not 0 <= b <= 1:
+            raise ValueError("BM25 needs k1 >= 0 and 0 <= b <= 1")
+        self.k1 = k1
+        self.b = b
+
+    def cache_key(self) -> tuple:
+        return (self.name, self.k1, self.b)
+
+    def term_weight(self, df: int, stats: CollectionStats) -> float:
+        return math.log(1 + (stats.doc_count - df + 0.5) / (df + 0.5))
+
+    def term_factor(self, tf: int, length: int, stats: CollectionStats) -> float:
+        k1 = self.k1
+        norm = k1 * (1 - self.b + self.b * length / stats.avg_length)
+        return tf * (k1 + 1) / (tf + norm)
+
+    def score(self, tf: int, length: int, weight, stats: CollectionStats) -> float:
+        return weight * self.term_factor(tf, length, stats)
+
+    def upper_bound(self, max_tf: int, weight, stats: CollectionStats) -> float:
+        return self.score(max_tf, stats.min_length, weight, stats)
+
+
+SCORERS = {
+    "frequency": FrequencyScorer,
+    "tfidf": TfIdfScorer,
+    "bm25": BM25Scorer,
+}
+
+
+def get_scorer(scorer=None):
+    """
+    Resolve a scorer given by name, as an instance, or None (frequency).
+
+    Raises ValueError for an unknown name.
+    """
+    if scorer is None:
+        return FrequencyScorer()
+    if isinstance(scorer, str):
+        if scorer not in SCORERS:
+            raise ValueError(f"unknown scorer: {scorer!r}")
+        return SCORERS[scorer]()
+    return scorer
@@ -6,14 +6,130 @@ Responsibilities:
 - Load and parse each page
 - Tokenize extracted text
 - Build the inverted index (which also updates the Trie)
-- Run AND-based ranked searches
+- Add, update and delete single documents without a full rebuild
+- Refresh only changed pages, optionally from a background watcher
+- Run AND-based ranked searches (frequency, TF-IDF or BM25 scoring)
+- Answer quoted phrase and NEAR/k queries from positional postings
+- Plan and run boolean queries (OR, NOT, +/-, parentheses), with explain()
+- Score large batches of queries with a sparse term-document matrix
 - Provide optional prefix search using the Trie
+- Correct misspelled query words by fuzzy matching on the Trie
+- Cache the results of repeated queries (LRU, invalidated on index changes)
+- Save / load binary index snapshots to skip rebuilding on start-up
+- Write / open memory-mapped read-only postings segments
+- Optionally parse and tokenize pages in parallel worker processes
+- Crawl linked pages (http:// or file://) as an alternative ingest source
+- Optionally time every build / query stage and trace single queries
+- Publish index changes as immutable generations, so concurrent searches
+  never see a half-applied update
 """
 
+import hashlib
 import os
-from parser import load_page
-from tokenizer import tokenize
-from inverted_index import InvertedIndex
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from parser import UNREADABLE_TITLE, PageStream, load_page
+from crawler import LinkGraph, crawl
+from tokenizer import iter_tokens, tokenize
+from inverted_index import InvertedIndex, count_positions, count_terms
+from id_tables import TitlesView
+from instrumentation import DISABLED, Instrumentation, QueryTrace
+from query import parse, parse_query
+from query_planner import execute_plan, plan_query, scoring_terms
+from scoring import get_scorer
+from query_cache import QueryCache
+from term_matrix import TermMatrix
+from snapshot import SnapshotError, load_snapshot, save_snapshot
+from segment import write_segment
+from watcher import DirectoryWatcher, FolderChanges, scan_folder
+
+
+def default_max_edits(word: str) -> int:
+    """
+    Edit distance allowed when correcting an unknown query word:
+    0 for words of up to 2 characters, 1 up to 5 characters, else 2.
+    """
+    if len(word) <= 2:
+        return 0
+    if len(word) <= 5:
+        return 1
+    return 2
+
+
+def page_files(folder: str) -> list:
+    """
+    All indexable (.txt / .html) file names inside a folder, sorted so
+    builds are deterministic.
+    """
+    return sorted(
+        filename for filename in os.listdir(folder)
+        if filename.endswith(".txt") or filename.endswith(".html")
+    )
+
+
+def read_page_terms(filepath: str, extractor: str = "bs4",
+                    positional: bool = False,
+                    instrumentation=DISABLED) -> tuple:
+    """
+    Parse and tokenize one page.
+
+    With the "fast" extractor the page is streamed in chunks
+    (parser.PageStream + tokenizer.iter_tokens), so neither the page
+    text nor its token list is ever held in memory as a whole; parsing
+    and tokenizing then interleave and are timed together as
+    "build.load_page".
+
+    Returns:-
+    tuple[str, dict, dict or None]
+        title, term -> frequency in first-occurrence order, and (only
+        if positional) term -> encoded token positions.
+    """
+    count = count_positions if positional else count_terms
+
+    timer = instrumentation.timer
+    if extractor == "fast":
+        with timer("build.load_page"):
+            stream = PageStream(filepath)
+            result = count(iter_tokens(stream))
+            title = stream.title
+            if title == UNREADABLE_TITLE:
+                # A decode error can come after text was already
+                # streamed; index nothing, as load_page does
+                result = count(iter(()))
+    else:
+        with timer("build.load_page"):
+            title, text = load_page(filepath, extractor)
+        with timer("build.tokenize"):
+            result = count(tokenize(text))
+
+    if positional:
+        return (title,) + result
+    return title, result, None
+
+
+def parse_pages(folder: str, filenames: list, extractor: str = "bs4",
+                positional: bool = False) -> list:
+    """
+    Parse and tokenize a shard of pages (runs inside a worker process).
+
+    Returns:-
+    list of (filename, title, term_counts)
+        term_counts maps term -> frequency in first-occurrence order,
+        which is much smaller to send back than the token list. With
+        positional=True each entry has a fourth item, term -> encoded
+        token positions.
+    """
+    parsed = []
+    for filename in filenames:
+        title, counts, positions = read_page_terms(
+            os.path.join(folder, filename), extractor, positional
+        )
+        if positional:
+            parsed.append((filename, title, counts, positions))
+        else:
+            parsed.append((filename, title, counts))
+    return parsed
 
 
 class SearchEngine:
@@ -22,94 +138,704 @@ class SearchEngine:
     Includes:
     - Inverted index (term -> docs)
     - Trie storage for unique terms
-    - Document titles for cleaner output
+    - Document titles for cleaner output (kept in the index's
+      document table, see the titles property)
+
+    positional=True keeps token positions in the index, which phrase
+    ("...") and NEAR/k queries need. instrument=True times every build
+    and query stage (see stats()).
+
+    Thread safety: self.index is the current, published index
+    generation and is never changed in place. Writers (build_index,
+    refresh, add / update / delete_document) stage their changes on a
+    copy and publish it with one reference assignment (see batch());
+    they are serialized by a lock. Readers take self.index once and use
+    that generation for the whole query, without locking.
     """
 
-    def __init__(self, data_folder: str):
+    def __init__(self, data_folder: str, snapshot_path: str = None,
+                 extractor: str = "bs4", scorer=None,
+                 cache_size: int = 1024, positional: bool = False,
+                 instrument: bool = False):
         self.data_folder = data_folder
-        self.index = InvertedIndex()
-        self.titles = {}   # doc_id -> title
+        self.snapshot_path = snapshot_path
+        self.extractor = extractor   # parser.load_page text extractor
+        self.scorer = get_scorer(scorer)   # default ranking function
+        self.cache = QueryCache(cache_size)   # recent query results
+        self.positional = positional
+        # stage timers and counters; DISABLED records nothing
+        self.instrumentation = Instrumentation() if instrument else DISABLED
+        self.index = InvertedIndex(positional)
+        self.index.instrumentation = self.instrumentation
+        self.term_matrix = None   # TermMatrix of the last search_batch
+        self.manifest = {}   # filename -> (mtime_ns, size, digest)
+        self.link_graph = LinkGraph()   # links of the crawled pages
+        self._write_lock = threading.RLock()   # one writer at a time
+        self._staged = None   # index being changed by the open batch()
+
+    @property
+    def titles(self) -> TitlesView:
+        """doc_id -> title of every indexed document (read-only view)."""
+        return TitlesView(self.index.docs)
+
+    def _page_files(self) -> list:
+        return page_files(self.data_folder)
+
+    def _corpus_fingerprint(self) -> bytes:
+        """
+        Digest of the name, size and modification time of every page.
+
+        Only stat() is needed, so checking whether a snapshot is still
+        valid costs far less than re-reading the corpus.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for filename in sorted(self._page_files()):
+            st = os.stat(os.path.join(self.data_folder, filename))
+            digest.update(f"{filename}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return digest.digest()
 
-    def build_index(self):
+    @contextmanager
+    def batch(self):
+        """
+        Group index changes into one new generation.
+
+        The block works on a private copy of the current index
+        (InvertedIndex.copy(), which shares the posting arrays) and
+        yields it. When the block ends, the copy is published with one
+        reference assignment. Searches that started earlier finish on
+        the generation they pinned; later ones see every change of the
+        block. If the block raises, nothing is published. Blocks opened
+        inside another (same thread) join the outer one. Other writers
+        wait until the block ends.
+
+        Each single add / update / delete_document outside a block is a
+        batch of its own, which copies the per-document and per-term
+        tables; wrap many changes in one batch.
+        """
+        with self._write_lock:
+            if self._staged is not None:
+                yield self._staged
+                return
+
+            staged = self._staged = self.index.copy()
+            try:
+                yield staged
+            finally:
+                self._staged = None
+            if staged.generation != self.index.generation:
+                # Deletes and replacements leave freed ids behind
+                if staged.needs_compaction():
+                    staged.compact()
+                self._publish(staged)
+
+    def _publish(self, index: InvertedIndex) -> None:
+        # Make index the current generation with one reference assignment.
+        # Generations only grow, so caches never take a new index for an
+        # older one.
+        with self._write_lock:
+            index.generation = max(index.generation, self.index.generation + 1)
+            self.index = index
+
+    def build_index(self, workers: int = None, filenames: list = None):
         """
         Build the inverted index by processing every .txt/.html file
-        in the data folder.
+        in the data folder, or only the pages named in filenames (e.g.
+        the pages of one shard, see sharding).
+
+        With workers > 1, pages are parsed and tokenized by a pool of
+        that many processes; each returns per-document term counts that
+        are merged here in file order, so the resulting index is
+        identical to a serial build.
+
+        Building again re-indexes the current pages and removes the
+        ones an earlier build indexed that are no longer there.
+
+        If a snapshot_path was given, a valid snapshot for the current
+        corpus is loaded instead, and a freshly built index is saved
+        there for the next start-up.
         """
-        for filename in os.listdir(self.data_folder):
-            if filename.endswith(".txt") or filename.endswith(".html"):
-                filepath = os.path.join(self.data_folder, filename)
+        if self.snapshot_path and self.load_snapshot(self.snapshot_path):
+            print("Index loaded from snapshot.")
+            if filenames is None and set(self.manifest) != set(self._page_files()):
+                # Pages changed through add / delete_document before
+                # the snapshot was saved: restore them from the folder
+                self.refresh()
+            print(f"Total unique Trie terms: {len(self.index.index)}")
+            return
+
+        if filenames is None:
+            filenames = self._page_files()
+        # stat() only: the pages are read for parsing below, and hashed
+        # by the first refresh() (see watcher)
+        changes = scan_folder(self.data_folder, filenames, {}, hash_new=False)
 
-                # Parse the file and extract title + text
-                title, text = load_page(filepath)
-                self.titles[filename] = title
+        # The Trie is built once from the sorted vocabulary at the end
+        with self.instrumentation.timer("build.total"), \
+                self.batch() as index, index.bulk_load():
+            # Pages indexed by an earlier build that are gone now
+            for filename in self.manifest:
+                if filename not in changes.manifest:
+                    index.delete_document(filename)
+            if workers is not None and workers > 1:
+                self._index_files_parallel(index, changes.added, workers)
+            else:
+                for filename in changes.added:
+                    self._index_file(index, filename)
+            self.manifest = changes.manifest
+        self.instrumentation.count("build.documents", len(changes.added))
 
-                # Tokenize the text and add to the index
-                tokens = tokenize(text)
-                self.index.add_document(filename, tokens)
+        if self.snapshot_path:
+            self.save_snapshot(self.snapshot_path)
 
         print("Index successfully built.")
-        print(
-            f"Total unique Trie terms: "
-            f"{len(self.index.trie.search_prefix(''))}"
+        print(f"Total unique Trie terms: {len(self.index.trie)}")
+
+    def _index_file(self, index: InvertedIndex, filename: str) -> None:
+        filepath = os.path.join(self.data_folder, filename)
+
+        # Parse the file, extract title + text and count its terms
+        title, counts, positions = read_page_terms(
+            filepath, self.extractor, self.positional, self.instrumentation
         )
 
-    def _apply_trie_fallback(self, tokens):
+        # Add the document to the index
+        with self.instrumentation.timer("index.add_document"):
+            index.add_term_counts(filename, counts, positions)
+        index.docs.set_title(filename, title)
+
+    def _index_files_parallel(self, index: InvertedIndex, filenames: list,
+                              workers: int) -> None:
+        # Several shards per worker so a few large pages do not leave
+        # the other workers idle
+        shard_count = min(len(filenames), workers * 4)
+        if shard_count == 0:
+            return
+        shard_size = -(-len(filenames) // shard_count)
+        shards = [
+            filenames[i:i + shard_size]
+            for i in range(0, len(filenames), shard_size)
+        ]
+
+        # Workers do not report stage times; "build.parse_parallel" is the
+        # wall time of the whole pool, merging included
+        timer = self.instrumentation.timer
+        with timer("build.parse_parallel"), \
+                ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields shards in submission order -> file order
+            for parsed in pool.map(parse_pages,
+                                   [self.data_folder] * len(shards), shards,
+                                   [self.extractor] * len(shards),
+                                   [self.positional] * len(shards)):
+                for filename, title, counts, *positions in parsed:
+                    with timer("index.add_document"):
+                        index.add_term_counts(filename, counts, *positions)
+                    index.docs.set_title(filename, title)
+
+    def refresh(self) -> FolderChanges:
+        """
+        Bring the index up to date with the data folder.
+
+        Only pages that were added, modified or deleted since the last
+        build / refresh (according to the manifest) are re-parsed or
+        removed, plus pages replaced or deleted through add_document /
+        delete_document, which are restored from their files. All
+        changes are published as one generation.
+
+        Returns:-
+        FolderChanges
+            The new manifest and the lists of changed file names.
+        """
+        with self.batch() as index:
+            changes = scan_folder(self.data_folder, self._page_files(),
+                                  self.manifest)
+
+            for filename in changes.deleted:
+                index.delete_document(filename)
+            for filename in changes.added + changes.modified:
+                self._index_file(index, filename)
+
+            self.manifest = changes.manifest
+        return changes
+
+    def watch(self, interval: float = 1.0) -> DirectoryWatcher:
+        """
+        Start a background thread that calls refresh() every
+        `interval` seconds. Call stop() on the returned watcher to end it.
+        """
+        return DirectoryWatcher(self, interval).start()
+
+    def crawl(self, seeds, **options):
+        """
+        Follow links from seed URLs or files and index every fetched
+        page (see crawler.Crawler for the options). Files inside the
+        data folder keep their build_index names; other pages are named
+        by URL. The links found are added to self.link_graph.
+
+        Returns:-
+        crawler.Crawler
+            The finished crawl, with its pages and errors.
+        """
+        crawler = crawl(self, seeds, **options)
+        for source, targets in crawler.graph.edges.items():
+            self.link_graph.add(source, targets)
+        return crawler
+
+    def add_document(self, doc_id: str, text, title: str = None) -> None:
+        """
+        Index one document. An existing doc_id is replaced.
+
+        Parameters:-
+        doc_id : str
+            Document name returned in search results.
+        text : str or Iterable[str]
+            Visible text of the document, either as one string or as
+            chunks (tokenized lazily with tokenizer.iter_tokens).
+        title : str, optional
+            Display title; defaults to doc_id.
+
+        A doc_id naming a page of the data folder is dropped from the
+        manifest, so the next refresh() re-indexes it from its file.
+        """
+        if isinstance(text, str):
+            tokens = tokenize(text)
+        else:
+            tokens = iter_tokens(text)
+
+        with self.batch() as index:
+            with self.instrumentation.timer("index.add_document"):
+                index.add_document(doc_id, tokens)
+            if title is not None:
+                index.docs.set_title(doc_id, title)
+            # The index no longer matches the data folder's file
+            self.manifest.pop(doc_id, None)
+
+    def update_document(self, doc_id: str, text, title: str = None) -> None:
+        """
+        Replace the contents and title of a document (or add it if new).
+        """
+        self.add_document(doc_id, text, title)
+
+    def delete_document(self, doc_id: str) -> bool:
+        """
+        Remove a document (and its title) from the index.
+
+        Returns:-
+        bool
+            True if the document was indexed; False otherwise.
+        """
+        with self.batch() as index:
+            self.manifest.pop(doc_id, None)
+            return index.delete_document(doc_id)
+
+    def save_snapshot(self, path: str) -> None:
+        """
+        Save the current index (page titles included) to a snapshot file.
+        """
+        with self._write_lock:
+            index = self.index
+            if index.segment is None and (index.docs.free_slots()
+                                          or index.terms.free_slots()):
+                # Snapshots are written without freed ids
+                index = index.copy()
+                index.compact()
+            state = index.to_state()
+            state["manifest"] = self.manifest
+        save_snapshot(path, state, self._corpus_fingerprint())
+
+    def load_snapshot(self, path: str) -> bool:
+        """
+        Replace the current index with the contents of a snapshot.
+
+        Returns:-
+        bool
+            True if the snapshot was loaded; False if it is missing,
+            stale, corrupt, written by an incompatible version or lacks
+            the positions a positional engine needs, in which case the
+            engine is left unchanged.
+        """
+        try:
+            state = load_snapshot(path, self._corpus_fingerprint())
+            index = InvertedIndex.from_state(state)
+            manifest = state["manifest"]
+        except (SnapshotError, KeyError, TypeError):
+            return False
+        if (index.positions is not None) != self.positional:
+            return False
+
+        index.instrumentation = self.instrumentation
+        with self._write_lock:
+            self._publish(index)
+            self.manifest = manifest
+        self.cache.clear()
+        return True
+
+    def write_segment(self, path: str) -> None:
+        """
+        Write the current index and titles to a compact postings segment
+        that other processes can open with open_segment().
+        """
+        index = self.index   # one generation for postings and titles
+        write_segment(path, index.index, TitlesView(index.docs))
+
+    def open_segment(self, path: str) -> None:
+        """
+        Serve from a read-only, memory-mapped postings segment.
+        Segments hold no positions, so phrase and NEAR queries are not
+        available while serving from one.
+
+        Raises segment.SegmentError if the file is not a valid segment.
+        """
+        index = InvertedIndex.open_segment(path)
+        index.instrumentation = self.instrumentation
+        self._publish(index)
+        self.cache.clear()
+
+    def _apply_trie_fallback(self, index: InvertedIndex, tokens,
+                             max_edits: int = None):
         """
         For each token:
         - If exact match exists -> keep it
-        - Else use Trie prefix match (first match)
+        - Else use the Trie prefix match with the highest document frequency
+        - Else use the closest fuzzy match (edit distance, then document
+          frequency) within max_edits, or default_max_edits(word) if None
         - Else return [] meaning AND-search must fail
         """
         fallback_tokens = []
 
         for word in tokens:
-            # If exact token exists -> use it
-            if word in self.index.index:
-                fallback_tokens.append(word)
-                continue
-
-            # Try trie prefix fallback
-            matches = self.index.trie.search_prefix(word)
-            if matches:
-                fallback_tokens.append(matches[0])   # deterministic choice
-            else:
+            term = self._correct_term(index, word, max_edits)
+            if term is None:
                 return []   # AND logic -> whole search fails
+            fallback_tokens.append(term)
 
         return fallback_tokens
 
-    def search(self, query: str) -> list:
+    def _correct_term(self, index: InvertedIndex, word: str,
+                      max_edits: int = None):
+        # The indexed term used for a query word (see _apply_trie_fallback),
+        # or None if nothing is close enough
+        if index.has_term(word):
+            return word
+
+        # Try trie prefix fallback (most frequent completion)
+        trie = index.trie
+        matches = trie.search_prefix(word, limit=1)
+        if not matches:
+            # Try typo-tolerant fallback
+            edits = default_max_edits(word) if max_edits is None else max_edits
+            if edits > 0:
+                matches = [term for term, _ in
+                           trie.fuzzy_search(word, edits, limit=1)]
+
+        return matches[0] if matches else None   # deterministic choice
+
+    def search(self, query: str, top_k: int = None, scorer=None,
+               max_edits: int = None, trace: QueryTrace = None) -> list:
         """
         Run a standard AND-based search on the inverted index, with
-        optional Trie prefix fallback when exact tokens do not exist.
+        Trie prefix and fuzzy fallback when exact tokens do not exist.
+
+        Quoted phrases ("machine learning") and proximity operators
+        (machine NEAR/3 learning) are matched exactly and checked on
+        token positions, only for documents that contain every term.
+        They need a positional index and raise ValueError otherwise.
+
+        Queries using OR, NOT / -, or parentheses are planned by
+        query_planner (see explain()); documents are ranked by the
+        scores of the non-excluded terms they contain.
+
+        Parameters:-
+        query : str
+            Raw query text (see query.parse_query for the syntax).
+        top_k : int, optional
+            Only rank and return the best top_k documents.
+        scorer : str or scorer object, optional
+            Overrides the engine's scorer for this query.
+        max_edits : int, optional
+            Largest edit distance for correcting unknown words (0 turns
+            fuzzy matching off). Defaults to default_max_edits(word).
+        trace : instrumentation.QueryTrace, optional
+            Filled in with the stage times, corrections, posting-list
+            lengths and candidate counts of this query.
 
         Returns:-
         list of (doc_id, title, score)
         """
-        query_tokens = tokenize(query)
-        if not query_tokens:
-            return []
+        instrumentation = self.instrumentation
+        if trace is None and instrumentation.enabled:
+            trace = QueryTrace()   # feeds the engine-wide counters
+        if trace is not None:
+            trace.query = query
 
-        # Apply Trie fallback for near-matching tokens
-        final_tokens = self._apply_trie_fallback(query_tokens)
-        if not final_tokens:
+        with instrumentation.timer("query.total", trace):
+            formatted_results = self._search(query, top_k, scorer,
+                                             max_edits, trace)
+
+        if trace is not None:
+            trace.results = len(formatted_results)
+            instrumentation.record_query(trace)
+        return formatted_results
+
+    def _search(self, query: str, top_k: int, scorer, max_edits: int,
+                trace) -> list:
+        # Pin the current generation for the whole query
+        index = self.index
+
+        with self.instrumentation.timer("query.parse", trace):
+            parsed = parse_query(query)
+        if not parsed:
             return []
+        if parsed.positional and index.positions is None:
+            raise ValueError("phrase and NEAR queries need a positional "
+                             "index (SearchEngine(..., positional=True))")
+
+        scorer = self.scorer if scorer is None else get_scorer(scorer)
+
+        # Repeated queries are answered from the cache while the index
+        # generation is unchanged (scorers without cache_key are not cached)
+        cache_key = None
+        generation = index.generation
+        if hasattr(scorer, "cache_key"):
+            cache_key = (parsed, top_k, scorer.cache_key(), max_edits)
+            cached = self.cache.get(cache_key, generation)
+            if cached is not None:
+                if trace is not None:
+                    trace.cache_hit = True
+                return cached
+
+        formatted_results = self._search_parsed(
+            index, parsed, top_k, scorer,
+            lambda word: self._correct_term(index, word, max_edits), trace
+        )
+
+        if cache_key is not None:
+            self.cache.put(cache_key, generation, formatted_results)
+        return formatted_results
+
+    def _search_parsed(self, index: InvertedIndex, parsed, top_k: int,
+                       scorer, correct, trace=None,
+                       collection: tuple = None) -> list:
+        # index: the pinned generation; correct: word -> indexed term or
+        # None (see _correct_term); collection: whole-collection
+        # statistics when this is a shard
+        timer = self.instrumentation.timer
+
+        if parsed.boolean:
+            with timer("query.search", trace):
+                plan = plan_query(parsed.tree, index, correct)
+                docs = execute_plan(plan, index)
+                terms = scoring_terms(plan)
+                results = index.score_documents(
+                    docs, terms, top_k=top_k, scorer=scorer,
+                    collection=collection
+                )
+            if trace is not None:
+                trace.plan = plan
+                trace.terms = terms
+                trace.postings = {term: index.doc_freq(term) for term in terms}
+                trace.candidates = trace.scored = len(docs)
+            return self._format_results(index, results)
+
+        # Apply Trie fallback for near-matching free terms
+        final_tokens = []
+        if parsed.terms:
+            with timer("query.fallback", trace):
+                final_tokens = [correct(word) for word in parsed.terms]
+            if None in final_tokens:
+                return []   # AND logic -> whole search fails
+            if trace is not None:
+                trace.corrections = {
+                    word: term for word, term in zip(parsed.terms, final_tokens)
+                    if word != term
+                }
+        final_tokens += parsed.positional_terms()
+        if trace is not None:
+            trace.terms = final_tokens
 
-        results = self.index.search(final_tokens)
+        # Positions are only decoded for documents that contain every term
+        doc_filter = None
+        if parsed.positional:
+            def doc_filter(doc):
+                return (all(index.phrase_match(doc, phrase.terms)
+                            for phrase in parsed.phrases)
+                        and all(index.near_match(doc, *near)
+                                for near in parsed.near))
 
+        with timer("query.search", trace):
+            results = index.search(final_tokens, top_k=top_k, scorer=scorer,
+                                   doc_filter=doc_filter, trace=trace,
+                                   collection=collection)
+        return self._format_results(index, results)
+
+    def search_shard(self, query: str, corrections: dict, collection: tuple,
+                     top_k: int = None, scorer=None) -> list:
+        """
+        Search this engine as one shard of a larger collection (see
+        sharding.ShardedSearchEngine). Not cached.
+
+        Parameters:-
+        query : str
+            Raw query text.
+        corrections : dict
+            query word -> indexed term (or None), decided on the whole
+            collection; words missing from it are not corrected.
+        collection : tuple
+            (CollectionStats, term -> document frequency) of the whole
+            collection, covering every term the query can score.
+        top_k, scorer :
+            As for search().
+
+        Returns:-
+        list of (doc_id, title, score)
+            This shard's best documents, scored exactly as one engine
+            over the whole collection would score them.
+        """
+        parsed = parse_query(query)
+        if not parsed:
+            return []
+        scorer = self.scorer if scorer is None else get_scorer(scorer)
+        return self._search_parsed(self.index, parsed, top_k, scorer,
+                                   lambda word: corrections.get(word, word),
+                                   collection=collection)
+
+    def _format_results(self, index: InvertedIndex, results: dict) -> list:
+        # doc -> score  ->  [(doc, title, score)]
         formatted_results = []
+        titles = TitlesView(index.docs)
         for doc, score in results.items():
-            title = self.titles.get(doc, doc)
+            title = titles.get(doc, doc)
             formatted_results.append((doc, title, score))
 
         return formatted_results
 
-    def prefix_search(self, prefix: str) -> list:
+    def search_batch(self, queries, top_k: int = None, scorer=None,
+                     max_edits: int = None) -> list:
+        """
+        Run many searches at once; returns the same results as calling
+        search() for each query.
+
+        Plain AND queries are scored together with sparse matrix
+        products over a TermMatrix, which is built on first use and
+        rebuilt only when the index or the scorer changes. Phrase, NEAR
+        and boolean queries, and scorers without term_factor(), go
+        through search(). Needs NumPy and SciPy (ImportError otherwise).
+
+        Parameters:-
+        queries : Iterable[str]
+            Raw query texts.
+        top_k, scorer, max_edits :
+            As for search(), applied to every query.
+
+        Returns:-
+        list of list of (doc_id, title, score)
+            One result list per query, in query order.
+        """
+        scorer = self.scorer if scorer is None else get_scorer(scorer)
+        queries = list(queries)
+        results = [[] for _ in queries]
+        index = self.index   # the matrix-scored queries share one generation
+
+        batch_rows = []
+        batch_tokens = []
+        batchable = hasattr(scorer, "term_factor")
+        for row, query in enumerate(queries):
+            parsed = parse_query(query)
+            if not parsed:
+                continue
+            if parsed.boolean or parsed.positional or not batchable:
+                results[row] = self.search(query, top_k, scorer, max_edits)
+                continue
+
+            tokens = self._apply_trie_fallback(index, parsed.terms, max_edits)
+            if tokens:
+                batch_rows.append(row)
+                batch_tokens.append(tokens)
+
+        if batch_tokens:
+            matrix = self._term_matrix(index, scorer)
+            for row, scores in zip(batch_rows, matrix.score(batch_tokens, top_k)):
+                results[row] = self._format_results(index, scores)
+
+        return results
+
+    def _term_matrix(self, index: InvertedIndex, scorer) -> TermMatrix:
+        # Reuse the frozen matrix while the index and scorer are unchanged;
+        # a scorer without cache_key() cannot be compared, so it always
+        # gets a new matrix
+        matrix = self.term_matrix
+        if (matrix is None or matrix.generation != index.generation
+                or not hasattr(scorer, "cache_key")
+                or not hasattr(matrix.scorer, "cache_key")
+                or matrix.scorer.cache_key() != scorer.cache_key()):
+            matrix = self.term_matrix = TermMatrix(index, scorer)
+        return matrix
+
+    def _plan(self, tree, max_edits: int = None):
+        index = self.index
+        return plan_query(
+            tree, index, lambda word: self._correct_term(index, word, max_edits)
+        )
+
+    def explain(self, query: str, max_edits: int = None):
+        """
+        Show how a query would be evaluated.
+
+        Plain conjunctions run through InvertedIndex.search, boolean
+        queries through query_planner; both intersect rarest first, so
+        the plan describes either.
+
+        Parameters:-
+        query : str
+            Raw query text.
+        max_edits : int, optional
+            As for search().
+
+        Returns:-
+        query_planner.PlanNode or None
+            Operator tree with estimated result sizes and costs (print
+            it, or use to_dict()); None for an empty query.
+        """
+        tree = parse(query)
+        if tree is None:
+            return None
+        return self._plan(tree, max_edits)
+
+    def stats(self) -> dict:
+        """
+        Index size, query cache counters and, if the engine was created
+        with instrument=True, the per-stage timers and counters
+        (instrumentation.Instrumentation.snapshot()).
+
+        Returns:-
+        dict
+            JSON-ready: documents, terms, generation, cache, stages
+            (stage -> calls / total_ms / mean_ms / max_ms) and counters.
+        """
+        index = self.index
+        stats = {
+            "documents": len(index.docs),
+            "terms": len(index.index),
+            "generation": index.generation,
+            "cache": self.cache.stats(),
+        }
+        stats.update(self.instrumentation.snapshot())
+        return stats
+
+    def prefix_search(self, prefix: str, limit: int = None) -> list:
         """
         Optional: Use the Trie to find all terms starting with a prefix.
         Useful for suggestions or interactive exploration.
+
+        Parameters:-
+        prefix : str
+            Prefix to complete.
+        limit : int, optional
+            Only return the `limit` completions with the highest
+            document frequency (best first), served from the Trie's
+            per-node completion cache.
         """
         prefix = prefix.strip().lower()
         if not prefix:
             return []
 
-        return self.index.trie.search_prefix(prefix)
+        return self.index.trie.search_prefix(prefix, limit)
@@ -0,0 +1,273 @@
+"""
+Compact, read-only on-disk postings segments.
+
+An in-memory InvertedIndex keeps every term's postings in process
+memory, and every worker process holds its own copy. A
+segment stores the same information in a flat binary file that is
+opened with mmap, so all processes serving the same segment share one
+copy in the OS page cache and only the postings of the terms a query
+touches are ever decoded.
+
+File layout (all fixed-width integers little-endian):
+
+    header        magic b"SEGM", version, doc count, term count and
+                  the byte offsets of the sections below
+    doc table     per document: varint name length, name, varint title
+                  length, title (UTF-8), varint document length (token
+                  count, used for scoring). Doc ids are positions in this
+                  table, which is sorted by name.
+    term entries  term_count + 1 fixed-width records
+                  (term offset, postings offset, document frequency),
+                  sorted by term; the last record is a sentinel that
+                  marks the end of the last term / postings block
+    term bytes    the UTF-8 terms, back to back
+    postings      per term: df varint doc-id gaps, then df varint
+                  frequencies
+
+Term lookup is a binary search over the fixed-width term entries.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+
+MAGIC = b"SEGM"
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct("<4sHHIIQQQQ")
+_ENTRY = struct.Struct("<QQI")
+
+
+class SegmentError(ValueError):
+    """Raised when a file is not a readable postings segment."""
+
+
+def encode_varints(values, out: bytearray) -> None:
+    """
+    Append unsigned integers to out using LEB128 varint encoding
+    (7 bits per byte, high bit set on every byte but the last).
+    """
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def decode_varints(buf, pos: int, count: int) -> tuple[list, int]:
+    """
+    Decode count varints from buf starting at pos.
+
+    Returns:-
+    tuple[list, int]
+        The decoded integers and the position just after them.
+    """
+    values = []
+    append = values.append
+    for _ in range(count):
+        byte = buf[pos]
+        pos += 1
+        value = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        append(value)
+    return values, pos
+
+
+def _encode_string(text: str, out: bytearray) -> None:
+    data = text.encode("utf-8")
+    encode_varints((len(data),), out)
+    out += data
+
+
+def write_segment(path: str, postings: Mapping, titles: Mapping) -> None:
+    """
+    Write postings and titles to a segment file.
+
+    Parameters:-
+    path : str
+        Destination file (replaced atomically).
+    postings : Mapping
+        term -> { document_name : frequency }
+    titles : Mapping
+        document_name -> title
+    """
+    doc_names = set(titles)
+    for docs in postings.values():
+        doc_names.update(docs)
+    doc_names = sorted(doc_names)
+    doc_ids = {name: doc_id for doc_id, name in enumerate(doc_names)}
+
+    # Document length = total term frequency of the document
+    lengths = dict.fromkeys(doc_names, 0)
+    for docs in postings.values():
+        for doc, freq in docs.items():
+            lengths[doc] += freq
+
+    doc_table = bytearray()
+    for name in doc_names:
+        _encode_string(name, doc_table)
+        _encode_string(titles.get(name, name), doc_table)
+        encode_varints((lengths[name],), doc_table)
+
+    terms = sorted(postings)
+    term_bytes = bytearray()
+    postings_data = bytearray()
+    entries = []
+
+    for term in terms:
+        entries.append((len(term_bytes), len(postings_data), len(postings[term])))
+        term_bytes += term.encode("utf-8")
+
+        ids = sorted((doc_ids[doc], freq) for doc, freq in postings[term].items())
+        previous = 0
+        gaps = []
+        for doc_id, _ in ids:
+            gaps.append(doc_id - previous)
+            previous = doc_id
+        encode_varints(gaps, postings_data)
+        encode_varints((freq for _, freq in ids), postings_data)
+
+    entries.append((len(term_bytes), len(postings_data), 0))
+
+    doc_table_off = _HEADER.size
+    entries_off = doc_table_off + len(doc_table)
+    term_bytes_off = entries_off + _ENTRY.size * len(entries)
+    postings_off = term_bytes_off + len(term_bytes)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(
+            MAGIC, FORMAT_VERSION, 0, len(doc_names), len(terms),
+            entries_off, term_bytes_off, postings_off,
+            postings_off + len(postings_data),
+        ))
+        f.write(doc_table)
+        for entry in entries:
+            f.write(_ENTRY.pack(*entry))
+        f.write(term_bytes)
+        f.write(postings_data)
+    os.replace(tmp_path, path)
+
+
+class SegmentReader:
+    """
+    Memory-mapped view over a segment file.
+
+    Attributes:-
+    doc_names : list[str]
+        Document name for every doc id.
+    titles : dict
+        document_name -> title
+    doc_lengths : dict
+        document_name -> number of tokens
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:   # empty file
+                raise SegmentError("segment file is empty") from exc
+
+        try:
+            self._load_header()
+        except (SegmentError, struct.error, IndexError, UnicodeDecodeError) as exc:
+            self._mm.close()
+            if isinstance(exc, SegmentError):
+                raise
+            raise SegmentError(f"corrupt segment: {exc}") from exc
+
+    def _load_header(self) -> None:
+        mm = self._mm
+        if len(mm) < _HEADER.size:
+            raise SegmentError("segment is truncated")
+
+        (magic, version, _, doc_count, term_count, entries_off,
+         term_bytes_off, postings_off, end) = _HEADER.unpack_from(mm)
+
+        if magic != MAGIC:
+            raise SegmentError("not a postings segment")
+        if version != FORMAT_VERSION:
+            raise SegmentError(f"unsupported segment version {version}")
+        if end != len(mm):
+            raise SegmentError("segment is truncated")
+
+        self.term_count = term_count
+        self._entries_off = entries_off
+        self._term_bytes_off = term_bytes_off
+        self._postings_off = postings_off
+
+        # The doc table is small next to the postings, decode it once
+        self.doc_names = []
+        self.titles = {}
+        self.doc_lengths = {}
+        pos = _HEADER.size
+        for _ in range(doc_count):
+            (length,), pos = decode_varints(mm, pos, 1)
+            name = mm[pos:pos + length].decode("utf-8")
+            pos += length
+            (length,), pos = decode_varints(mm, pos, 1)
+            self.titles[name] = mm[pos:pos + length].decode("utf-8")
+            pos += length
+            (self.doc_lengths[name],), pos = decode_varints(mm, pos, 1)
+            self.doc_names.append(name)
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _entry(self, i: int) -> tuple:
+        return _ENTRY.unpack_from(self._mm, self._entries_off + i * _ENTRY.size)
+
+    def _term_at(self, i: int) -> bytes:
+        start = self._entry(i)[0]
+        end = self._entry(i + 1)[0]
+        base = self._term_bytes_off
+        return self._mm[base + start:base + end]
+
+    def find(self, term: str) -> int:
+        """
+        Return the entry number of a term, or -1 if it is not stored.
+        """
+        key = term.encode("utf-8")
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.term_count and self._term_at(lo) == key:
+            return lo
+        return -1
+
+    def terms(self):
+        """Yield every stored term in sorted order."""
+        for i in range(self.term_count):
+            yield self._term_at(i).decode("utf-8")
+
+    def doc_freq(self, i: int) -> int:
+        """Number of documents for the term at entry i."""
+        return self._entry(i)[2]
+
+    def postings_arrays(self, i: int) -> tuple:
+        """
+        Decode the postings of the term at entry i as parallel arrays.
+
+        Returns:-
+        tuple
+            (array('I') of doc ids, ascending; array('I') of frequencies)
+        """
+        _, offset, df = self._entry(i)
+        pos = self._postings_off + offset
+        gaps, pos = decode_varints(self._mm, pos, df)
+        freqs, _ = decode_varints(self._mm, pos, df)
+        return array("I", accumulate(gaps)), array("I", freqs)
+
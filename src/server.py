@@ -0,0 +1,372 @@
+"""
+Asyncio HTTP query service in front of a built SearchEngine.
+
+Endpoints (GET, JSON responses):
+
+    /search?q=<query>[&k=10][&scorer=bm25]   ranked results
+    /prefix?q=<prefix>[&limit=10]            completions, most frequent first
+    /stats                                   index, cache and server counters
+                                             (plus stage timers with --instrument)
+
+Only the standard library is used. One event loop accepts connections
+and parses requests; searches and prefix lookups run in a bounded
+thread pool so a slow query does not stall other connections. When
+more than max_pending queries are waiting for the pool, new ones are
+answered with 503 instead of queueing without limit.
+
+Connections are kept alive (HTTP/1.1 default, or HTTP/1.0 with
+"Connection: keep-alive") until the client closes them or they stay
+idle for idle_timeout seconds.
+
+Usage:
+    python src/server.py [--data data] [--port 8080] [--workers 4]
+                         [--crawl SEED ...]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# Limits on what a client may send
+_MAX_HEADERS = 100
+_MAX_BODY = 1 << 16
+
+
+class BadRequest(ValueError):
+    """Raised for a malformed request or invalid query parameters."""
+
+
+class _Overloaded(Exception):
+    """The query pool already has max_pending queries."""
+
+
+class SearchServer:
+    """
+    HTTP server sharing one SearchEngine between all connections.
+
+    Parameters:-
+    engine : SearchEngine
+        Engine with its index already built (or loaded).
+    host, port : str, int
+        Address to listen on; port 0 picks a free port (see .port).
+    workers : int
+        Threads running queries.
+    max_pending : int
+        Largest number of queries running or waiting for a thread.
+    max_results : int
+        Upper limit for the k / limit parameters.
+    idle_timeout : float
+        Seconds a keep-alive connection may stay idle.
+    """
+
+    def __init__(self, engine, host: str = "127.0.0.1", port: int = 8080,
+                 workers: int = 4, max_pending: int = 64,
+                 max_results: int = 100, idle_timeout: float = 30.0):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self.idle_timeout = idle_timeout
+
+        self.requests = 0
+        self.errors = 0       # 4xx / 500 responses
+        self.rejected = 0     # 503 responses (pool saturated)
+        self.pending = 0      # queries running or queued in the pool
+
+        self._executor = None
+        self._server = None
+        self._started = None
+        self._handlers = set()   # tasks serving open connections
+
+    async def start(self) -> None:
+        """Start listening; returns once the socket is bound."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="search"
+        )
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    @property
+    def connections(self) -> int:
+        """Number of currently open connections."""
+        return len(self._handlers)
+
+    async def close(self) -> None:
+        """
+        Stop accepting connections, close the open ones and shut the
+        thread pool down.
+        """
+        if self._server is not None:
+            self._server.close()
+            for task in self._handlers:
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Server counters (the /stats "server" section)."""
+        uptime = time.monotonic() - self._started if self._started else 0.0
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "connections": self.connections,
+            "pending": self.pending,
+            "workers": self.workers,
+            "uptime_s": round(uptime, 3),
+        }
+
+    async def _handle_connection(self, reader, writer) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    break
+                except BadRequest as exc:
+                    self.errors += 1
+                    await self._respond(writer, 400, {"error": str(exc)}, False)
+                    break
+                if request is None:
+                    break   # client closed the connection
+
+                method, target, keep_alive = request
+                self.requests += 1
+                status, body = await self._dispatch(method, target)
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            pass   # request line or header longer than the stream limit
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        """
+        Read one request head (and skip its body).
+
+        Returns (method, target, keep_alive), or None at end of stream.
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise BadRequest("malformed request line") from None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n"):
+                break
+            if not line:
+                raise asyncio.IncompleteReadError(line, None)
+            if len(headers) >= _MAX_HEADERS:
+                raise BadRequest("too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get("content-length", "0")
+        if not length.isdigit() or int(length) > _MAX_BODY:
+            raise BadRequest("invalid content-length")
+        if int(length):
+            await reader.readexactly(int(length))
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+        return method, target, keep_alive
+
+    async def _dispatch(self, method: str, target: str) -> tuple:
+        url = urlsplit(target)
+        routes = {
+            "/search": self._search,
+            "/prefix": self._prefix,
+            "/stats": self._stats,
+        }
+        handler = routes.get(url.path)
+        if handler is None:
+            self.errors += 1
+            return 404, {"error": f"unknown path: {url.path}"}
+        if method != "GET":
+            self.errors += 1
+            return 405, {"error": "only GET is supported"}
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            return await handler(params)
+        except BadRequest as exc:
+            self.errors += 1
+            return 400, {"error": str(exc)}
+        except Exception as exc:   # keep serving after a failing query
+            self.errors += 1
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    async def _run(self, func, *args):
+        # Run a query in the pool, or raise _Overloaded if too many wait
+        if self.pending >= self.max_pending:
+            raise _Overloaded()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def _int_param(self, params: dict, name: str, default: int) -> int:
+        value = params.get(name)
+        if value is None:
+            return default
+        if not value.isdigit():
+            raise BadRequest(f"{name} must be a non-negative integer")
+        return min(int(value), self.max_results)
+
+    async def _search(self, params: dict) -> tuple:
+        query = params.get("q", "").strip()
+        if not query:
+            raise BadRequest("missing query parameter q")
+        top_k = self._int_param(params, "k", 10)
+        scorer = params.get("scorer")
+
+        def run():
+            # ValueError: unknown scorer, phrase query without positions
+            try:
+                return self.engine.search(query, top_k=top_k, scorer=scorer)
+            except ValueError as exc:
+                raise BadRequest(str(exc)) from None
+
+        start = time.perf_counter()
+        try:
+            results = await self._run(run)
+        except _Overloaded:
+            return self._overloaded()
+        return 200, {
+            "query": query,
+            "results": [
+                {"doc": doc, "title": title, "score": score}
+                for doc, title, score in results
+            ],
+            "took_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    async def _prefix(self, params: dict) -> tuple:
+        prefix = params.get("q", "").strip()
+        if not prefix:
+            raise BadRequest("missing query parameter q")
+        limit = self._int_param(params, "limit", 10)
+
+        try:
+            completions = await self._run(self.engine.prefix_search, prefix, limit)
+        except _Overloaded:
+            return self._overloaded()
+        return 200, {"prefix": prefix, "completions": completions}
+
+    async def _stats(self, params: dict) -> tuple:
+        stats = self.engine.stats()
+        stats["server"] = self.stats()
+        return 200, stats
+
+    def _overloaded(self) -> tuple:
+        self.rejected += 1
+        return 503, {"error": "server busy, try again"}
+
+    @staticmethod
+    async def _respond(writer, status: int, body: dict, keep_alive: bool) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        ).encode("latin-1")
+        writer.write(head + payload)
+        await writer.drain()
+
+
+def main() -> None:
+    # SearchServer only needs an engine object; building one needs the
+    # page parsers
+    from search_engine import SearchEngine
+
+    parser = argparse.ArgumentParser(description="Serve search queries over HTTP.")
+    parser.add_argument("--data", default="data", help="folder with the pages")
+    parser.add_argument("--snapshot", help="snapshot file to load / save")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--positional", action="store_true",
+                        help="keep positions (phrase and NEAR queries)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time build / query stages (shown in /stats)")
+    parser.add_argument("--crawl", action="append", metavar="SEED",
+                        help="index the pages linked from this URL or file "
+                             "instead of the data folder (repeatable)")
+    args = parser.parse_args()
+
+    engine = SearchEngine(args.data, snapshot_path=args.snapshot,
+                          positional=args.positional,
+                          instrument=args.instrument)
+    if args.crawl:
+        crawler = engine.crawl(args.crawl)
+        print(f"Crawled {len(crawler.pages)} pages ({len(crawler.errors)} errors)")
+    else:
+        engine.build_index()
+
+    server = SearchServer(engine, args.host, args.port, workers=args.workers)
+
+    async def serve():
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
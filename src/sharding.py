@@ -0,0 +1,452 @@
+"""
+Sharded search: documents hash-partitioned across worker processes.
+
+ShardedSearchEngine starts one worker process per shard. Each worker
+owns a SearchEngine (its own InvertedIndex and Trie) over the pages
+whose name hashes to it (shard_of), so indexing memory and query CPU
+are spread over several interpreters. The coordinator talks to the
+workers over pipes and scatters every request to all shards at once.
+
+A search runs in three scatter-gather rounds:
+
+1. collection: every shard reports its document count, total length,
+   shortest length and the document frequencies of the query words.
+   Summed, these are the statistics of the whole collection.
+2. corrections: words no shard knows are corrected against the whole
+   vocabulary (prefix completion with the highest global document
+   frequency, else the closest fuzzy match), as SearchEngine does.
+3. search: each shard ranks its own documents with the global
+   statistics (InvertedIndex.search(collection=...)), so scores are
+   exactly those of one engine over the whole collection. Their sorted
+   top-k lists are merged by (score, document name).
+
+prefix_search fans out too: shards return their best completions with
+document frequencies and the coordinator asks for more until no
+unlisted term can still beat the merged top `limit`.
+
+With a timeout, shards that do not answer a query in time are left
+out and listed in missing_shards, and the results are partial. Late
+answers are recognised by their request number and dropped.
+"""
+
+import contextlib
+import io
+import multiprocessing
+import time
+import zlib
+from heapq import merge
+from itertools import islice
+from multiprocessing.connection import wait
+
+from query import And, Near, Not, Or, Phrase, Term, parse_query
+from scoring import CollectionStats, get_scorer
+from search_engine import SearchEngine, default_max_edits, page_files
+
+
+def shard_of(doc_id: str, shards: int) -> int:
+    """Shard that owns doc_id (CRC-32 of the name, stable across runs)."""
+    return zlib.crc32(doc_id.encode("utf-8")) % shards
+
+
+# ---------------------------------------------------------------------
+# Worker side: one SearchEngine per process, driven by (seq, command,
+# args) messages; every message is answered with (seq, ok, value)
+# ---------------------------------------------------------------------
+
+def _build(engine, filenames):
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.build_index(filenames=filenames)
+    return len(engine.index.docs)
+
+
+def _collection(engine, terms):
+    index = engine.index
+    return (len(index.docs), index.total_length,
+            index.stats().min_length,
+            {term: index.doc_freq(term) for term in terms})
+
+
+def _prefix(engine, prefix, limit):
+    index = engine.index
+    return [(term, index.doc_freq(term))
+            for term in index.trie.search_prefix(prefix, limit)]
+
+
+def _fuzzy(engine, word, max_edits):
+    # Matches at this shard's smallest distance (all of them, so the
+    # coordinator can sum document frequencies exactly)
+    index = engine.index
+    for distance in range(max_edits + 1):
+        matches = index.trie.fuzzy_search(word, distance)
+        if matches:
+            return [(term, found, index.doc_freq(term)) for term, found in matches]
+    return []
+
+
+_COMMANDS = {
+    "build": _build,
+    "add": SearchEngine.add_document,
+    "delete": SearchEngine.delete_document,
+    "collection": _collection,
+    "prefix": _prefix,
+    "fuzzy": _fuzzy,
+    "search": SearchEngine.search_shard,
+    "stats": SearchEngine.stats,
+}
+
+
+def _serve_shard(conn, data_folder: str, options: dict) -> None:
+    # Worker process main loop
+    engine = SearchEngine(data_folder, cache_size=0, **options)
+    while True:
+        try:
+            seq, command, args = conn.recv()
+        except EOFError:
+            break
+        if command == "close":
+            break
+        try:
+            reply = (seq, True, _COMMANDS[command](engine, *args))
+        except Exception as error:   # reported to the coordinator
+            reply = (seq, False, error)
+        conn.send(reply)
+    conn.close()
+
+
+# ---------------------------------------------------------------------
+# Coordinator
+# ---------------------------------------------------------------------
+
+class ShardedSearchEngine:
+    """
+    SearchEngine-like front end over `shards` worker processes.
+
+    Parameters:-
+    data_folder : str
+        Folder with the pages (read by the workers).
+    shards : int
+        Number of worker processes.
+    extractor, scorer, positional, instrument :
+        As for SearchEngine; scorer objects must be picklable.
+    timeout : float, optional
+        Seconds to wait for the shards to answer each round of a query
+        (None waits forever). Builds and updates always wait.
+
+    Use as a context manager, or call close(), to stop the workers.
+    Not thread-safe: serialise calls from several threads.
+    """
+
+    def __init__(self, data_folder: str, shards: int = 4,
+                 extractor: str = "bs4", scorer=None,
+                 positional: bool = False, instrument: bool = False,
+                 timeout: float = None):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.data_folder = data_folder
+        self.shards = shards
+        self.scorer = get_scorer(scorer)
+        self.positional = positional
+        self.timeout = timeout
+        self.missing_shards = ()   # shards left out of the last query
+        self.timeouts = 0          # queries that missed at least one shard
+        self._seq = 0
+
+        options = {"extractor": extractor, "scorer": self.scorer,
+                   "positional": positional, "instrument": instrument}
+        # spawn: safe to start from a process that already runs threads
+        context = multiprocessing.get_context("spawn")
+        self._conns = []
+        self._processes = []
+        for _ in range(shards):
+            conn, child = context.Pipe()
+            process = context.Process(target=_serve_shard,
+                                      args=(child, data_folder, options),
+                                      daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(conn)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for conn in self._conns:
+            with contextlib.suppress(OSError):
+                conn.send((0, "close", ()))
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._conns = []
+        self._processes = []
+
+    def _scatter(self, command: str, *args, shards=None,
+                 timeout: float = None) -> dict:
+        """
+        Send the same command to several shards (default: all) at once
+        and gather the answers; see _exchange.
+        """
+        targets = range(self.shards) if shards is None else shards
+        return self._exchange({shard: (command, args) for shard in targets},
+                              timeout)
+
+    def _exchange(self, requests: dict, timeout: float = None) -> dict:
+        """
+        Send shard -> (command, args) requests, then wait for the
+        answers.
+
+        Returns:-
+        dict
+            shard -> reply, for the shards that answered within timeout
+            (the others, dead workers included, are added to
+            missing_shards). A shard's exception is re-raised here.
+        """
+        self._seq += 1
+        seq = self._seq
+        pending = {}
+        for shard, (command, args) in requests.items():
+            conn = self._conns[shard]
+            try:
+                conn.send((seq, command, args))
+            except OSError:
+                continue   # worker died; counted as missing below
+            pending[conn] = shard
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        replies = {}
+        while pending:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+            for conn in wait(list(pending), remaining):
+                try:
+                    reply_seq, ok, value = conn.recv()
+                except (EOFError, OSError):
+                    pending.pop(conn)   # worker died; counted as missing
+                    continue
+                if reply_seq != seq:
+                    continue   # late answer to an earlier request
+                shard = pending.pop(conn)
+                if not ok:
+                    raise value
+                replies[shard] = value
+
+        if len(replies) < len(requests):
+            missing = set(self.missing_shards) | (set(requests) - set(replies))
+            self.missing_shards = tuple(sorted(missing))
+        return replies
+
+    def build_index(self) -> None:
+        """
+        Index every page of the data folder on the shard owning it; the
+        shards build in parallel.
+        """
+        parts = [[] for _ in range(self.shards)]
+        for filename in page_files(self.data_folder):
+            parts[shard_of(filename, self.shards)].append(filename)
+
+        counts = self._exchange({shard: ("build", (filenames,))
+                                 for shard, filenames in enumerate(parts)})
+        print("Index successfully built.")
+        print(f"Documents per shard: {[counts[s] for s in range(self.shards)]}")
+
+    def add_document(self, doc_id: str, text, title: str = None) -> None:
+        """Index one document on its shard (see SearchEngine.add_document)."""
+        if not isinstance(text, str):
+            text = list(text)   # chunks are sent in one message
+        self._scatter("add", doc_id, text, title,
+                      shards=[shard_of(doc_id, self.shards)])
+
+    def update_document(self, doc_id: str, text, title: str = None) -> None:
+        """Replace a document (or add it if new)."""
+        self.add_document(doc_id, text, title)
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Remove a document from its shard; True if it was indexed."""
+        shard = shard_of(doc_id, self.shards)
+        return self._scatter("delete", doc_id, shards=[shard])[shard]
+
+    def _collection(self, terms, shards=None) -> tuple:
+        """
+        Whole-collection statistics and document frequencies of terms.
+
+        Returns:-
+        tuple
+            (CollectionStats, term -> df, shards that answered)
+        """
+        replies = self._scatter("collection", list(terms), shards=shards,
+                                timeout=self.timeout)
+        doc_count = total_length = 0
+        min_length = None
+        doc_freqs = dict.fromkeys(terms, 0)
+        for count, length, shortest, freqs in replies.values():
+            doc_count += count
+            total_length += length
+            if count and (min_length is None or shortest < min_length):
+                min_length = shortest
+            for term, df in freqs.items():
+                doc_freqs[term] += df
+
+        # Same formulas as InvertedIndex.stats()
+        avg_length = total_length / doc_count if total_length else 1.0
+        stats = CollectionStats(doc_count, avg_length, min_length or 0)
+        return stats, doc_freqs, sorted(replies)
+
+    def search(self, query: str, top_k: int = None, scorer=None,
+               max_edits: int = None) -> list:
+        """
+        Search every shard and merge the results; the same syntax,
+        corrections and scores as SearchEngine.search() over the whole
+        collection.
+
+        If some shards missed the timeout, the results only cover the
+        others and missing_shards lists them.
+
+        Returns:-
+        list of (doc_id, title, score)
+        """
+        self.missing_shards = ()
+        parsed = parse_query(query)
+        if not parsed or (top_k is not None and top_k <= 0):
+            return []
+        if parsed.positional and not self.positional:
+            raise ValueError("phrase and NEAR queries need a positional "
+                             "index (ShardedSearchEngine(..., positional=True))")
+        scorer = self.scorer if scorer is None else get_scorer(scorer)
+
+        if parsed.boolean:
+            words, exact = _query_words(parsed.tree)
+        else:
+            words, exact = list(dict.fromkeys(parsed.terms)), parsed.positional_terms()
+
+        stats, doc_freqs, shards = self._collection(words + exact)
+
+        # Words no shard knows are corrected on the whole vocabulary
+        corrections = {}
+        for word in words:
+            if doc_freqs[word]:
+                corrections[word] = word
+            else:
+                corrections[word] = self._correct_term(word, max_edits)
+        if not parsed.boolean and None in corrections.values():
+            return []   # AND logic -> whole search fails
+
+        corrected = [term for term in corrections.values()
+                     if term is not None and term not in doc_freqs]
+        if corrected:
+            doc_freqs.update(self._collection(corrected, shards)[1])
+
+        replies = self._scatter("search", query, corrections,
+                                (stats, doc_freqs), top_k, scorer,
+                                shards=shards, timeout=self.timeout)
+        if self.missing_shards:
+            self.timeouts += 1
+
+        # Every shard list is sorted by (-score, doc) already
+        merged = merge(*replies.values(), key=lambda row: (-row[2], row[0]))
+        return list(islice(merged, top_k))
+
+    def _correct_term(self, word: str, max_edits: int = None):
+        # Like SearchEngine._correct_term, for a word no shard contains
+        matches = self._prefix_search(word, 1)
+        if not matches:
+            edits = default_max_edits(word) if max_edits is None else max_edits
+            if edits > 0:
+                matches = self._fuzzy_search(word, edits)
+        return matches[0] if matches else None
+
+    def _fuzzy_search(self, word: str, max_edits: int) -> list:
+        # Closest terms: smallest distance, then highest document frequency
+        replies = self._scatter("fuzzy", word, max_edits, timeout=self.timeout)
+        found = [match for reply in replies.values() for match in reply]
+        if not found:
+            return []
+        distance = min(found_distance for _, found_distance, _ in found)
+        doc_freqs = {}
+        for term, found_distance, df in found:
+            if found_distance == distance:
+                doc_freqs[term] = doc_freqs.get(term, 0) + df
+        return sorted(doc_freqs, key=lambda term: (-doc_freqs[term], term))
+
+    def prefix_search(self, prefix: str, limit: int = None) -> list:
+        """
+        Terms starting with prefix over all shards, as
+        SearchEngine.prefix_search: without limit all of them in
+        lexicographic order, with limit the `limit` terms with the
+        highest document frequency in the whole collection.
+        """
+        self.missing_shards = ()
+        prefix = prefix.strip().lower()
+        if not prefix or (limit is not None and limit <= 0):
+            return []
+        return self._prefix_search(prefix, limit)
+
+    def _prefix_search(self, prefix: str, limit: int = None) -> list:
+        if limit is None:
+            replies = self._scatter("prefix", prefix, None, timeout=self.timeout)
+            return sorted({term for reply in replies.values() for term, _ in reply})
+
+        fetch = limit
+        while True:
+            replies = self._scatter("prefix", prefix, fetch, timeout=self.timeout)
+            candidates = {term for reply in replies.values() for term, _ in reply}
+            if not candidates:
+                return []
+            doc_freqs = self._collection(candidates, sorted(replies))[1]
+            best = sorted(candidates, key=lambda term: (-doc_freqs[term], term))[:limit]
+
+            # A term no shard listed has, on each shard that filled its
+            # list, at most the document frequency of the list's last term
+            bound = sum(reply[-1][1] for reply in replies.values()
+                        if len(reply) == fetch)
+            if bound == 0 or (len(best) == limit and doc_freqs[best[-1]] > bound):
+                return best
+            fetch *= 4
+
+    def stats(self) -> dict:
+        """
+        Totals over the shards plus each shard's SearchEngine.stats()
+        (None for a shard that missed the timeout).
+        """
+        self.missing_shards = ()
+        replies = self._scatter("stats", timeout=self.timeout)
+        shards = [replies.get(shard) for shard in range(self.shards)]
+        return {
+            "shards": self.shards,
+            "documents": sum(s["documents"] for s in shards if s is not None),
+            "timeouts": self.timeouts,
+            "per_shard": shards,
+        }
+
+
+def _query_words(tree) -> tuple:
+    """
+    Words of a boolean query tree: (words that may be corrected, words
+    matched exactly). Excluded words (below a NOT) are in neither: they
+    are never corrected or scored. Phrase / NEAR words are exact.
+    """
+    words, exact = [], []
+    stack = [(tree, True)]
+    while stack:
+        node, positive = stack.pop()
+        if isinstance(node, Term):
+            if positive:
+                words.append(node.term)
+        elif isinstance(node, Phrase):
+            exact.extend(node.terms)
+        elif isinstance(node, Near):
+            exact.extend((node.left, node.right))
+        elif isinstance(node, Not):
+            stack.append((node.child, False))
+        elif isinstance(node, (And, Or)):
+            stack.extend((child, positive) for child in node.children)
+    return list(dict.fromkeys(words)), list(dict.fromkeys(exact))
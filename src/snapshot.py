@@ -0,0 +1,121 @@
+"""
+Reads and writes binary snapshots of a built search index.
+
+Building the index means parsing every page with BeautifulSoup and
+tokenizing it again, which dominates start-up time on a large corpus.
+A snapshot stores the finished index on disk so that a new process can
+load it instead of rebuilding.
+
+File layout (all integers little-endian):
+
+    magic          4 bytes   b"SEIX"
+    version        uint16    snapshot format version
+    marshal_ver    uint16    marshal format used for the payload
+    fingerprint    16 bytes  digest of the corpus the index was built from
+    payload_len    uint64    size of the payload in bytes
+    checksum       uint32    CRC-32 of the payload
+    payload        bytes     marshal-encoded index state
+
+The payload only contains plain dicts, lists, strings, ints and bytes
+(posting arrays are stored as their raw array('I') bytes), so it is
+decoded by a single marshal.loads call without any per-posting Python
+work. A snapshot is rejected (SnapshotError) if the magic, version,
+fingerprint, length or checksum do not match.
+"""
+
+import marshal
+import os
+import struct
+import zlib
+
+MAGIC = b"SEIX"
+FORMAT_VERSION = 4
+
+_HEADER = struct.Struct("<4sHH16sQI")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing, stale or corrupt."""
+
+
+def save_snapshot(path: str, state: dict, fingerprint: bytes) -> None:
+    """
+    Write an index state to disk.
+
+    The file is written next to its final location and then renamed,
+    so readers never observe a half-written snapshot.
+
+    Parameters:-
+    path : str
+        Destination file.
+    state : dict
+        Index state made only of marshal-friendly builtin types.
+    fingerprint : bytes
+        16-byte digest identifying the corpus that produced the state.
+    """
+    payload = marshal.dumps(state)
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        marshal.version,
+        fingerprint,
+        len(payload),
+        zlib.crc32(payload),
+    )
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str, fingerprint: bytes = None) -> dict:
+    """
+    Read an index state previously written by save_snapshot.
+
+    Parameters:-
+    path : str
+        Snapshot file to read.
+    fingerprint : bytes, optional
+        Expected corpus digest. If given and it differs from the one
+        stored in the file, the snapshot is considered stale.
+
+    Returns:-
+    dict
+        The decoded index state.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as exc:
+        raise SnapshotError(f"cannot read snapshot: {exc}") from exc
+
+    if len(data) < _HEADER.size:
+        raise SnapshotError("snapshot is truncated")
+
+    magic, version, marshal_ver, stored_fp, length, checksum = (
+        _HEADER.unpack_from(data)
+    )
+
+    if magic != MAGIC:
+        raise SnapshotError("not a search index snapshot")
+    if version != FORMAT_VERSION or marshal_ver != marshal.version:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+    if fingerprint is not None and stored_fp != fingerprint:
+        raise SnapshotError("snapshot is stale for this corpus")
+
+    payload = memoryview(data)[_HEADER.size:]
+    if len(payload) != length:
+        raise SnapshotError("snapshot is truncated")
+    if zlib.crc32(payload) != checksum:
+        raise SnapshotError("snapshot checksum mismatch")
+
+    try:
+        state = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError) as exc:
+        raise SnapshotError(f"cannot decode snapshot: {exc}") from exc
+
+    if not isinstance(state, dict):
+        raise SnapshotError("snapshot payload has an unexpected type")
+    return state
@@ -0,0 +1,192 @@
+"""
+Frozen term-document matrix for scoring many queries at once.
+
+TermMatrix copies an InvertedIndex into a SciPy CSR matrix with one row
+per term and one column per document (documents in name order). Each
+stored value is the scorer's term_factor(tf, length), the part of a
+score that does not depend on the query, so it is computed once.
+
+A batch of AND queries becomes a sparse query matrix Q (one row per
+query, the weight of each query term in its column) and is scored with
+two sparse products:
+
+    scores  = Q @ M      summed contributions per (query, document)
+    matched = Q' @ P     number of query terms each document contains
+
+where Q' and P hold ones instead of weights. A document matches a query
+when it contains every distinct query term. Ranking and top-k selection
+are vectorized with NumPy (partition, then lexsort on score and
+document).
+
+Results are identical to InvertedIndex.search, including float scores:
+the contributions are the same products (weight * term_factor), and
+each query row lists its terms rarest first, which is the order SciPy
+accumulates them in and the order search() adds them up.
+
+NumPy and SciPy are optional dependencies; they are only needed here.
+"""
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:   # optional dependency
+    np = sparse = None
+
+
+class TermMatrix:
+    """
+    Read-only CSR snapshot of an index for one scorer.
+
+    Parameters:-
+    index : InvertedIndex
+        Index to freeze. Later changes to it are not seen; compare
+        .generation with index.generation to detect them.
+    scorer : scorer object
+        Must define term_factor() (all built-in scorers do).
+
+    Raises ImportError if NumPy / SciPy are missing.
+    """
+
+    def __init__(self, index, scorer):
+        if sparse is None:
+            raise ImportError("TermMatrix needs numpy and scipy "
+                              "(pip install numpy scipy)")
+
+        self.scorer = scorer
+        self.generation = index.generation
+        self.stats = stats = index.stats()
+
+        # Columns follow document names (the tie-break order of results),
+        # not the index's doc ids
+        table = index.docs
+        self.docs = sorted(table.ids)
+        column = [0] * len(table.names)
+        for i, doc in enumerate(self.docs):
+            column[table.ids[doc]] = i
+        lengths = [table.lengths[table.ids[doc]] for doc in self.docs]
+        factor = scorer.term_factor
+
+        self.term_ids = {}
+        indptr = [0]
+        indices = []
+        data = []
+        for term in index.index:
+            docs, freqs = index.postings(term)
+            self.term_ids[term] = len(self.term_ids)
+            for col, freq in sorted(zip(map(column.__getitem__, docs), freqs)):
+                indices.append(col)
+                data.append(factor(freq, lengths[col], stats))
+            indptr.append(len(indices))
+
+        # Integer factors (frequency scorer) stay integers, like search()
+        exact = all(isinstance(value, int) for value in data)
+        shape = (len(self.term_ids), len(self.docs))
+        indptr = np.array(indptr, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int64)
+
+        self.matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.int64 if exact else np.float64),
+             indices, indptr), shape=shape
+        )
+        self.presence = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=shape
+        )
+        self.doc_freqs = np.diff(indptr)
+
+    def score(self, queries: list, top_k: int = None) -> list:
+        """
+        Score a batch of AND queries.
+
+        Parameters:-
+        queries : list of list[str]
+            Query tokens per query (already corrected, no phrases).
+        top_k : int, optional
+            Only return the best top_k documents of each query.
+
+        Returns:-
+        list of dict
+            doc -> score per query, best first (as InvertedIndex.search).
+        """
+        results = [{} for _ in queries]
+        if top_k is not None and top_k <= 0:
+            return results
+
+        # Query rows: terms rarest first, weighted as in search()
+        rows, indptr, indices, weights, term_counts = [], [0], [], [], []
+        term_weight = self.scorer.term_weight
+        for row, tokens in enumerate(queries):
+            repeats = {}
+            for token in tokens:
+                repeats[token] = repeats.get(token, 0) + 1
+            terms = list(repeats)
+            if not terms or any(term not in self.term_ids for term in terms):
+                continue   # AND logic -> nothing matches
+
+            ids = [self.term_ids[term] for term in terms]
+            order = sorted(range(len(terms)),
+                           key=lambda i: (self.doc_freqs[ids[i]], terms[i]))
+            for i in order:
+                df = int(self.doc_freqs[ids[i]])
+                indices.append(ids[i])
+                weights.append(repeats[terms[i]] * term_weight(df, self.stats))
+            indptr.append(len(indices))
+            rows.append(row)
+            term_counts.append(len(terms))
+
+        if not rows:
+            return results
+
+        shape = (len(rows), len(self.term_ids))
+        exact = all(isinstance(weight, int) for weight in weights)
+        query_matrix = sparse.csr_matrix(
+            (np.array(weights, dtype=np.int64 if exact else np.float64),
+             np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=shape
+        )
+        query_terms = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), query_matrix.indices,
+             query_matrix.indptr), shape=shape
+        )
+
+        scores = (query_matrix @ self.matrix).tocsr()
+        matched = (query_terms @ self.presence).tocsr()
+        scores.sort_indices()
+
+        for i, row in enumerate(rows):
+            start, end = matched.indptr[i], matched.indptr[i + 1]
+            counts = matched.data[start:end]
+            doc_ids = matched.indices[start:end][counts == term_counts[i]]
+            if not len(doc_ids):
+                continue
+
+            # Look the matching documents up in the score row (a zero
+            # score is not stored by the product)
+            s_start, s_end = scores.indptr[i], scores.indptr[i + 1]
+            score_ids = scores.indices[s_start:s_end]
+            score_values = scores.data[s_start:s_end]
+            pos = np.searchsorted(score_ids, doc_ids)
+            found = pos < len(score_ids)
+            found[found] = score_ids[pos[found]] == doc_ids[found]
+            values = np.zeros(len(doc_ids), dtype=score_values.dtype)
+            values[found] = score_values[pos[found]]
+
+            results[row] = self._rank(doc_ids, values, top_k)
+
+        return results
+
+    def _rank(self, doc_ids, values, top_k: int) -> dict:
+        # Best score first, then document name (= column order)
+        if top_k is not None and len(values) > top_k:
+            # Keep everything tied with the k-th best score, then sort
+            kth = np.partition(values, len(values) - top_k)[len(values) - top_k]
+            keep = values >= kth
+            doc_ids, values = doc_ids[keep], values[keep]
+
+        order = np.lexsort((doc_ids, -values))
+        if top_k is not None:
+            order = order[:top_k]
+
+        docs = self.docs
+        return {docs[doc]: score
+                for doc, score in zip(doc_ids[order].tolist(), values[order].tolist())}
@@ -6,10 +6,14 @@ Steps:
 - Remove punctuation
 - Split on whitespace
 - Remove common stop words (articles, pronouns, prepositions, etc.)
+
+iter_tokens() applies the same steps to a stream of text chunks and
+yields tokens lazily, so a large document never has to be held (or
+copied) in memory as a whole.
 """
 
 import string
-from typing import List
+from typing import Iterable, Iterator, List
 
 # Expanded stopword set appropriate for this assignment.
 STOP_WORDS = {
@@ -39,6 +43,10 @@ STOP_WORDS = {
 }
 
 
+# Translation table that deletes punctuation (built once, not per call)
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
 def clean_text(text: str) -> str:
     """
     Normalize text by lowercasing and removing punctuation.
@@ -52,7 +60,7 @@ def clean_text(text: str) -> str:
         Cleaned text suitable for tokenization.
     """
     text = text.lower()
-    text = text.translate(str.maketrans("", "", string.punctuation))
+    text = text.translate(_PUNCTUATION_TABLE)
     return " ".join(text.split())
 
 
@@ -74,3 +82,41 @@ def tokenize(text: str) -> List[str]:
 
     words = cleaned.split()
     return [w for w in words if w not in STOP_WORDS]
+
+
+def iter_tokens(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Lazily tokenize text that arrives in chunks.
+
+    Produces exactly the tokens tokenize() would return for the
+    concatenated chunks. A word cut by a chunk boundary is carried over
+    and completed by the next chunk.
+
+    Parameters:-
+    chunks : Iterable[str]
+        Pieces of raw text, e.g. blocks read from a file.
+
+    Returns:-
+    Iterator[str]
+        Tokens in document order, stop words removed.
+    """
+    carry = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+
+        cleaned = carry + chunk.lower().translate(_PUNCTUATION_TABLE)
+        words = cleaned.split()
+
+        # A chunk that does not end in whitespace may end mid-word
+        if words and not cleaned[-1].isspace():
+            carry = words.pop()
+        else:
+            carry = ""
+
+        for word in words:
+            if word not in STOP_WORDS:
+                yield word
+
+    if carry and carry not in STOP_WORDS:
+        yield carry
@@ -1,5 +1,5 @@
 """
-Implements a simple Trie (prefix tree) for storing index terms.
+Implements a compressed Trie (radix tree) for storing index terms.
 
 Why Trie?
 
@@ -7,69 +7,436 @@ zyBooks Section 23.6 discusses storing index terms in a Trie (or compressed Trie
 to support fast lookup of terms and prefixes. This Trie is used by the inverted
 index to store every unique token encountered during indexing.
 
+Layout:
+
+A radix tree merges every chain of single-child nodes into one edge
+labelled with a whole substring, so it has at most two nodes per term
+instead of one node per character. Nodes are not Python objects; node i
+is described by position i of a few parallel arrays:
+
+    labels[i]     edge label leading into node i ("" for the root)
+    entries[i]    (-weight, term) if the path to node i spells a stored
+                  term, else None
+    child_keys[i] first character of each child's label, sorted
+    child_ids[i]  child node ids, in the same order as child_keys
+    top[i]        cached best completions below node i (see below)
+    sizes[i]      number of terms in the subtree of node i
+
+Leaves share one empty string and one empty tuple. Node ids freed by
+delete() are reused by later inserts. sizes is kept up to date by every
+insert and delete, so len(trie) and count_prefix() never enumerate terms,
+and iter_prefix(prefix, offset) skips whole subtrees to reach a page.
+
+Ranked completion:
+
+Every term carries a weight (the inverted index uses its document
+frequency). Each inner node caches the cache_size best entries of its
+subtree, ordered by descending weight and then by term, so
+search_prefix(prefix, limit) with limit <= cache_size only has to find
+the prefix node, however many terms share the prefix. The caches are
+merged bottom-up from the children's caches when the Trie is built.
+insert / delete / set_weight only reset the caches on the path from the
+root to the changed node; they are rebuilt on the next ranked query.
+
 Supported Operations:
 
 1. insert(term)          : Insert a full term into the Trie.
 2. search_exact(term)    : Check whether a term exists in the Trie.
-3. search_prefix(prefix) : Return all stored terms that begin with a prefix.
+3. search_prefix(prefix) : Return all stored terms that begin with a prefix,
+                           in lexicographic order, or the `limit` heaviest.
+4. iter_prefix(prefix)   : Lazily yield those terms in lexicographic order,
+                           optionally starting at an offset.
+5. count_prefix(prefix)  : Number of terms that begin with a prefix.
+6. delete(term)          : Remove a term and merge nodes it no longer needs.
+7. set_weight(term, w)   : Change the ranking weight of a term.
+8. Trie.from_sorted(terms): Bulk-build from a sorted term list.
+9. fuzzy_search(term, d) : Terms within Levenshtein distance d of a term.
+10. copy()               : Independent copy (e.g. for a new index generation).
 """
 
 from __future__ import annotations
-from typing import Dict, List, Optional
+import heapq
+from array import array
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 
+_ROOT = 0
 
-class TrieNode:
-    """
-    A single node in the Trie.
-
-    Attributes:-
-    
-    children : Dict[str, TrieNode]
-        Maps a character to its child TrieNode.
-    is_end_of_word : bool
-        True if this node marks the end of an inserted word.
-    term : Optional[str]
-        Stores the complete word at terminal nodes (useful for prefix results).
-    """
-    def __init__(self):
-        self.children: Dict[str, TrieNode] = {}
-        self.is_end_of_word: bool = False
-        self.term: Optional[str] = None
+# Completions cached per node by default
+DEFAULT_CACHE_SIZE = 10
 
 
 class Trie:
     """
-    Trie data structure for index terms.
+    Radix tree over index terms, stored in flat parallel arrays.
 
-    The Trie stores words character-by-character.
     Time complexity:
     - insert(term): O(m)
     - search_exact(term): O(m)
-    where m is the length of the term.
+    - search_prefix(prefix, limit <= cache_size): O(m + limit)
+    - len(trie): O(1), count_prefix(prefix): O(m)
+    where m is the length of the term / prefix.
     """
 
-    def __init__(self):
-        self.root = TrieNode()
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.labels: List[str] = [""]
+        self.entries: List[Optional[tuple]] = [None]
+        self.child_keys: List[str] = [""]
+        self.child_ids: List[tuple] = [()]
+        self.top: List[Optional[tuple]] = [None]
+        self.sizes = array("L", [0])
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        """Number of stored terms."""
+        return self.sizes[_ROOT]
+
+    def copy(self) -> "Trie":
+        """
+        Independent copy: the node arrays are copied, their immutable
+        items (labels, entries, child tuples, caches) are shared.
+        """
+        clone = Trie(self.cache_size)
+        clone.labels = list(self.labels)
+        clone.entries = list(self.entries)
+        clone.child_keys = list(self.child_keys)
+        clone.child_ids = list(self.child_ids)
+        clone.top = list(self.top)
+        clone.sizes = self.sizes[:]
+        clone._free = list(self._free)
+        return clone
+
+    def _new_node(self, label: str, entry: Optional[tuple],
+                  keys: str = "", ids: tuple = (),
+                  top: Optional[tuple] = None, size: int = 1) -> int:
+        if self._free:
+            node = self._free.pop()
+            self.labels[node] = label
+            self.entries[node] = entry
+            self.child_keys[node] = keys
+            self.child_ids[node] = ids
+            self.top[node] = top
+            self.sizes[node] = size
+            return node
+
+        self.labels.append(label)
+        self.entries.append(entry)
+        self.child_keys.append(keys)
+        self.child_ids.append(ids)
+        self.top.append(top)
+        self.sizes.append(size)
+        return len(self.labels) - 1
 
-    def insert(self, term: str) -> None:
+    def _child(self, node: int, char: str) -> int:
+        # Child of node whose label starts with char, or -1
+        j = self.child_keys[node].find(char)
+        return self.child_ids[node][j] if j >= 0 else -1
+
+    def _split(self, node: int, k: int) -> None:
+        # Cut node's label after k characters. node keeps its id (so its
+        # parent is unchanged) and becomes the upper part; a new node
+        # takes the rest of the label, the children and the entry. Both
+        # cover the same terms, so both keep the cached completions.
+        label = self.labels[node]
+        lower = self._new_node(
+            label[k:], self.entries[node], self.child_keys[node],
+            self.child_ids[node], self.top[node], self.sizes[node]
+        )
+        self.labels[node] = label[:k]
+        self.entries[node] = None
+        self.child_keys[node] = label[k]
+        self.child_ids[node] = (lower,)
+
+    def _add_child(self, node: int, child: int) -> None:
+        # Insert child among node's children, keeping keys sorted
+        keys = self.child_keys[node]
+        char = self.labels[child][0]
+        j = 0
+        while j < len(keys) and keys[j] < char:
+            j += 1
+        ids = self.child_ids[node]
+        self.child_keys[node] = keys[:j] + char + keys[j:]
+        self.child_ids[node] = ids[:j] + (child,) + ids[j:]
+
+    def _remove_child(self, node: int, char: str) -> None:
+        keys = self.child_keys[node]
+        j = keys.find(char)
+        ids = self.child_ids[node]
+        self.child_keys[node] = keys[:j] + keys[j + 1:]
+        self.child_ids[node] = ids[:j] + ids[j + 1:]
+
+    def _invalidate(self, path: List[int], added: int = 0) -> None:
+        # The subtree of every node on path changed and gained `added`
+        # terms (negative when a term was removed)
+        top, sizes = self.top, self.sizes
+        for node in path:
+            top[node] = None
+            sizes[node] += added
+
+    def insert(self, term: str, weight: int = 0) -> None:
         """
         Insert a term into the Trie.
 
         Parameters:-
         term : str
             The lowercase token to insert.
+        weight : int
+            Ranking weight for search_prefix(prefix, limit). Inserting
+            an existing term updates its weight.
+        """
+        labels = self.labels
+        node = _ROOT
+        path = [node]
+        i = 0
+
+        while i < len(term):
+            child = self._child(node, term[i])
+
+            # No edge starts with this character -> new leaf
+            if child < 0:
+                self._add_child(node, self._new_node(term[i:], (-weight, term)))
+                self._invalidate(path, 1)
+                return
+
+            # Length of the common prefix of the edge label and the rest
+            label = labels[child]
+            k = 1
+            limit = min(len(label), len(term) - i)
+            while k < limit and label[k] == term[i + k]:
+                k += 1
+
+            # The term leaves the edge part-way -> split the edge there
+            if k < len(label):
+                self._split(child, k)
+
+            node = child
+            path.append(node)
+            i += k
+
+        # Mark the end of the word
+        added = 1 if self.entries[node] is None else 0
+        self.entries[node] = (-weight, term)
+        self._invalidate(path, added)
+
+    @classmethod
+    def from_sorted(cls, terms: Iterable[str], weights: Iterable[int] = None,
+                    cache_size: int = DEFAULT_CACHE_SIZE) -> "Trie":
+        """
+        Build a Trie from terms in ascending order in a single pass.
+
+        Each term only shares a prefix with the path of the previous
+        one, so the builder keeps that path on a stack and never searches
+        for a child. Duplicates are ignored. The completion caches are
+        filled bottom-up at the end.
+
+        Parameters:-
+        terms : Iterable[str]
+            Terms sorted in ascending order.
+        weights : Iterable[int], optional
+            Weight of each term, in the same order (default 0).
+        cache_size : int
+            Completions cached per node.
+
+        Raises:-
+        ValueError
+            If the terms are not sorted.
+        """
+        trie = cls(cache_size)
+        labels, entries = trie.labels, trie.entries
+        children = [[]]     # node -> child ids while building
+
+        # Path of the previous term: (node, depth at the end of its label)
+        stack = [(_ROOT, 0)]
+        previous = None
+
+        if weights is None:
+            pairs = ((term, 0) for term in terms)
+        else:
+            pairs = zip(terms, weights)
+
+        for term, weight in pairs:
+            if previous is not None:
+                if term <= previous:
+                    if term == previous:
+                        continue
+                    raise ValueError("terms are not sorted")
+                common = 0
+                limit = min(len(term), len(previous))
+                while common < limit and term[common] == previous[common]:
+                    common += 1
+            else:
+                common = 0
+
+            # Leave the nodes that are deeper than the shared prefix
+            popped = None
+            while stack[-1][1] > common:
+                popped = stack.pop()[0]
+
+            # The shared prefix ends inside popped's label -> split it
+            depth = stack[-1][1]
+            if depth < common:
+                k = common - depth
+                label = labels[popped]
+                lower = len(labels)
+                labels.append(label[k:])
+                entries.append(entries[popped])
+                children.append(children[popped])
+                labels[popped] = label[:k]
+                entries[popped] = None
+                children[popped] = [lower]
+                stack.append((popped, common))
+
+            previous = term
+            if not term:
+                entries[_ROOT] = (-weight, term)
+                continue
+
+            # Sorted input -> a term that is a prefix of the previous
+            # one is impossible, so the rest is always a new last child
+            leaf = len(labels)
+            labels.append(term[common:])
+            entries.append((-weight, term))
+            children.append([])
+            children[stack[-1][0]].append(leaf)
+            stack.append((leaf, len(term)))
+
+        trie.child_keys = [
+            "".join(labels[child][0] for child in kids) for kids in children
+        ]
+        trie.child_ids = [tuple(kids) for kids in children]
+        trie.top = [None] * len(labels)
+        trie._top(_ROOT)
+
+        # Subtree sizes: children come after their parent in preorder
+        sizes = trie.sizes = array("L", [0]) * len(labels)
+        order = [_ROOT]
+        for node in order:
+            order.extend(children[node])
+        for node in reversed(order):
+            size = 1 if entries[node] is not None else 0
+            for child in children[node]:
+                size += sizes[child]
+            sizes[node] = size
+        return trie
+
+    def _find_node(self, term: str) -> tuple:
+        # Walk down term. Returns (node, base): the deepest node reached
+        # and the string spelled by the path to it (longer than term if
+        # term ends inside node's label). node is -1 if term leaves the
+        # tree.
+        labels = self.labels
+        node = _ROOT
+        i = 0
+
+        while i < len(term):
+            child = self._child(node, term[i])
+            if child < 0:
+                return -1, ""
+
+            label = labels[child]
+            if term.startswith(label, i):
+                node = child
+                i += len(label)
+            elif label.startswith(term[i:]):
+                # term ends inside this edge
+                return child, term[:i] + label
+            else:
+                return -1, ""
+
+        return node, term
+
+    def _path(self, term: str) -> List[int]:
+        # Nodes from the root to the node spelling exactly term, or []
+        labels = self.labels
+        node = _ROOT
+        path = [node]
+        i = 0
+
+        while i < len(term):
+            child = self._child(node, term[i])
+            if child < 0 or not term.startswith(labels[child], i):
+                return []
+            node = child
+            path.append(node)
+            i += len(labels[child])
+
+        return path
+
+    def delete(self, term: str) -> bool:
         """
-        node = self.root
+        Remove a term from the Trie.
 
-        # Walk down the Trie, creating nodes as needed
-        for char in term:
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
+        A node left without children is removed, and a node left with
+        a single child and no word of its own is merged with that child.
 
-        # Mark the end of the word and store the full term
-        node.is_end_of_word = True
-        node.term = term
+        Parameters:-
+        term : str
+            Term to remove.
+
+        Returns:-
+        bool
+            True if the term was stored; False otherwise.
+        """
+        path = self._path(term)
+        if not path or self.entries[path[-1]] is None:
+            return False
+
+        node = path[-1]
+        self.entries[node] = None
+        self._invalidate(path, -1)
+
+        if node == _ROOT:
+            return True
+
+        parent = path[-2]
+        if not self.child_ids[node]:
+            # Leaf: unlink it, then the parent may be left with one child
+            self._remove_child(parent, self.labels[node][0])
+            self._release(node)
+            if parent != _ROOT and self.entries[parent] is None \
+                    and len(self.child_ids[parent]) == 1:
+                self._merge(parent)
+        elif len(self.child_ids[node]) == 1:
+            self._merge(node)
+
+        return True
+
+    def _merge(self, node: int) -> None:
+        # Absorb node's only child into node (node keeps its id, so the
+        # parent's key for it - the first label character - is unchanged)
+        (child,) = self.child_ids[node]
+        self.labels[node] += self.labels[child]
+        self.entries[node] = self.entries[child]
+        self.child_keys[node] = self.child_keys[child]
+        self.child_ids[node] = self.child_ids[child]
+        self.top[node] = self.top[child]
+        self.sizes[node] = self.sizes[child]
+        self._release(child)
+
+    def _release(self, node: int) -> None:
+        self.labels[node] = ""
+        self.entries[node] = None
+        self.child_keys[node] = ""
+        self.child_ids[node] = ()
+        self.top[node] = None
+        self.sizes[node] = 0
+        self._free.append(node)
+
+    def set_weight(self, term: str, weight: int) -> bool:
+        """
+        Change the ranking weight of a stored term.
+
+        Returns:-
+        bool
+            True if the term is stored; False otherwise.
+        """
+        path = self._path(term)
+        if not path or self.entries[path[-1]] is None:
+            return False
+        self.entries[path[-1]] = (-weight, term)
+        self._invalidate(path)
+        return True
 
     def search_exact(self, term: str) -> bool:
         """
@@ -83,45 +450,245 @@ class Trie:
         bool
             True if the term was inserted before; False otherwise.
         """
-        node = self.root
+        labels, child_keys, child_ids = self.labels, self.child_keys, self.child_ids
+        node = _ROOT
+        i = 0
 
-        for char in term:
-            if char not in node.children:
+        while i < len(term):
+            j = child_keys[node].find(term[i])
+            if j < 0:
+                return False
+            node = child_ids[node][j]
+            label = labels[node]
+            if not term.startswith(label, i):
                 return False
-            node = node.children[char]
+            i += len(label)
 
-        return node.is_end_of_word
+        return self.entries[node] is not None
 
-    def search_prefix(self, prefix: str) -> List[str]:
+    def search_prefix(self, prefix: str, limit: int = None) -> List[str]:
         """
-        Return all stored terms that start with the given prefix.
+        Return stored terms that start with the given prefix.
 
         Parameters:-
         prefix : str
             Prefix to search for.
+        limit : int, optional
+            Only return the `limit` terms with the highest weight (ties
+            in lexicographic order). Answered from the node's cached
+            completions when limit <= cache_size.
 
         Returns:-
         List[str]
-            All terms in the Trie that begin with prefix.
+            Without limit: all terms that begin with prefix, in
+            lexicographic order. With limit: the best completions,
+            best first.
         """
-        node = self.root
-
         # Move to the node representing the prefix
-        for char in prefix:
-            if char not in node.children:
+        node, base = self._find_node(prefix)
+        if node < 0:
+            return []
+
+        if limit is not None:
+            if limit <= 0:
                 return []
-            node = node.children[char]
+            if limit <= self.cache_size:
+                return [term for _, term in self._top(node)[:limit]]
+            entries = self._iter_entries(node)
+            return [term for _, term in heapq.nsmallest(limit, entries)]
 
         # Collect all terms below this prefix node
-        results: List[str] = []
-        self._collect_terms(node, results)
-        return results
-
-    def _collect_terms(self, node: TrieNode, results: List[str]) -> None:
-    
-        #Helper DFS to collect all terms under a given node.    
-        if node.is_end_of_word and node.term is not None:
-            results.append(node.term)
-
-        for child in node.children.values():
-            self._collect_terms(child, results)
+        return list(self._walk(node, base, 0))
+
+    def iter_prefix(self, prefix: str, offset: int = 0) -> Iterator[str]:
+        """
+        Lazily yield the terms that start with prefix, in lexicographic
+        order. Nothing is materialized, so callers can stop early.
+
+        Parameters:-
+        prefix : str
+            Prefix to search for.
+        offset : int
+            Number of matching terms to skip. Whole subtrees are skipped
+            using their sizes, so a page deep into the results costs no
+            more than the first one.
+        """
+        node, base = self._find_node(prefix)
+        if node < 0:
+            return iter(())
+        return self._walk(node, base, offset)
+
+    def count_prefix(self, prefix: str) -> int:
+        """Return the number of stored terms that start with prefix."""
+        node, _ = self._find_node(prefix)
+        return self.sizes[node] if node >= 0 else 0
+
+    def _walk(self, node: int, base: str, skip: int) -> Iterator[str]:
+        # Depth-first walk with an explicit stack (no recursion, so term
+        # length is not limited by the recursion limit). Children are
+        # pushed in reverse key order so they are visited (and terms
+        # emitted) in lexicographic order.
+        labels, entries, child_ids = self.labels, self.entries, self.child_ids
+        sizes = self.sizes
+        stack = [(node, base)]
+
+        # Skip the first `skip` terms: drop subtrees that fit entirely,
+        # descend into the one that contains the first term to keep
+        while stack and skip:
+            node, word = stack.pop()
+            if sizes[node] <= skip:
+                skip -= sizes[node]
+                continue
+            if entries[node] is not None:
+                skip -= 1
+            for child in reversed(child_ids[node]):
+                stack.append((child, word + labels[child]))
+
+        while stack:
+            node, word = stack.pop()
+            if entries[node] is not None:
+                yield word
+            for child in reversed(child_ids[node]):
+                stack.append((child, word + labels[child]))
+
+    def _iter_entries(self, node: int):
+        # Every (-weight, term) entry below node, in no particular order
+        entries, child_ids = self.entries, self.child_ids
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if entries[node] is not None:
+                yield entries[node]
+            stack.extend(child_ids[node])
+
+    def _top(self, node: int) -> tuple:
+        """
+        Best cache_size entries below node, computing missing caches
+        bottom-up from the children's caches (iteratively, post-order).
+        Leaves are not cached: their only completion is their own entry.
+        """
+        entries, child_ids, top = self.entries, self.child_ids, self.top
+        size = self.cache_size
+
+        if not child_ids[node]:
+            return (entries[node],) if entries[node] is not None else ()
+        if top[node] is not None:
+            return top[node]
+
+        stack = [(node, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if top[current] is not None:
+                continue
+            kids = child_ids[current]
+
+            if not children_done:
+                stack.append((current, True))
+                for child in kids:
+                    if child_ids[child] and top[child] is None:
+                        stack.append((child, False))
+                continue
+
+            ranked = []
+            if entries[current] is not None:
+                ranked.append((entries[current],))
+            for child in kids:
+                if child_ids[child]:
+                    ranked.append(top[child])
+                else:
+                    ranked.append((entries[child],))
+            top[current] = tuple(islice(heapq.merge(*ranked), size))
+
+        return top[node]
+
+    def fuzzy_search(self, term: str, max_distance: int,
+                     limit: int = None) -> List[tuple]:
+        """
+        Find stored terms within a Levenshtein (edit) distance of term.
+
+        The Trie is walked while simulating a Levenshtein automaton for
+        term: each node carries the edit-distance row of the string
+        spelled so far against every prefix of term. Only the band of
+        max_distance cells either side of the diagonal is computed, and
+        as soon as every cell of a row exceeds max_distance no completion
+        of that string can match, so the whole subtree is skipped.
+
+        With a limit, distances 0, 1, ... are searched in turn and the
+        search stops once enough matches are found, so the (much wider)
+        walk at the largest distance only runs when it is needed.
+
+        Parameters:-
+        term : str
+            Word to match, e.g. a misspelled query token.
+        max_distance : int
+            Largest number of insertions, deletions and substitutions;
+            negative values match nothing.
+        limit : int, optional
+            Only return the best `limit` matches.
+
+        Returns:-
+        List[tuple]
+            (term, distance) pairs, by increasing distance, then
+            decreasing weight, then term.
+        """
+        if max_distance < 0:
+            return []
+
+        if limit is None:
+            matches = self._fuzzy_matches(term, max_distance)
+        else:
+            for distance in range(max_distance + 1):
+                matches = self._fuzzy_matches(term, distance)
+                if len(matches) >= limit:
+                    break
+            matches = matches[:limit]
+
+        return [(word, distance) for distance, _, word in matches]
+
+    def _fuzzy_matches(self, term: str, max_distance: int) -> list:
+        # Sorted (distance, -weight, term) for every term within reach
+        labels, entries, child_ids = self.labels, self.entries, self.child_ids
+        n = len(term)
+        too_far = max_distance + 1
+        matches = []
+
+        # Row for the empty string: distance j to the first j characters
+        row = [j if j <= max_distance else too_far for j in range(n + 1)]
+        if entries[_ROOT] is not None and row[n] <= max_distance:
+            matches.append((row[n],) + entries[_ROOT])
+
+        # (node, row before node's label, depth before node's label)
+        stack = [(child, row, 0) for child in child_ids[_ROOT]]
+        while stack:
+            node, row, depth = stack.pop()
+
+            for char in labels[node]:
+                depth += 1
+                previous = row
+
+                # Cells outside the band are at least max_distance + 1
+                row = [too_far] * (n + 1)
+                best = row[0] = depth if depth <= max_distance else too_far
+                for j in range(max(1, depth - max_distance),
+                               min(n, depth + max_distance) + 1):
+                    value = previous[j - 1] + (term[j - 1] != char)
+                    other = previous[j] + 1
+                    if other < value:
+                        value = other
+                    other = row[j - 1] + 1
+                    if other < value:
+                        value = other
+                    row[j] = value
+                    if value < best:
+                        best = value
+
+                if best > max_distance:
+                    break   # no completion of this string can match
+            else:
+                if entries[node] is not None and row[n] <= max_distance:
+                    matches.append((row[n],) + entries[node])
+                for child in child_ids[node]:
+                    stack.append((child, row, depth))
+
+        matches.sort()
+        return matches
@@ -0,0 +1,152 @@
+"""
+Change detection for the data/ folder.
+
+A manifest records, for every indexed page, its modification time,
+size and a content digest:
+
+    manifest: filename -> (mtime_ns, size, digest)
+
+scan_folder() compares the folder against a previous manifest and
+reports which pages were added, modified or deleted, so only those need
+to be parsed and tokenized again. The digest is only recomputed when
+the modification time or size changed; a page that was merely touched
+(same digest) is not reported as modified.
+
+A full build records new pages without reading them
+(scan_folder(..., hash_new=False), digest None), since they are read
+for parsing anyway. Their digests are computed by the next scan that
+finds them unchanged; a page whose mtime or size changed before it was
+ever hashed is reported as modified.
+
+DirectoryWatcher polls a SearchEngine's data folder in a background
+thread and applies the changes to the live engine.
+"""
+
+import hashlib
+import os
+import threading
+from typing import NamedTuple
+
+
+class FolderChanges(NamedTuple):
+    """Result of comparing a folder against a manifest."""
+    manifest: dict
+    added: list
+    modified: list
+    deleted: list
+
+
+def file_digest(filepath: str) -> str:
+    """Return the hex BLAKE2b digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_folder(folder: str, filenames: list, manifest: dict,
+                hash_new: bool = True) -> FolderChanges:
+    """
+    Compare the current pages of a folder against a manifest.
+
+    Parameters:-
+    folder : str
+        Folder containing the pages.
+    filenames : list
+        Page file names currently in the folder.
+    manifest : dict
+        filename -> (mtime_ns, size, digest) from the previous scan
+        (digest None if not hashed yet).
+    hash_new : bool
+        False records added pages with digest None instead of
+        reading them.
+
+    Returns:-
+    FolderChanges
+        The new manifest plus the added, modified and deleted names.
+    """
+    new_manifest = {}
+    added, modified = [], []
+
+    for filename in filenames:
+        filepath = os.path.join(folder, filename)
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            continue   # removed between listing and stat
+
+        previous = manifest.get(filename)
+        unchanged = (previous is not None
+                     and previous[0] == st.st_mtime_ns
+                     and previous[1] == st.st_size)
+        if unchanged and previous[2] is not None:
+            new_manifest[filename] = previous
+            continue
+
+        if previous is None and not hash_new:
+            digest = None
+        else:
+            try:
+                digest = file_digest(filepath)
+            except OSError:
+                continue
+
+        new_manifest[filename] = (st.st_mtime_ns, st.st_size, digest)
+        if previous is None:
+            added.append(filename)
+        elif not unchanged and (previous[2] is None or previous[2] != digest):
+            # Never hashed -> cannot tell a touch from an edit
+            modified.append(filename)
+
+    deleted = [name for name in manifest if name not in new_manifest]
+    return FolderChanges(new_manifest, added, modified, deleted)
+
+
+class DirectoryWatcher:
+    """
+    Polls a SearchEngine's data folder and applies changes in the
+    background by calling engine.refresh() every `interval` seconds.
+
+    Attributes:-
+    last_changes : FolderChanges or None
+        Result of the most recent refresh.
+    last_error : Exception or None
+        Error raised by the most recent refresh, if any.
+    """
+
+    def __init__(self, engine, interval: float = 1.0):
+        self.engine = engine
+        self.interval = interval
+        self.last_changes = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "DirectoryWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="directory-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_changes = self.engine.refresh()
+                self.last_error = None
+            except Exception as exc:   # keep polling after a bad scan
+                self.last_error = exc
+
+    def __enter__(self) -> "DirectoryWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,115 @@
+"""
+Tests for the benchmark package.
+
+Covers:
+- synthetic corpora are deterministic and reused when the spec matches
+- the vocabulary has no stop words and word frequencies are skewed
+- measure() reports every metric on a small corpus
+- run_size() reports a size whose measuring process died instead of
+  waiting for it forever
+- compare() flags regressions in both metric directions
+"""
+
+import os
+import tempfile
+from collections import Counter
+
+from benchmarks.corpus import (CorpusSpec, generate_corpus, make_queries,
+                               make_vocabulary)
+from benchmarks.suite import compare, measure, percentiles, run_size
+from tokenizer import STOP_WORDS, tokenize
+
+
+def read_all(folder):
+    # Helper: file name -> content for every generated page
+    pages = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), encoding="utf-8") as f:
+            pages[name] = f.read()
+    return pages
+
+
+def test_corpus_is_deterministic_and_reused():
+    spec = CorpusSpec(docs=20, words_per_doc=50, vocab_size=500, seed=3)
+    with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+        vocab = generate_corpus(a, spec)
+        assert generate_corpus(b, spec) == vocab
+        assert read_all(a) == read_all(b)
+        assert len([name for name in os.listdir(a) if name.endswith(".html")]) == 20
+
+        # Same spec -> pages are not rewritten
+        page = os.path.join(a, "doc0000000.html")
+        os.utime(page, ns=(1, 1))
+        generate_corpus(a, spec)
+        assert os.stat(page).st_mtime_ns == 1
+
+        # Different seed -> different pages
+        generate_corpus(b, spec._replace(seed=4))
+        assert read_all(a) != read_all(b)
+
+
+def test_vocabulary_and_zipf_skew():
+    vocab = make_vocabulary(2000)
+    assert len(set(vocab)) == 2000
+    assert not STOP_WORDS & set(vocab)
+
+    counts = Counter(word for query in make_queries(vocab, 3000, max_terms=1)
+                     for word in tokenize(query))
+    # Rank 1 is drawn far more often than rank 100
+    assert counts[vocab[0]] > 10 * max(1, counts[vocab[99]])
+
+
+def test_measure_reports_all_metrics():
+    spec = CorpusSpec(docs=30, words_per_doc=40, vocab_size=300)
+    options = {"extractor": "fast", "workers": None, "parse_pages": 5,
+               "queries": 20}
+    with tempfile.TemporaryDirectory() as folder:
+        vocab = generate_corpus(folder, spec)
+        result = measure(folder, vocab, options)
+
+    assert result["docs"] == 30
+    assert result["terms"] > 0
+    assert result["build_s"] > 0
+    for section in ("parse", "search", "search_top10", "prefix"):
+        stats = result[section]
+        assert stats["p50_ms"] <= stats["p90_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+
+def test_failed_measurement_is_reported():
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        # An unknown extractor makes the measuring process raise and exit
+        options = {"words": 20, "vocab": 100, "zipf": 1.0, "seed": 0,
+                   "extractor": "missing", "workers": None, "parse_pages": 1,
+                   "queries": 1, "corpus_dir": corpus_dir}
+        result = run_size(5, options)
+
+    assert result["error"] == "measuring process exited with code 1"
+    assert result["corpus"]["docs"] == 5
+    assert compare({"sizes": {"5": result}}, {"sizes": {"5": result}}) == []
+
+
+def test_percentiles():
+    stats = percentiles([i / 1000 for i in range(1, 101)])
+    assert stats == {"p50_ms": 51.0, "p90_ms": 91.0, "p99_ms": 100.0,
+                     "max_ms": 100.0}
+    assert percentiles([]) == {}
+
+
+def test_compare_flags_regressions():
+    base = {"sizes": {"1000": {
+        "docs": 1000, "build_s": 2.0, "docs_per_s": 500.0,
+        "search": {"p99_ms": 10.0, "max_ms": 10.0}, "peak_rss_mb": 100.0,
+    }}}
+    new = {"sizes": {"1000": {
+        "docs": 1000, "build_s": 2.1, "docs_per_s": 400.0,
+        "search": {"p99_ms": 15.0, "max_ms": 90.0}, "peak_rss_mb": 90.0,
+    }, "5000": {"build_s": 9.0}}}
+
+    rows = {metric: regressed
+            for _, metric, _, _, _, regressed in compare(base, new, 0.10)}
+    assert rows == {
+        "build_s": False,        # +5%, under the threshold
+        "docs_per_s": True,      # throughput dropped 20%
+        "search.p99_ms": True,   # latency up 50%
+        "peak_rss_mb": False,    # memory went down
+    }
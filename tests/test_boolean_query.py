@@ -0,0 +1,153 @@
+"""
+Tests for the boolean query language and the query planner.
+
+Covers:
+- parsing of AND / OR / NOT, +/- prefixes, parentheses and precedence
+- plain conjunctions keep the flat (fast path) form
+- OR, NOT and grouped queries return the right documents
+- boolean results match a brute-force evaluation on a random corpus
+- planner orders AND inputs rarest first and exclusions last
+- explain() shows corrections, estimates and costs
+- only non-excluded terms contribute to the score
+"""
+
+import random
+
+from query import And, Not, Or, Phrase, Term, parse, parse_query
+from query_planner import plan_query
+from search_engine import SearchEngine
+
+
+def make_engine(pages, positional=False):
+    # Helper: in-memory engine over doc_id -> text
+    engine = SearchEngine("unused", positional=positional)
+    for doc_id, text in pages.items():
+        engine.add_document(doc_id, text)
+    return engine
+
+
+def docs(results):
+    return sorted(doc for doc, _, _ in results)
+
+
+PAGES = {
+    "a": "python coffee machine learning",
+    "b": "java tea",
+    "c": "python tea",
+    "d": "rust",
+}
+
+
+def test_parse_operators_and_precedence():
+    assert parse("x y OR z") == Or((And((Term("x"), Term("y"))), Term("z")))
+    assert parse("(python OR java) -coffee") == And((
+        Or((Term("python"), Term("java"))), Not(Term("coffee")),
+    ))
+    assert parse("x AND NOT y") == And((Term("x"), Not(Term("y"))))
+    assert parse('+x -"new york"') == And((Term("x"), Not(Phrase(("new", "york")))))
+    # Hyphens inside a word are not exclusions; lower-case "or" is a stop word
+    assert parse("e-mail or x") == And((Term("email"), Term("x")))
+    # Unbalanced parentheses and dangling operators are tolerated
+    assert parse("((x OR y)") == Or((Term("x"), Term("y")))
+    assert parse("x OR") == Term("x")
+    assert parse("the OR") is None
+
+
+def test_plain_conjunction_stays_flat():
+    parsed = parse_query("+machine learning")
+    assert parsed.terms == ("machine", "learning") and not parsed.boolean
+    assert parse_query("machine -learning").boolean
+
+
+def test_or_not_and_groups():
+    engine = make_engine(PAGES)
+    assert docs(engine.search("python OR java")) == ["a", "b", "c"]
+    assert docs(engine.search("(python OR java) -coffee")) == ["b", "c"]
+    assert docs(engine.search("tea NOT java")) == ["c"]
+    assert docs(engine.search("NOT python")) == ["b", "d"]
+    assert docs(engine.search("tea -(java OR rust)")) == ["c"]
+    assert docs(engine.search("rust OR python tea")) == ["c", "d"]
+    # Unknown words in an OR branch only empty that branch
+    assert docs(engine.search("zzzz OR rust", max_edits=0)) == ["d"]
+
+
+def test_phrase_inside_boolean_query():
+    engine = make_engine(PAGES, positional=True)
+    assert docs(engine.search('"machine learning" OR rust')) == ["a", "d"]
+    assert docs(engine.search('python -"learning machine"')) == ["a", "c"]
+
+
+def evaluate(node, doc_terms):
+    # Brute-force reference evaluation of a query tree for one document
+    if isinstance(node, Term):
+        return node.term in doc_terms
+    if isinstance(node, And):
+        return all(evaluate(child, doc_terms) for child in node.children)
+    if isinstance(node, Or):
+        return any(evaluate(child, doc_terms) for child in node.children)
+    return not evaluate(node.child, doc_terms)
+
+
+def test_boolean_results_match_brute_force():
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(12)]
+    pages = {
+        f"d{i:03d}": " ".join(rng.choices(vocab, k=rng.randint(1, 8)))
+        for i in range(150)
+    }
+    engine = make_engine(pages)
+    doc_terms = {doc: set(text.split()) for doc, text in pages.items()}
+
+    def random_query(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice(vocab)
+        op = rng.choice([" OR ", " ", " AND "])
+        parts = [random_query(depth - 1) for _ in range(rng.randint(2, 3))]
+        if rng.random() < 0.4:
+            parts[-1] = "-" + parts[-1]
+        return "(" + op.join(parts) + ")"
+
+    for _ in range(200):
+        query = random_query(3)
+        tree = parse(query)
+        expected = sorted(doc for doc in pages if evaluate(tree, doc_terms[doc]))
+        assert docs(engine.search(query, max_edits=0)) == expected, query
+
+
+def test_planner_orders_rarest_first_and_exclusions_last():
+    pages = {f"d{i}": "common" + (" rare" if i < 2 else "") for i in range(20)}
+    pages["d0"] += " banned"
+    pages["d5"] += " banned"
+    engine = make_engine(pages)
+
+    plan = plan_query(parse("-banned common rare"), engine.index)
+    assert plan.op == "AND"
+    assert [(step.op, step.label) for step in plan.children] == [
+        ("TERM", "rare"), ("TERM", "common"), ("NOT", ""),
+    ]
+    assert plan.estimate == 2
+    assert docs(engine.search("-banned common rare")) == ["d1"]
+
+
+def test_explain_shows_corrections_and_costs():
+    engine = make_engine(PAGES)
+    plan = engine.explain("pythn OR zzzz", max_edits=1)
+
+    assert plan.op == "OR"
+    labels = [child.label for child in plan.children]
+    assert labels == ["zzzz (no match)", "pythn -> python"]
+    assert plan.estimate == 2
+    assert plan.cost >= sum(child.cost for child in plan.children)
+
+    text = str(plan)
+    assert text.splitlines()[0].startswith("OR")
+    assert "pythn -> python  est=2" in text
+    assert plan.to_dict()["children"][1]["estimate"] == 2
+    assert engine.explain("the") is None
+
+
+def test_excluded_terms_do_not_score():
+    engine = make_engine({"a": "tea tea java", "b": "tea"})
+    assert engine.search("tea OR java") == [("a", "a", 3), ("b", "b", 1)]
+    assert engine.search("tea -java") == [("b", "b", 1)]
+    assert engine.search("tea OR java", top_k=1) == [("a", "a", 3)]
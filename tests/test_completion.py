@@ -0,0 +1,105 @@
+"""
+Tests for ranked, bounded prefix completion.
+
+Covers:
+- search_prefix(prefix, limit) ranks by weight, then term
+- cached completions equal a brute-force ranking after random edits
+- limits larger than the cache fall back to a full ranking
+- the inverted index keeps Trie weights equal to document frequency
+- SearchEngine.prefix_search(prefix, limit)
+"""
+
+import tempfile
+import os
+import random
+from inverted_index import InvertedIndex
+from search_engine import SearchEngine
+from trie import Trie
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def ranked(weights, prefix, limit):
+    # Brute-force reference ranking
+    matches = [term for term in weights if term.startswith(prefix)]
+    matches.sort(key=lambda term: (-weights[term], term))
+    return matches[:limit]
+
+
+def test_limit_ranks_by_weight_then_term():
+    trie = Trie.from_sorted(["data", "database", "date", "datum"], [5, 9, 1, 5])
+
+    assert trie.search_prefix("dat", limit=3) == ["database", "data", "datum"]
+    assert trie.search_prefix("data", limit=1) == ["database"]
+    assert trie.search_prefix("dat") == ["data", "database", "date", "datum"]
+    assert trie.search_prefix("x", limit=3) == []
+    assert trie.search_prefix("dat", limit=0) == []
+
+
+def test_cached_completions_follow_edits():
+    rng = random.Random(4)
+    weights = {}
+    trie = Trie(cache_size=4)
+
+    for step in range(600):
+        term = "".join(rng.choices("abc", k=rng.randint(1, 5)))
+        action = rng.random()
+        if action < 0.5:
+            weights[term] = rng.randint(0, 20)
+            trie.insert(term, weights[term])
+        elif action < 0.7 and term in weights:
+            weights[term] = rng.randint(0, 20)
+            assert trie.set_weight(term, weights[term])
+        elif action < 0.9:
+            assert trie.delete(term) == (weights.pop(term, None) is not None)
+
+        prefix = "".join(rng.choices("abc", k=rng.randint(0, 2)))
+        for limit in (1, 4, 7):
+            assert trie.search_prefix(prefix, limit) == ranked(weights, prefix, limit)
+
+
+def test_bulk_built_caches_match_brute_force():
+    rng = random.Random(8)
+    terms = sorted({"".join(rng.choices("abcd", k=rng.randint(1, 6)))
+                    for _ in range(400)})
+    weights = {term: rng.randint(1, 50) for term in terms}
+    trie = Trie.from_sorted(terms, [weights[term] for term in terms])
+
+    for prefix in ["", "a", "ab", "bcd", "dd"]:
+        assert trie.search_prefix(prefix, 10) == ranked(weights, prefix, 10)
+        assert trie.search_prefix(prefix, 25) == ranked(weights, prefix, 25)
+
+
+def test_index_keeps_document_frequency_weights():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["run", "runner"])
+    index.add_document("b.txt", ["runner", "running"])
+    index.add_document("c.txt", ["runner", "running"])
+    assert index.trie.search_prefix("run", limit=2) == ["runner", "running"]
+
+    index.delete_document("b.txt")
+    index.delete_document("c.txt")
+    index.add_document("d.txt", ["run"])
+    assert index.trie.search_prefix("run", limit=3) == ["run", "runner"]
+
+    restored = InvertedIndex.from_state(index.to_state())
+    assert restored.trie.search_prefix("run", limit=1) == ["run"]
+
+
+def test_engine_prefix_search_limit():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>neural network</p>")
+        write(tmp, "b.txt", "<p>neural networks</p>")
+        write(tmp, "c.txt", "<p>neural network nets</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        assert engine.prefix_search("ne", limit=2) == ["neural", "network"]
+        assert engine.prefix_search("net") == ["nets", "network", "networks"]
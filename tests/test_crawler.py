@@ -0,0 +1,197 @@
+"""
+Tests for the link-following crawler.
+
+Covers:
+- URL normalization used for deduplication
+- crawling a local http.server: links followed once, fragments
+  deduplicated, other hosts not followed, 404s recorded, link graph
+- crawled pages are searchable
+- per-host concurrency limit and request spacing
+- max_pages and max_depth bounds
+- file seeds index the same documents as build_index
+- pages that break the parser or the index are recorded as errors
+  without stopping the crawl
+"""
+
+import functools
+import os
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from crawler import crawl, normalize_url, seed_url
+from parser import extract_links
+from search_engine import SearchEngine
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    # Serves the temporary directory without logging every request
+    def log_message(self, format, *args):
+        pass
+
+
+class SlowHandler(QuietHandler):
+    # Records request start times and the most requests in flight
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    starts = []
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.starts.append(time.monotonic())
+        try:
+            time.sleep(0.05)
+            super().do_GET()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+def serve(tmpdir, handler=QuietHandler):
+    # Helper: start an http.server for tmpdir, returns (server, base URL)
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(handler, directory=tmpdir)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/"
+
+
+def page(title, body, *links):
+    return (f"<html><head><title>{title}</title></head><body><p>{body}</p>"
+            + "".join(f'<a href="{link}">link</a>' for link in links)
+            + "</body></html>")
+
+
+def test_normalize_url_and_extract_links():
+    assert normalize_url("HTTP://Example.COM:80#top") == "http://example.com/"
+    assert normalize_url("https://a.org:443/x?q=1#f") == "https://a.org/x?q=1"
+    assert normalize_url("http://a.org:8080/x") == "http://a.org:8080/x"
+    html = '<a href=" b.html ">B</a><a name="x"></a><a href="">e</a><a href="/c"/>'
+    assert extract_links(html) == ["b.html", "/c"]
+
+
+def test_crawl_local_http_server():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write(tmpdir, "a.html", page("Alpha", "shared alpha", "b.html", "a.html#top",
+                                     "http://other.invalid/x"))
+        write(tmpdir, "b.html", page("Beta", "shared beta", "c.html", "/missing.html"))
+        write(tmpdir, "c.html", page("Gamma", "shared gamma", "a.html"))
+        server, base = serve(tmpdir)
+        try:
+            engine = SearchEngine(tmpdir)
+            crawler = engine.crawl([base + "a.html"], concurrency=4)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert sorted(crawler.pages) == [base + name for name in ("a.html", "b.html", "c.html")]
+        assert list(crawler.errors) == [base + "missing.html"]
+        assert crawler.errors[base + "missing.html"] == "HTTP 404"
+
+        # Fragment links collapse into the page; other hosts are recorded only
+        graph = engine.link_graph
+        assert graph.outgoing(base + "a.html") == [base + "b.html", base + "a.html",
+                                                   "http://other.invalid/x"]
+        assert graph.incoming(base + "a.html") == [base + "a.html", base + "c.html"]
+        assert "http://other.invalid/x" not in graph
+
+        results = engine.search("shared")
+        assert sorted(title for _, title, _ in results) == ["Alpha", "Beta", "Gamma"]
+        assert engine.search("gamma")[0][0] == base + "c.html"
+
+
+def test_per_host_limit_and_delay():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        links = [f"p{i}.html" for i in range(6)]
+        write(tmpdir, "index.html", page("Index", "start", *links))
+        for name in links:
+            write(tmpdir, name, page(name, "leaf"))
+        SlowHandler.peak, SlowHandler.starts = 0, []
+        server, base = serve(tmpdir, SlowHandler)
+        try:
+            crawl(SearchEngine(tmpdir), [base], concurrency=8, per_host=1)
+            assert SlowHandler.peak == 1
+
+            SlowHandler.peak, SlowHandler.starts = 0, []
+            crawl(SearchEngine(tmpdir), [base], concurrency=8, per_host=3)
+            assert 1 < SlowHandler.peak <= 3
+
+            SlowHandler.starts = []
+            crawl(SearchEngine(tmpdir), [base], concurrency=8, per_host=4,
+                  delay=0.03)
+            gaps = [b - a for a, b in zip(SlowHandler.starts, SlowHandler.starts[1:])]
+            assert len(gaps) == 6 and min(gaps) >= 0.025
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_max_pages_and_max_depth():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # A chain: d0 -> d1 -> ... -> d5
+        for i in range(6):
+            write(tmpdir, f"d{i}.html", page(f"D{i}", "chain", f"d{i + 1}.html"))
+        seed = os.path.join(tmpdir, "d0.html")
+
+        shallow = crawl(SearchEngine(tmpdir), [seed], max_depth=2)
+        assert list(shallow.pages.values()) == ["d0.html", "d1.html", "d2.html"]
+
+        limited = crawl(SearchEngine(tmpdir), [seed], max_pages=4)
+        assert len(limited.pages) == 4
+        # d5 links to a missing file
+        full = crawl(SearchEngine(tmpdir), [seed])
+        assert len(full.pages) == 6 and len(full.errors) == 1
+
+
+def test_file_seed_matches_build_index():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write(tmpdir, "a.html", page("Alpha", "machine learning", "b.txt"))
+        write(tmpdir, "b.txt", page("Beta", "machine vision", "a.html#top"))
+        write(tmpdir, "c.html", page("Gamma", "machine unlinked"))
+
+        built = SearchEngine(tmpdir)
+        built.build_index()
+        crawled = SearchEngine(tmpdir)
+        crawled.crawl([os.path.join(tmpdir, "a.html"),
+                       os.path.join(tmpdir, "c.html")])
+
+        assert sorted(crawled.titles.items()) == sorted(built.titles.items())
+        assert crawled.search("machine") == built.search("machine")
+        assert crawled.index.doc_lengths == built.index.doc_lengths
+
+
+def test_broken_pages_are_recorded(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # html.parser raises AssertionError on this declaration
+        write(tmpdir, "a.html", page("Alpha", "good", "b.html", "c.html"))
+        write(tmpdir, "b.html", page("Beta", "<![bogus[ x ]]>"))
+        write(tmpdir, "c.html", page("Gamma", "good"))
+
+        engine = SearchEngine(tmpdir, extractor="fast")
+        crawler = engine.crawl([os.path.join(tmpdir, "a.html")], concurrency=1)
+        b_url = seed_url(os.path.join(tmpdir, "b.html"))
+        assert list(crawler.errors) == [b_url]
+        assert crawler.errors[b_url].startswith("AssertionError")
+        assert sorted(crawler.pages.values()) == ["a.html", "c.html"]
+
+        # A failing batch is recorded for each of its pages
+        def broken(self, doc_id, text, title=None):
+            raise RuntimeError("index full")
+        monkeypatch.setattr(SearchEngine, "add_document", broken)
+        engine = SearchEngine(tmpdir)
+        crawler = engine.crawl([os.path.join(tmpdir, "c.html")])
+        assert crawler.pages == {}
+        assert list(crawler.errors.values()) == ["RuntimeError: index full"]
@@ -0,0 +1,105 @@
+"""
+Tests for typo-tolerant term lookup.
+
+Covers:
+- Trie.fuzzy_search against a brute-force edit distance
+- ranking by distance, then weight, then term
+- a negative distance matches nothing, with or without a limit
+- misspelled query words are corrected in SearchEngine.search
+- max_edits per query (0 disables fuzzy matching)
+- prefix fallback prefers the most frequent completion
+"""
+
+import tempfile
+import os
+import random
+from search_engine import SearchEngine, default_max_edits
+from trie import Trie
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def edit_distance(a, b):
+    # Reference Levenshtein distance (full dynamic programming table)
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def test_fuzzy_search_matches_brute_force():
+    rng = random.Random(6)
+    terms = sorted({"".join(rng.choices("abcd", k=rng.randint(1, 8)))
+                    for _ in range(300)})
+    weights = {term: rng.randint(1, 9) for term in terms}
+    trie = Trie.from_sorted(terms, [weights[term] for term in terms])
+
+    for _ in range(40):
+        word = "".join(rng.choices("abcd", k=rng.randint(1, 8)))
+        for distance in (0, 1, 2):
+            expected = sorted(
+                (edit_distance(word, term), -weights[term], term)
+                for term in terms if edit_distance(word, term) <= distance
+            )
+            assert trie.fuzzy_search(word, distance) == [
+                (term, d) for d, _, term in expected
+            ]
+
+
+def test_fuzzy_ranking_and_limit():
+    trie = Trie.from_sorted(["machine", "machines", "marine"], [3, 8, 50])
+
+    # Closer matches first; equal distance -> higher weight first
+    assert trie.fuzzy_search("machne", 2) == [
+        ("machine", 1), ("marine", 2), ("machines", 2)
+    ]
+    assert trie.fuzzy_search("machne", 1) == [("machine", 1)]
+    assert trie.fuzzy_search("machinse", 2, limit=1) == [("machine", 1)]
+
+
+def test_negative_distance_matches_nothing():
+    trie = Trie.from_sorted(["machine", "marine"], [3, 50])
+    assert trie.fuzzy_search("machine", -1) == []
+    assert trie.fuzzy_search("machine", -1, limit=3) == []
+
+
+def test_default_max_edits_by_length():
+    assert default_max_edits("ai") == 0
+    assert default_max_edits("data") == 1
+    assert default_max_edits("machne") == 2
+
+
+def test_engine_corrects_misspelled_words():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+        write(tmp, "b.txt", "<p>deep learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        assert [doc for doc, _, _ in engine.search("machne lerning")] == ["a.txt"]
+        assert engine.search("machne", max_edits=0) == []
+        assert engine.search("mchne", max_edits=1) == []
+        assert engine.search("mchne", max_edits=2)[0][0] == "a.txt"
+
+
+def test_prefix_fallback_prefers_frequent_completion():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>learnable</p>")
+        write(tmp, "b.txt", "<p>learning</p>")
+        write(tmp, "c.txt", "<p>learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        assert sorted(doc for doc, _, _ in engine.search("learn")) == ["b.txt", "c.txt"]
@@ -0,0 +1,149 @@
+"""
+Tests for immutable index generations.
+
+Covers:
+- InvertedIndex.copy() shares posting arrays but copies them on write,
+  in both directions
+- a search pinned to a generation is unaffected by later updates
+- batch() publishes all of its changes at once, or none if it raises
+- searches running in other threads during updates never fail and
+  never see a half-applied batch
+- refresh() publishes a folder's changes as one generation
+"""
+
+import os
+import tempfile
+import threading
+
+import pytest
+
+from inverted_index import InvertedIndex
+from search_engine import SearchEngine
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_copy_on_write_keeps_indexes_apart():
+    index = InvertedIndex(positional=True)
+    index.add_document("a", ["data", "science"])
+    index.add_document("b", ["data"])
+
+    clone = index.copy()
+    clone.add_document("c", ["data", "mining"])
+    clone.delete_document("a")
+    assert index.index["data"] == {"a": 1, "b": 1}
+    assert clone.index["data"] == {"b": 1, "c": 1}
+    assert "mining" not in index.index and "science" not in clone.index
+    assert index.trie.search_exact("science")
+    assert not clone.trie.search_exact("science")
+    assert index.term_positions("science", "a") == [1]
+
+    # The original also copies before writing
+    index.delete_document("b")
+    assert clone.index["data"] == {"b": 1, "c": 1}
+    assert index.index["data"] == {"a": 1}
+
+
+def test_pinned_generation_is_unchanged_by_updates():
+    engine = SearchEngine("unused")
+    engine.add_document("a.txt", "machine learning", title="A")
+    pinned = engine.index
+
+    engine.add_document("b.txt", "machine vision")
+    engine.delete_document("a.txt")
+    assert engine.index is not pinned
+    assert engine.index.generation > pinned.generation
+    assert pinned.search(["machine"]) == {"a.txt": 1}
+    assert pinned.docs.titles == ["A"]
+    assert [doc for doc, _, _ in engine.search("machine")] == ["b.txt"]
+
+
+def test_batch_publishes_all_or_nothing():
+    engine = SearchEngine("unused")
+    engine.add_document("a.txt", "shared")
+
+    with engine.batch() as index:
+        engine.add_document("b.txt", "shared")
+        engine.delete_document("a.txt")
+        assert index.has_document("b.txt")
+        # Not published yet
+        assert [doc for doc, _, _ in engine.search("shared")] == ["a.txt"]
+    assert [doc for doc, _, _ in engine.search("shared")] == ["b.txt"]
+
+    generation = engine.index.generation
+    with pytest.raises(RuntimeError):
+        with engine.batch():
+            engine.add_document("c.txt", "shared")
+            raise RuntimeError("ingest failed")
+    assert engine.index.generation == generation
+    assert [doc for doc, _, _ in engine.search("shared")] == ["b.txt"]
+
+
+def test_concurrent_searches_see_whole_batches():
+    engine = SearchEngine("unused", positional=True)
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        # Every batch adds three documents
+        while not done.is_set():
+            try:
+                for top_k in (None, 2):
+                    results = engine.search("shared term", top_k=top_k)
+                    if top_k is None and len(results) % 3:
+                        errors.append(f"torn batch: {len(results)} results")
+                engine.search('"shared term"')
+                engine.prefix_search("sh", limit=3)
+            except Exception as error:   # noqa: BLE001 - reported below
+                errors.append(repr(error))
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(40):
+            with engine.batch():
+                for j in range(3):
+                    engine.add_document(f"d{i}-{j}", f"shared term word{i} extra{j}")
+            if i % 4 == 3:
+                with engine.batch():
+                    for j in range(3):
+                        engine.delete_document(f"d{i - 1}-{j}")
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert len(engine.search("shared term")) == 3 * (40 - 10)
+
+
+def test_refresh_publishes_one_generation(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write(tmpdir, "a.html", "<p>alpha</p>")
+        engine = SearchEngine(tmpdir)
+        engine.build_index()
+        pinned = engine.index
+
+        published = []
+        publish = engine._publish
+        monkeypatch.setattr(engine, "_publish",
+                            lambda index: published.append(index) or publish(index))
+
+        write(tmpdir, "b.html", "<p>beta</p>")
+        write(tmpdir, "c.html", "<p>gamma</p>")
+        os.remove(os.path.join(tmpdir, "a.html"))
+        engine.refresh()
+        assert published == [engine.index]
+        assert sorted(engine.titles) == ["b.html", "c.html"]
+        assert list(pinned.doc_lengths) == ["a.html"]
+
+        # Nothing changed -> nothing published
+        engine.refresh()
+        assert len(published) == 1
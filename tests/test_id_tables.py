@@ -0,0 +1,204 @@
+"""
+Tests for integer doc ids and term ids.
+
+Covers:
+- DocumentTable / TermDictionary hand out ids in order and never reuse
+  them
+- postings are ascending array('I') doc ids with aligned frequencies,
+  also after deletes and replacements
+- results, titles and name-keyed views still use document names
+- ties are broken by name even when doc ids follow another order
+- snapshots and segments keep the document table and titles
+- freed ids are compacted away: repeated updates do not grow the
+  tables, results survive renumbering and pinned generations are
+  untouched
+"""
+
+import os
+import tempfile
+from array import array
+
+from id_tables import DocumentTable, TermDictionary, TitlesView
+from inverted_index import COMPACT_MIN_FREE, InvertedIndex
+from search_engine import SearchEngine
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_document_table_ids_are_not_reused():
+    table = DocumentTable()
+    assert table.add("a", 3) == 0
+    assert table.add("b", 5, "Bee") == 1
+    assert table.remove("a") == 0
+    assert table.remove("a") is None
+    assert table.add("a", 2) == 2
+
+    assert len(table) == 2 and "a" in table
+    assert table.live_ids() == [1, 2]
+    assert table.names == [None, "b", "a"]
+    assert dict(TitlesView(table)) == {"b": "Bee", "a": "a"}
+
+    restored = DocumentTable.from_state(table.to_state())
+    assert restored.ids == table.ids
+    assert restored.lengths == array("I", [0, 5, 2])
+
+
+def test_term_dictionary_round_trip():
+    terms = TermDictionary()
+    assert [terms.add(term) for term in ("x", "y", "z")] == [0, 1, 2]
+    assert terms.remove("y") == 1
+    assert terms.get("y") is None and "y" not in terms
+
+    restored = TermDictionary.from_terms(terms.terms)
+    assert list(restored) == ["x", "z"]
+    assert restored.get("z") == 2
+
+
+def test_postings_are_sorted_id_arrays():
+    index = InvertedIndex()
+    index.add_document("c.txt", ["data", "data"])
+    index.add_document("a.txt", ["data", "science"])
+    index.add_document("b.txt", ["data"])
+
+    # Replacing c.txt gives it a new, larger doc id
+    index.add_document("c.txt", ["data", "science", "science"])
+    docs, freqs = index.postings("data")
+    assert isinstance(docs, array) and docs.typecode == "I"
+    assert list(docs) == [1, 2, 3]
+    assert list(freqs) == [1, 1, 1]
+    assert index.postings("missing") is None
+
+    assert index.index["science"] == {"a.txt": 1, "c.txt": 2}
+    assert index.doc_lengths == {"a.txt": 2, "b.txt": 1, "c.txt": 3}
+
+
+def test_results_use_names_and_break_ties_by_name():
+    index = InvertedIndex()
+    # Doc ids in reverse name order
+    for name in ("d", "c", "b", "a"):
+        index.add_document(name, ["x", "y"])
+
+    assert list(index.search(["x"])) == ["a", "b", "c", "d"]
+    assert list(index.search(["x"], top_k=2)) == ["a", "b"]
+    assert list(index.score_documents([0, 2], ["x"])) == ["b", "d"]
+
+
+def test_deleting_last_document_frees_term():
+    index = InvertedIndex(positional=True)
+    index.add_document("a", ["x", "y"])
+    index.add_document("b", ["y"])
+
+    assert index.delete_document("a")
+    assert "x" not in index.index
+    assert index.terms.terms == [None, "y"]
+    assert index.doc_arrays[0] is None
+    assert index.term_positions("y", "b") == [0]
+
+    assert index.delete_document("b")
+    assert len(index.docs) == 0 and index.positions == {}
+
+
+def test_engine_titles_follow_the_index():
+    engine = SearchEngine("unused")
+    engine.add_document("a.txt", "machine learning", title="Alpha")
+    engine.add_document("b.txt", "machine")
+    assert engine.titles == {"a.txt": "Alpha", "b.txt": "b.txt"}
+
+    engine.add_document("a.txt", "machine")
+    assert engine.titles["a.txt"] == "a.txt"
+    engine.delete_document("b.txt")
+    assert engine.titles == {"a.txt": "a.txt"}
+    assert engine.search("machine") == [("a.txt", "a.txt", 1)]
+
+
+def test_snapshot_and_segment_keep_titles():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data = os.path.join(tmpdir, "data")
+        os.mkdir(data)
+        write(data, "b.html", "<html><title>Bee</title><body>shared</body></html>")
+        write(data, "a.html", "<html><title>Ay</title><body>shared word</body></html>")
+
+        snapshot = os.path.join(tmpdir, "index.snap")
+        built = SearchEngine(data, snapshot_path=snapshot)
+        built.build_index()
+        built.delete_document("b.html")
+        built.save_snapshot(snapshot)
+
+        loaded = SearchEngine(data)
+        assert loaded.load_snapshot(snapshot)
+        assert loaded.titles == {"a.html": "Ay"}
+        assert loaded.search("shared") == built.search("shared")
+        assert list(loaded.index.docs.ids) == list(built.index.docs.ids)
+
+        segment = os.path.join(tmpdir, "index.seg")
+        built.write_segment(segment)
+        served = SearchEngine(data)
+        served.open_segment(segment)
+        try:
+            assert served.titles == {"a.html": "Ay"}
+            assert served.search("shared word") == built.search("shared word")
+        finally:
+            served.index.close()
+
+
+def test_compaction_keeps_tables_bounded():
+    engine = SearchEngine("unused", positional=True)
+    engine.add_document("keep.txt", "stable words here", title="Keep")
+    for i in range(1000):
+        engine.update_document("hot.txt", f"hot version{i} text{i}")
+
+    index = engine.index
+    assert index.docs.free_slots() <= COMPACT_MIN_FREE + 2
+    assert index.terms.free_slots() <= COMPACT_MIN_FREE + 5
+    assert len(index.doc_arrays) == len(index.terms.terms)
+    assert engine.search("hot version999") == [("hot.txt", "hot.txt", 2)]
+    assert engine.search('"stable words"')[0][:2] == ("keep.txt", "Keep")
+    assert not index.has_term("version998")
+
+
+def test_compact_renumbers_and_keeps_results():
+    index = InvertedIndex(positional=True)
+    for i in range(10):
+        index.add_document(f"d{i}", ["shared", f"only{i}", "shared", "tail"])
+    for i in range(0, 10, 2):
+        index.delete_document(f"d{i}")
+    before = {term: dict(index.index[term]) for term in index.index}
+    pinned = index.copy()
+
+    index.compact()
+    assert index.docs.free_slots() == 0 and index.terms.free_slots() == 0
+    assert index.docs.names == ["d1", "d3", "d5", "d7", "d9"]
+    assert list(index.postings("shared")[0]) == [0, 1, 2, 3, 4]
+    assert {term: dict(index.index[term]) for term in index.index} == before
+    assert index.term_positions("tail", "d3") == [3]
+    assert list(index.search(["shared", "tail"])) == ["d1", "d3", "d5", "d7", "d9"]
+
+    # Still writable after renumbering; the copy is unaffected
+    index.delete_document("d3")
+    index.add_document("d1", ["tail"])
+    assert index.index["tail"] == {"d5": 1, "d7": 1, "d9": 1, "d1": 1}
+    assert pinned.index["shared"] == before["shared"]
+    assert pinned.term_positions("tail", "d3") == [3]
+
+
+def test_snapshot_is_written_compacted():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        snapshot = os.path.join(tmpdir, "index.snap")
+        engine = SearchEngine(tmpdir)
+        for i in range(5):
+            engine.add_document(f"d{i}.txt", f"word{i} common")
+        engine.delete_document("d2.txt")
+        engine.save_snapshot(snapshot)
+        assert engine.index.docs.free_slots() == 1   # below the threshold
+
+        loaded = SearchEngine(tmpdir)
+        assert loaded.load_snapshot(snapshot)
+        assert loaded.index.docs.free_slots() == 0
+        assert loaded.index.terms.free_slots() == 0
+        assert loaded.search("common") == engine.search("common")
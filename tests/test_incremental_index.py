@@ -0,0 +1,107 @@
+"""
+Tests for incremental indexing.
+
+Covers:
+- re-adding a document replaces it instead of doubling frequencies
+- update_document / delete_document on the InvertedIndex
+- Trie stays consistent with the index after deletes
+- SearchEngine add / update / delete keep titles in sync
+- snapshot-restored indexes can still be updated
+"""
+
+import tempfile
+import os
+from inverted_index import InvertedIndex
+from search_engine import SearchEngine
+from trie import Trie
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_adding_same_document_twice_does_not_double():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "data"])
+    index.add_document("a.txt", ["data", "data"])
+
+    assert index.index["data"] == {"a.txt": 2}
+
+
+def test_update_document_replaces_terms():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["machine", "learning"])
+    index.add_document("b.txt", ["learning"])
+
+    index.update_document("a.txt", ["deep", "learning", "learning"])
+
+    assert "machine" not in index.index
+    assert not index.trie.search_exact("machine")
+    assert index.index["learning"] == {"b.txt": 1, "a.txt": 2}
+    assert index.index["deep"] == {"a.txt": 1}
+
+
+def test_delete_document_removes_unused_terms():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "science"])
+    index.add_document("b.txt", ["data"])
+
+    assert index.delete_document("a.txt")
+    assert not index.delete_document("a.txt")
+
+    assert index.index == {"data": {"b.txt": 1}}
+    assert index.trie.search_prefix("") == ["data"]
+    assert not index.has_document("a.txt")
+    assert index.has_document("b.txt")
+
+
+def test_trie_delete_prunes_only_unused_nodes():
+    trie = Trie()
+    for term in ["run", "runner", "running"]:
+        trie.insert(term)
+
+    assert trie.delete("runner")
+    assert not trie.delete("runner")
+    assert not trie.delete("ru")
+
+    assert sorted(trie.search_prefix("run")) == ["run", "running"]
+    assert trie.search_exact("running")
+
+    trie.delete("run")
+    trie.delete("running")
+    assert trie.search_prefix("") == []
+
+
+def test_engine_add_update_delete():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "p1.txt", "<title>One</title><p>machine learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        engine.add_document("p2.txt", "deep learning models", title="Two")
+        assert [doc for doc, _, _ in engine.search("learning")] == ["p1.txt", "p2.txt"]
+        assert engine.search("models")[0][1] == "Two"
+
+        engine.update_document("p2.txt", "quantum computing")
+        assert engine.search("models") == []
+        assert engine.search("quantum")[0][:2] == ("p2.txt", "p2.txt")
+
+        assert engine.delete_document("p1.txt")
+        assert "p1.txt" not in engine.titles
+        assert engine.search("machine") == []
+        assert engine.prefix_search("mach") == []
+
+
+def test_snapshot_restored_index_supports_deletes():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "science"])
+    index.add_document("b.txt", ["data"])
+
+    restored = InvertedIndex.from_state(index.to_state())
+    assert restored.delete_document("b.txt")
+    assert restored.index == {"data": {"a.txt": 1}, "science": {"a.txt": 1}}
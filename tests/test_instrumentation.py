@@ -0,0 +1,154 @@
+"""
+Tests for stage timers, counters and query traces.
+
+Covers:
+- build_index records the parse, tokenize, index and Trie stages
+- stats() reports index size, cache counters, stage timers and counters
+- QueryTrace records corrections, posting lengths and candidate counts
+  for full, top-k, cached and boolean queries
+- with instrumentation off nothing is recorded, but traces still work
+"""
+
+import os
+import tempfile
+
+from instrumentation import DISABLED, Instrumentation, QueryTrace
+from search_engine import SearchEngine
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a file in the temporary data folder
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def make_engine(pages, **options):
+    # Helper: in-memory engine over doc_id -> text
+    engine = SearchEngine("unused", **options)
+    for doc_id, text in pages.items():
+        engine.add_document(doc_id, text)
+    return engine
+
+
+PAGES = {
+    "a": "machine learning systems",
+    "b": "machine tools and machine parts",
+    "c": "deep learning",
+    "d": "machine learning machine",
+}
+
+
+def test_build_records_stages():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write(tmpdir, "p1.html", "<html><title>One</title><body>alpha beta</body></html>")
+        write(tmpdir, "p2.html", "<html><title>Two</title><body>beta gamma</body></html>")
+        engine = SearchEngine(tmpdir, instrument=True)
+        engine.build_index()
+
+    stats = engine.stats()
+    stages = stats["stages"]
+    for stage in ("build.load_page", "build.tokenize", "index.add_document"):
+        assert stages[stage]["calls"] == 2
+    assert stages["build.total"]["calls"] == 1
+    assert stages["index.trie_build"]["calls"] == 1
+    assert stats["counters"]["build.documents"] == 2
+    assert stats["documents"] == 2 and stats["terms"] == 5   # titles too
+
+    # Incremental adds time the Trie updates
+    engine.add_document("p3", "delta beta")
+    assert engine.stats()["stages"]["index.trie"]["calls"] == 1
+    assert engine.prefix_search("b", limit=1) == ["beta"]
+
+
+def test_trace_full_and_top_k():
+    engine = make_engine(PAGES)
+
+    # Full ranking: every document with both terms is a candidate
+    trace = QueryTrace()
+    results = engine.search("machine learning", trace=trace)
+    assert trace.terms == ["machine", "learning"]
+    assert trace.postings == {"machine": 3, "learning": 3}
+    assert trace.candidates == trace.scored == 2
+    assert trace.results == len(results) == 2
+    assert set(trace.stages) == {"query.total", "query.parse",
+                                 "query.fallback", "query.search"}
+    assert not trace.cache_hit
+
+    # Top-k examines the rarest term's documents
+    trace = QueryTrace()
+    engine.search("machine learning", top_k=1, trace=trace)
+    assert trace.candidates == 3
+    assert 1 <= trace.scored <= 2
+    assert trace.results == 1
+
+
+def test_trace_corrections_and_cache_hit():
+    engine = make_engine(PAGES)
+    engine.search("machne")
+
+    trace = QueryTrace()
+    engine.search("machne", trace=trace)
+    assert trace.cache_hit
+    assert trace.results == 3
+
+    trace = QueryTrace()
+    engine.search("machne", max_edits=1, trace=trace)
+    assert trace.corrections == {"machne": "machine"}
+    assert "corrected machne -> machine" in str(trace)
+    assert trace.to_dict()["corrections"] == {"machne": "machine"}
+
+
+def test_trace_boolean_query():
+    engine = make_engine(PAGES)
+    trace = QueryTrace()
+    results = engine.search("learning -machine", trace=trace)
+    assert [doc for doc, _, _ in results] == ["c"]
+    assert trace.plan is not None
+    assert trace.terms == ["learning"]
+    assert trace.candidates == 1
+    assert "plan" in trace.to_dict()
+
+
+def test_engine_counters_accumulate():
+    engine = make_engine(PAGES, instrument=True)
+    engine.search("machine")
+    engine.search("machine")
+    engine.search("learning deep", top_k=5)
+
+    counters = engine.stats()["counters"]
+    assert counters["query.count"] == 3
+    assert counters["query.cache_hits"] == 1
+    # The cached repeat scans no postings
+    assert counters["query.postings"] == 3 + 3 + 1
+    assert engine.stats()["stages"]["query.total"]["calls"] == 3
+
+
+def test_disabled_records_nothing():
+    engine = make_engine(PAGES)
+    assert engine.instrumentation is DISABLED
+    engine.search("machine")
+
+    stats = engine.stats()
+    assert stats["stages"] == {} and stats["counters"] == {}
+    assert stats["cache"]["misses"] == 1
+
+    # The shared no-op timer is handed out when there is no trace
+    assert DISABLED.timer("x") is DISABLED.timer("y")
+
+
+def test_instrumentation_snapshot_and_reset():
+    instrumentation = Instrumentation()
+    with instrumentation.timer("stage"):
+        pass
+    instrumentation.add_time("stage", 0.002)
+    instrumentation.count("things", 5)
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["stages"]["stage"]["calls"] == 2
+    assert snapshot["stages"]["stage"]["max_ms"] >= 2.0
+    assert snapshot["counters"] == {"things": 5}
+
+    instrumentation.reset()
+    assert instrumentation.snapshot() == {"stages": {}, "counters": {}}
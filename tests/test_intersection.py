@@ -0,0 +1,76 @@
+"""
+Tests for conjunctive (AND) query evaluation.
+
+Covers:
+- intersect_sorted against a plain set intersection
+- documents missing any query term are not returned
+- scores only count matching documents, repeated tokens count twice
+- sorted-list cache is invalidated by add / delete
+- segment-backed indexes give the same results
+"""
+
+import tempfile
+import os
+import random
+from inverted_index import InvertedIndex, intersect_sorted
+from segment import write_segment
+
+
+def test_intersect_sorted_matches_set_intersection():
+    # Random lists of very different lengths exercise the galloping path
+    rng = random.Random(7)
+    for _ in range(200):
+        a = sorted(rng.sample(range(1000), rng.randint(0, 20)))
+        b = sorted(rng.sample(range(1000), rng.randint(0, 600)))
+        assert intersect_sorted(a, b) == sorted(set(a) & set(b))
+        assert intersect_sorted(b, a) == sorted(set(a) & set(b))
+
+
+def test_search_requires_every_term():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "science"])
+    index.add_document("b.txt", ["data", "data", "data"])
+    index.add_document("c.txt", ["science", "data"])
+
+    assert index.search(["data", "science"]) == {"a.txt": 2, "c.txt": 2}
+    assert index.search(["data"]) == {"b.txt": 3, "a.txt": 1, "c.txt": 1}
+    assert index.search(["data", "missing"]) == {}
+
+
+def test_repeated_query_token_counts_each_time():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "data", "science"])
+
+    assert index.search(["data", "data", "science"]) == {"a.txt": 5}
+
+
+def test_doc_list_cache_follows_updates():
+    index = InvertedIndex()
+    index.add_document("b.txt", ["data", "science"])
+    assert list(index.search(["data", "science"])) == ["b.txt"]
+
+    index.add_document("a.txt", ["data", "science"])
+    assert list(index.search(["data", "science"])) == ["a.txt", "b.txt"]
+    assert index.doc_freq("data") == 2
+
+    index.delete_document("b.txt")
+    assert list(index.search(["data", "science"])) == ["a.txt"]
+    assert index.doc_freq("data") == 1
+    assert index.doc_freq("missing") == 0
+
+
+def test_segment_index_intersection():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "science"])
+    index.add_document("b.txt", ["data"])
+    index.add_document("c.txt", ["science", "science", "data"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.seg")
+        write_segment(path, index.index, {})
+        segment = InvertedIndex.open_segment(path)
+        try:
+            assert segment.search(["science", "data"]) == index.search(["science", "data"])
+            assert segment.doc_freq("data") == 3
+        finally:
+            segment.close()
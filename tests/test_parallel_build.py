@@ -0,0 +1,56 @@
+"""
+Tests for the parallel (process pool) index build.
+
+Covers:
+- parallel build produces exactly the serial index
+- titles, Trie order and search results match
+- parse_pages worker output
+"""
+
+import tempfile
+import os
+from search_engine import SearchEngine, parse_pages
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def build_site(tmp):
+    words = ["machine", "learning", "data", "science", "deep", "neural",
+             "network", "model", "vision", "robot"]
+    for i in range(25):
+        body = " ".join(words[(i + j) % len(words)] for j in range(i % 7 + 3))
+        write(tmp, f"page{i:02d}.html", f"<title>Page {i}</title><p>{body}</p>")
+
+
+def test_parse_pages_returns_term_counts():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<title>A</title><p>data science data</p>")
+
+        # The title text is indexed too; "a" is a stop word
+        assert parse_pages(tmp, ["a.txt"]) == [
+            ("a.txt", "A", {"data": 2, "science": 1})
+        ]
+
+
+def test_parallel_build_matches_serial_build():
+    with tempfile.TemporaryDirectory() as tmp:
+        build_site(tmp)
+
+        serial = SearchEngine(tmp)
+        serial.build_index()
+
+        parallel = SearchEngine(tmp)
+        parallel.build_index(workers=2)
+
+        assert parallel.index.index == serial.index.index
+        assert list(parallel.index.index) == list(serial.index.index)
+        assert parallel.titles == serial.titles
+        assert parallel.manifest == serial.manifest
+        assert parallel.prefix_search("n") == serial.prefix_search("n")
+        assert parallel.search("machine learning") == serial.search("machine learning")
@@ -0,0 +1,196 @@
+"""
+Parity tests for the fast (tree-free) HTML extractor.
+
+The "fast" extractor must return exactly what the BeautifulSoup
+extractor returns. Checks:
+- every page in data/
+- hand-written adversarial HTML (entities, comments, CDATA, unclosed
+  and mismatched tags, hidden tags, whitespace handling)
+- randomly generated tag soup
+- extractor selection through load_page and SearchEngine
+- PageStream (chunked fast extraction) yields the same tokens
+- a file that stops decoding partway is indexed without text by every
+  extractor, streamed or not
+"""
+
+import tempfile
+import os
+import random
+import tracemalloc
+import pytest
+from parser import UNREADABLE_TITLE, PageStream, load_page
+from search_engine import SearchEngine
+from tokenizer import iter_tokens, tokenize
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+ADVERSARIAL = [
+    "",
+    "plain text only",
+    "<html><head><title> My Page </title></head><body>Text</body></html>",
+    "<title>First</title><title>Second</title>",
+    "<title/>after empty title",
+    "<title>never closed <p>body text",
+    "<title>a<b>bold</b>c</title>",
+    "<title>a\t\t<b> </b>\t\tc</title>",
+    "<title>x<script>hidden()</script>y</title>",
+    "<template><title>T</title></template>shown",
+    "<script>var a = '<p>not text</p>';</script>visible",
+    "<style>p { color: red }</style><p>styled</p>",
+    "<script/>after self-closing script",
+    "<script>never closed",
+    "<ruby>kan<rp>(</rp><rt>ji</rt><rp>)</rp></ruby>",
+    "<template><p>inside template</p></template>outside",
+    "<template><![CDATA[cdata in template]]></template>",
+    "<!-- a comment -->between<!-- another -->words",
+    "<!DOCTYPE html><?xml-stylesheet href='x'?>body",
+    "<![CDATA[raw <cdata>]]> text",
+    "fish &amp; chips &lt;tag&gt; &nbsp;space &copy; &notanentity; &amp",
+    "&#65;&#x42;&#X43; &#128; &#150; &#129; &#0; &#xD800; &#1114112;",
+    "a<br>b<br/>c</br>d<img src=x></img>e",
+    "<p>Broken <div>HTML",
+    "</p></div>stray end tags<p>",
+    "<div><p>Nested <span>inside</span> content</p></div>",
+    "<pre>  keep   spaces  </pre><textarea>\t</textarea>",
+    "<p>a</p>   \n   <p>b</p>",
+    "<P CLASS='x'>Upper Case Tags</P><TITLE>Late</TITLE>",
+    "<a href=\"page2.txt\">Go to Page 2</a>",
+    "unicode 　 spaces   and café",
+    "<p>unterminated <!-- comment",
+    "< not a tag & not an entity",
+]
+
+PIECES = [
+    "<title>", "</title>", "<script>", "</script>", "<style>", "</style>",
+    "<p>", "</p>", "<div>", "</div>", "<br>", "</br>", "<br/>", "<pre>",
+    "</pre>", "<template>", "</template>", "<rt>", "</rt>", "<span>",
+    "</span>", "<textarea>", "</textarea>", "<img src=x>", "</img>",
+    "<!-- c -->", "<![CDATA[cd]]>", "<!DOCTYPE html>", "&amp;", "&foo;",
+    "&#65;", "&#128;", "&#xZZ;", "&nbsp;", "hello", "World", "  ", "\t\n",
+    "　", "a&b", "<", "&", "&#", "<title/>", "</b>",
+]
+
+
+def write_page(tmpdir, content, name="page.html"):
+    # Helper: write one page and return its path
+    path = os.path.join(tmpdir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def assert_same_output(path):
+    assert load_page(path, extractor="fast") == load_page(path, extractor="bs4")
+
+
+def test_fast_extractor_matches_bs4_on_data_pages():
+    pages = sorted(os.listdir(DATA_DIR))
+    assert pages
+    for filename in pages:
+        assert_same_output(os.path.join(DATA_DIR, filename))
+
+
+@pytest.mark.filterwarnings("ignore")
+@pytest.mark.parametrize("html", ADVERSARIAL)
+def test_fast_extractor_matches_bs4_on_adversarial_html(html):
+    with tempfile.TemporaryDirectory() as tmp:
+        assert_same_output(write_page(tmp, html))
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_fast_extractor_matches_bs4_on_random_tag_soup():
+    rng = random.Random(1234)
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(300):
+            html = "".join(rng.choice(PIECES) for _ in range(rng.randint(1, 30)))
+            assert_same_output(write_page(tmp, html))
+
+
+def test_unknown_extractor_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_page(tmp, "<p>text</p>")
+        with pytest.raises(ValueError):
+            load_page(path, extractor="lxml")
+
+
+def test_search_engine_uses_selected_extractor():
+    with tempfile.TemporaryDirectory() as tmp:
+        write_page(tmp, "<title>Alpha</title><p>machine learning</p>", "a.html")
+        write_page(tmp, "<script>hidden</script><p>deep learning</p>", "b.html")
+
+        default = SearchEngine(tmp)
+        default.build_index()
+        fast = SearchEngine(tmp, extractor="fast")
+        fast.build_index()
+
+        assert fast.index.index == default.index.index
+        assert fast.titles == default.titles
+        assert fast.search("hidden") == []
+
+
+@pytest.mark.filterwarnings("ignore")
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_page_stream_yields_same_tokens(chunk_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(DATA_DIR, name) for name in sorted(os.listdir(DATA_DIR))]
+        paths += [write_page(tmp, html, f"adv{i}.html")
+                  for i, html in enumerate(ADVERSARIAL)]
+
+        for path in paths:
+            title, text = load_page(path, extractor="fast")
+            stream = PageStream(path, chunk_size=chunk_size)
+
+            assert list(iter_tokens(stream)) == tokenize(text)
+            assert stream.title == title
+
+
+def test_page_stream_memory_is_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "big.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("<title>Big</title>")
+            for i in range(8_000):
+                f.write(f"<p>machine learning paragraph {i % 50} data</p>\n")
+            f.write("plain tail text " * 10_000)
+        size = os.path.getsize(path)
+
+        tracemalloc.start()
+        try:
+            stream = PageStream(path, chunk_size=1024)
+            count = sum(1 for _ in iter_tokens(stream))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert stream.title == "Big"
+        assert count == 1 + 8_000 * 5 + 10_000 * 3   # title + body
+        # Peak memory depends on the chunk size, not the page size
+        assert peak < size / 8
+
+
+def test_partly_undecodable_page_is_indexed_empty():
+    with tempfile.TemporaryDirectory() as tmp:
+        write_page(tmp, "<p>fine page</p>", "a.html")
+        # Valid text in the first chunks, invalid UTF-8 near the end
+        with open(os.path.join(tmp, "b.html"), "wb") as f:
+            f.write(b"<p>good text here</p>" * 10_000 + b"\xff\xfe bad")
+
+        default = SearchEngine(tmp)
+        default.build_index()
+        fast = SearchEngine(tmp, extractor="fast", positional=True)
+        fast.build_index()
+
+        for engine in (default, fast):
+            assert engine.index.doc_freq("good") == 0
+            assert engine.index.doc_lengths["b.html"] == 0
+            assert engine.titles["b.html"] == UNREADABLE_TITLE
+        assert fast.index.index == default.index.index
+
+
+def test_engine_add_document_accepts_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = SearchEngine(tmp)
+        engine.add_document("a.txt", iter(["machine lear", "ning da", "ta"]))
+
+        assert engine.index.index["learning"] == {"a.txt": 1}
+        assert engine.search("data")[0][0] == "a.txt"
@@ -0,0 +1,172 @@
+"""
+Tests for positional postings, phrase and NEAR queries.
+
+Covers:
+- delta-encoded position lists round trip
+- positions follow document add / replace / delete
+- parse_query splits terms, phrases and NEAR operators
+- phrase queries match consecutive tokens only
+- NEAR/k matches within k positions in either order
+- phrase filtering with top_k matches the full result
+- positional snapshots round trip; non-positional ones are rejected
+- phrase queries on a non-positional index raise ValueError
+- positional parallel build matches the serial build
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from inverted_index import InvertedIndex, decode_positions, encode_positions
+from query import Near, Phrase, parse_query
+from search_engine import SearchEngine
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def make_engine(pages):
+    # Helper: in-memory positional engine over doc_id -> text
+    engine = SearchEngine("unused", positional=True)
+    for doc_id, text in pages.items():
+        engine.add_document(doc_id, text)
+    return engine
+
+
+def docs(results):
+    return sorted(doc for doc, _, _ in results)
+
+
+def test_position_encoding_round_trip():
+    positions = [0, 1, 5, 130, 20_000, 20_001]
+    data = encode_positions(positions)
+    assert decode_positions(data, len(positions)) == positions
+    # Small gaps take one byte each
+    assert len(encode_positions([3, 4, 5, 6])) == 4
+
+
+def test_positions_follow_document_changes():
+    index = InvertedIndex(positional=True)
+    index.add_document("a", ["x", "y", "x"])
+    assert index.term_positions("x", "a") == [0, 2]
+    assert index.term_positions("y", "a") == [1]
+
+    # Replacing the document replaces its positions
+    index.add_document("a", ["y", "x"])
+    assert index.term_positions("x", "a") == [1]
+
+    index.delete_document("a")
+    assert index.positions == {}
+    assert index.term_positions("x", "a") == []
+
+
+def test_positional_index_requires_positions():
+    index = InvertedIndex(positional=True)
+    with pytest.raises(ValueError):
+        index.add_term_counts("a", {"x": 1})
+
+
+def test_parse_query():
+    parsed = parse_query('"Machine Learning" of data NEAR/2 science "deep"')
+    assert parsed.phrases == (Phrase(("machine", "learning")),)
+    assert parsed.near == (Near("data", "science", 2),)
+    # Single-word phrases are plain terms; stop words are dropped
+    assert parsed.terms == ("deep",)
+    assert parsed.positional
+
+    plain = parse_query("machine learning")
+    assert plain.terms == ("machine", "learning") and not plain.positional
+    assert not parse_query('"the" ""')
+
+
+def test_phrase_matches_consecutive_tokens():
+    engine = make_engine({
+        "a": "machine learning is fun",
+        "b": "learning about machine design",
+        "c": "the machine of learning",   # stop word between -> adjacent
+    })
+    assert docs(engine.search("machine learning")) == ["a", "b", "c"]
+    assert docs(engine.search('"machine learning"')) == ["a", "c"]
+    assert docs(engine.search('"learning machine"')) == []
+    assert docs(engine.search('"machine learning" fun')) == ["a"]
+
+
+def test_phrase_with_repeated_term():
+    engine = make_engine({"a": "new new york", "b": "new york new"})
+    assert docs(engine.search('"new new york"')) == ["a"]
+
+
+def test_near_within_distance_either_order():
+    engine = make_engine({
+        "a": "data science",
+        "b": "science and big data",       # 'and' is a stop word
+        "c": "data x y z w science",
+    })
+    assert docs(engine.search("data NEAR/1 science")) == ["a"]
+    assert docs(engine.search("data NEAR/2 science")) == ["a", "b"]
+    assert docs(engine.search("data NEAR/5 science")) == ["a", "b", "c"]
+
+
+def test_phrase_top_k_matches_full_search():
+    pages = {}
+    for i in range(40):
+        # Every third doc has the phrase; frequencies vary the scores
+        words = ["alpha"] * (i % 5 + 1) + ["beta"] * (i % 3 + 1)
+        if i % 3 == 0:
+            words += ["alpha", "beta"]
+        else:
+            words += ["beta", "gamma", "alpha"]
+        pages[f"d{i:02d}"] = " ".join(words[::-1] if i % 2 else words)
+    engine = make_engine(pages)
+
+    full = engine.search('"alpha beta"', scorer="bm25")
+    assert full
+    for k in (1, 3, 10):
+        assert engine.search('"alpha beta"', top_k=k, scorer="bm25") == full[:k]
+
+
+def test_positional_snapshot_round_trip():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+        write(tmp, "b.txt", "<p>learning machine</p>")
+        snap = os.path.join(out, "index.snap")
+
+        built = SearchEngine(tmp, snapshot_path=snap, positional=True)
+        built.build_index()
+
+        loaded = SearchEngine(tmp, positional=True)
+        assert loaded.load_snapshot(snap)
+        assert docs(loaded.search('"machine learning"')) == ["a.txt"]
+
+        # A snapshot without positions cannot serve a positional engine
+        plain_snap = os.path.join(out, "plain.snap")
+        SearchEngine(tmp, snapshot_path=plain_snap).build_index()
+        assert not SearchEngine(tmp, positional=True).load_snapshot(plain_snap)
+
+
+def test_phrase_query_needs_positional_index():
+    engine = SearchEngine("unused")
+    engine.add_document("a", "machine learning")
+    with pytest.raises(ValueError):
+        engine.search('"machine learning"')
+    assert docs(engine.search("machine learning")) == ["a"]
+
+
+def test_positional_parallel_build_matches_serial():
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(6):
+            write(tmp, f"p{i}.txt", f"<p>machine learning page {i} machine</p>")
+
+        serial = SearchEngine(tmp, positional=True)
+        serial.build_index()
+        parallel = SearchEngine(tmp, positional=True)
+        parallel.build_index(workers=2)
+
+        assert parallel.index.positions == serial.index.positions
+        assert parallel.index.index == serial.index.index
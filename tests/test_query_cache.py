@@ -0,0 +1,132 @@
+"""
+Tests for the query result cache.
+
+Covers:
+- LRU eviction by entry count and by total result rows
+- hit / miss / eviction counters
+- a new index generation empties the cache, an older one only misses
+- SearchEngine serves repeated queries from the cache
+- adding / deleting documents and loading a snapshot invalidate it
+- options (top_k, scorer) are part of the key
+"""
+
+import tempfile
+import os
+from query_cache import QueryCache
+from search_engine import SearchEngine
+from scoring import BM25Scorer
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_lru_eviction_and_counters():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", 0, [1])
+    cache.put("b", 0, [2])
+    assert cache.get("a", 0) == [1]      # "a" is now most recent
+
+    cache.put("c", 0, [3])               # evicts "b"
+    assert cache.get("b", 0) is None
+    assert cache.get("c", 0) == [3]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+    assert stats["entries"] == 2
+
+
+def test_total_result_rows_are_bounded():
+    cache = QueryCache(max_entries=10, max_results=5)
+    cache.put("a", 0, [1, 2, 3])
+    cache.put("b", 0, [4, 5, 6])         # 6 rows > 5 -> evicts "a"
+    assert cache.get("a", 0) is None
+    assert cache.get("b", 0) == [4, 5, 6]
+
+    cache.put("huge", 0, list(range(6)))  # larger than the whole cache
+    assert cache.get("huge", 0) is None
+    assert len(cache) == 1
+
+
+def test_new_generation_empties_cache():
+    cache = QueryCache()
+    cache.put("a", 1, [1])
+    assert cache.get("a", 2) is None
+    assert len(cache) == 0
+
+    # Results computed for an older generation are never served
+    cache.put("a", 1, [1])
+    assert cache.get("a", 2) is None
+
+
+def test_older_generation_does_not_reset_cache():
+    # A query still pinned to an older index generation misses, and its
+    # results are not stored over the newer entries
+    cache = QueryCache()
+    cache.put("a", 2, [1])
+    assert cache.get("a", 1) is None
+    cache.put("a", 1, [9])
+    assert cache.get("a", 2) == [1]
+
+
+def test_engine_serves_repeated_queries_from_cache(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+        write(tmp, "b.txt", "<p>deep learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        calls = []
+        real_search = engine.index.search
+        monkeypatch.setattr(engine.index, "search",
+                            lambda *args, **kw: calls.append(args) or real_search(*args, **kw))
+
+        first = engine.search("Learning!")
+        assert engine.search("learning") == first
+        assert len(calls) == 1
+        assert engine.cache.hits == 1
+
+        # Mutating the returned list does not corrupt the cache
+        first.clear()
+        assert len(engine.search("learning")) == 2
+
+        # Options are part of the key
+        engine.search("learning", top_k=1)
+        engine.search("learning", scorer="bm25")
+        engine.search("learning", scorer=BM25Scorer(k1=2.0))
+        assert len(calls) == 4
+
+
+def test_engine_cache_invalidated_by_updates():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+        snap = os.path.join(out, "index.snap")
+        engine.save_snapshot(snap)
+
+        assert len(engine.search("learning")) == 1
+        engine.add_document("b.txt", "deep learning")
+        assert len(engine.search("learning")) == 2
+        engine.delete_document("a.txt")
+        assert [doc for doc, _, _ in engine.search("learning")] == ["b.txt"]
+
+        assert engine.load_snapshot(snap)
+        assert [doc for doc, _, _ in engine.search("learning")] == ["a.txt"]
+
+
+def test_cache_can_be_disabled():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+
+        engine = SearchEngine(tmp, cache_size=0)
+        engine.build_index()
+        engine.search("learning")
+        engine.search("learning")
+        assert engine.cache.hits == 0 and len(engine.cache) == 0
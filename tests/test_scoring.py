@@ -0,0 +1,137 @@
+"""
+Tests for pluggable ranking functions.
+
+Covers:
+- frequency scoring stays the default
+- BM25 / TF-IDF values and length normalisation
+- document statistics are maintained by add / delete
+- statistics survive snapshots and segments
+- top-k results equal the full ranking for every scorer
+"""
+
+import tempfile
+import os
+import math
+import random
+import pytest
+from inverted_index import InvertedIndex
+from scoring import BM25Scorer, CollectionStats, get_scorer
+from search_engine import SearchEngine
+from segment import write_segment
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_doc_stats_follow_updates():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "data", "science"])
+    index.add_document("b.txt", ["data"])
+    assert index.stats() == CollectionStats(2, 2.0, 1)
+
+    index.update_document("b.txt", ["data", "science", "model", "graph"])
+    assert index.stats() == CollectionStats(2, 3.5, 3)
+
+    index.delete_document("a.txt")
+    assert index.stats() == CollectionStats(1, 4.0, 4)
+    assert index.doc_lengths == {"b.txt": 4}
+
+
+def test_bm25_matches_formula():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "data", "science"])
+    index.add_document("b.txt", ["science", "model"])
+    index.add_document("c.txt", ["model"])
+
+    k1, b = 1.5, 0.5
+    scores = index.search(["data"], scorer=BM25Scorer(k1=k1, b=b))
+
+    idf = math.log(1 + (3 - 1 + 0.5) / (1 + 0.5))
+    norm = k1 * (1 - b + b * 3 / 2.0)
+    assert scores["a.txt"] == pytest.approx(idf * 2 * (k1 + 1) / (2 + norm))
+
+
+def test_bm25_prefers_short_documents():
+    # Same term frequency, but b.txt is much longer
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data", "science"])
+    index.add_document("b.txt", ["data"] + ["filler"] * 50)
+    index.add_document("c.txt", ["other"])
+
+    assert list(index.search(["data"])) == ["a.txt", "b.txt"]
+    assert list(index.search(["data"], scorer="bm25")) == ["a.txt", "b.txt"]
+    assert list(index.search(["data"], scorer=BM25Scorer(b=0))) == ["a.txt", "b.txt"]
+
+    index.add_document("b.txt", ["data", "data"] + ["filler"] * 50)
+    assert list(index.search(["data"], scorer="bm25")) == ["a.txt", "b.txt"]
+    assert list(index.search(["data"], scorer="frequency")) == ["b.txt", "a.txt"]
+
+
+def test_tfidf_rewards_rare_terms():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["common", "rare"])
+    index.add_document("b.txt", ["common", "common"])
+    index.add_document("c.txt", ["common"])
+
+    tfidf = get_scorer("tfidf")
+    scores = index.search(["common"], scorer=tfidf)
+    assert scores["b.txt"] > scores["a.txt"]
+
+    rare = index.search(["rare"], scorer=tfidf)["a.txt"]
+    assert rare > scores["a.txt"]
+
+
+def test_unknown_scorer_is_rejected():
+    with pytest.raises(ValueError):
+        get_scorer("pagerank")
+    with pytest.raises(ValueError):
+        BM25Scorer(b=2)
+
+
+def test_top_k_matches_full_ranking_for_all_scorers():
+    rng = random.Random(11)
+    vocab = ["data", "science", "learning", "model", "graph", "filler"]
+
+    index = InvertedIndex()
+    for i in range(80):
+        tokens = rng.choices(vocab, [8, 4, 3, 2, 1, 6], k=rng.randint(1, 30))
+        index.add_document(f"doc{i:03d}.txt", tokens)
+
+    for scorer in ["frequency", "tfidf", "bm25", BM25Scorer(k1=2.0, b=1.0)]:
+        for _ in range(20):
+            query = rng.choices(vocab, k=rng.randint(1, 3))
+            full = list(index.search(query, scorer=scorer).items())
+            for k in (1, 3, 10):
+                assert list(index.search(query, top_k=k, scorer=scorer).items()) == full[:k]
+
+
+def test_stats_survive_snapshot_and_segment():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        write(tmp, "a.txt", "<p>data data analysis</p>")
+        write(tmp, "b.txt", "<p>data science pipeline tools</p>")
+
+        built = SearchEngine(tmp, scorer="bm25")
+        built.build_index()
+        snap = os.path.join(out, "index.snap")
+        built.save_snapshot(snap)
+
+        loaded = SearchEngine(tmp, scorer="bm25")
+        assert loaded.load_snapshot(snap)
+        assert loaded.index.doc_lengths == built.index.doc_lengths
+        assert loaded.search("data") == built.search("data")
+
+        seg = os.path.join(out, "index.seg")
+        write_segment(seg, built.index.index, built.titles)
+        served = InvertedIndex.open_segment(seg)
+        try:
+            assert served.doc_lengths == {"a.txt": 3, "b.txt": 4}
+            assert served.stats() == built.index.stats()
+            assert served.search(["data"], scorer="bm25") == \
+                built.index.search(["data"], scorer="bm25")
+        finally:
+            served.close()
@@ -0,0 +1,122 @@
+"""
+Tests for batch query scoring with the sparse term-document matrix.
+
+Covers:
+- search_batch returns exactly the per-query results (all scorers, top_k)
+- corrected words, unknown words and empty queries
+- phrase / boolean queries in a batch fall back to search()
+- the matrix is reused until the index or scorer changes
+- scorers without cache_key() are batched but never reuse a matrix
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from scoring import BM25Scorer  # noqa: E402
+from search_engine import SearchEngine  # noqa: E402
+from term_matrix import TermMatrix  # noqa: E402
+
+
+def make_engine(pages, positional=False):
+    # Helper: in-memory engine over doc_id -> text
+    engine = SearchEngine("unused", positional=positional)
+    for doc_id, text in pages.items():
+        engine.add_document(doc_id, text)
+    return engine
+
+
+def random_engine(seed=0, docs=400):
+    # Helper: skewed random corpus plus queries over its vocabulary
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(40)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    engine = make_engine({
+        f"d{i:04d}": " ".join(rng.choices(vocab, weights, k=rng.randint(1, 30)))
+        for i in range(docs)
+    })
+    queries = [" ".join(rng.choices(vocab[:25], k=rng.randint(1, 4)))
+               for _ in range(150)]
+    return engine, queries
+
+
+@pytest.mark.parametrize("scorer", ["frequency", "tfidf", "bm25",
+                                    BM25Scorer(k1=2.0, b=0.3)])
+@pytest.mark.parametrize("top_k", [None, 1, 5])
+def test_batch_matches_per_query_search(scorer, top_k):
+    engine, queries = random_engine()
+    batch = engine.search_batch(queries, top_k=top_k, scorer=scorer)
+    expected = [engine.search(query, top_k=top_k, scorer=scorer) for query in queries]
+    # Identical, including float scores and tie order
+    assert batch == expected
+
+
+def test_corrections_unknown_and_empty_queries():
+    engine = make_engine({"a": "machine learning", "b": "machine tools"})
+    queries = ["machne", "zzzzzz", "", "the", "machine machine learning"]
+    assert engine.search_batch(queries, max_edits=1) == \
+        [engine.search(query, max_edits=1) for query in queries]
+    assert engine.search_batch(queries)[1:4] == [[], [], []]
+    assert engine.search_batch(["machine"], top_k=0) == [[]]
+
+
+def test_positional_and_boolean_queries_fall_back():
+    engine = make_engine({"a": "machine learning", "b": "learning machine"},
+                         positional=True)
+    queries = ['"machine learning"', "machine -learning", "machine OR tools",
+               "learning"]
+    assert engine.search_batch(queries) == [engine.search(query) for query in queries]
+
+
+def test_matrix_rebuilt_only_on_change():
+    engine = make_engine({"a": "data science", "b": "data"})
+    engine.search_batch(["data"])
+    matrix = engine.term_matrix
+    engine.search_batch(["science"])
+    assert engine.term_matrix is matrix
+
+    engine.add_document("c", "data data data")
+    assert engine.search_batch(["data"])[0][0][0] == "c"
+    assert engine.term_matrix is not matrix
+
+    matrix = engine.term_matrix
+    engine.search_batch(["data"], scorer="bm25")
+    assert engine.term_matrix is not matrix
+
+
+class PlainScorer:
+    # A custom scorer without cache_key() (search() allows those): BM25
+    # otherwise
+    def __init__(self):
+        self.bm25 = BM25Scorer()
+
+    def __getattr__(self, name):
+        if name == "cache_key":
+            raise AttributeError(name)
+        return getattr(self.bm25, name)
+
+
+def test_scorer_without_cache_key():
+    engine, queries = random_engine(seed=3, docs=100)
+    scorer = PlainScorer()
+    assert not hasattr(scorer, "cache_key")
+
+    expected = [engine.search(query, scorer=scorer) for query in queries]
+    assert engine.search_batch(queries, scorer=scorer) == expected
+    matrix = engine.term_matrix
+    assert engine.search_batch(queries[:3], scorer=scorer) == expected[:3]
+    assert engine.term_matrix is not matrix
+
+
+def test_term_matrix_layout():
+    engine = make_engine({"b": "x y y", "a": "y"})
+    matrix = TermMatrix(engine.index, engine.scorer)
+    assert matrix.docs == ["a", "b"]
+    assert matrix.matrix.shape == (2, 2)
+    # Frequency factors are the raw term frequencies
+    y = matrix.term_ids["y"]
+    assert matrix.matrix[y].toarray().tolist() == [[1, 2]]
+    assert matrix.doc_freqs.tolist()[y] == 2
@@ -0,0 +1,115 @@
+"""
+Tests for memory-mapped postings segments.
+
+Covers:
+- varint encode / decode round trip
+- segment postings match the in-memory index
+- SearchEngine answers the same queries from a segment
+- segment-backed indexes are read-only
+- invalid files are rejected
+"""
+
+import tempfile
+import os
+import pytest
+from search_engine import SearchEngine
+from inverted_index import InvertedIndex
+from segment import (
+    SegmentError, SegmentReader, decode_varints, encode_varints, write_segment
+)
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_varint_round_trip():
+    values = [0, 1, 127, 128, 300, 16383, 16384, 2**32 + 5]
+    buf = bytearray()
+    encode_varints(values, buf)
+
+    decoded, pos = decode_varints(buf, 0, len(values))
+    assert decoded == values
+    assert pos == len(buf)
+
+
+def test_segment_postings_match_memory_index():
+    index = InvertedIndex()
+    index.add_document("b.txt", ["data", "science", "data"])
+    index.add_document("a.txt", ["data", "café"])
+    index.add_document("c.txt", ["science"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.seg")
+        write_segment(path, index.index, {"a.txt": "A"})
+
+        opened = InvertedIndex.open_segment(path)
+        try:
+            assert len(opened.index) == 3
+            assert sorted(opened.index) == sorted(index.index)
+            for term in index.index:
+                assert opened.index[term] == index.index[term]
+            assert "missing" not in opened.index
+            assert opened.trie.search_exact("café")
+            assert opened.segment.titles == {"a.txt": "A", "b.txt": "b.txt",
+                                             "c.txt": "c.txt"}
+        finally:
+            opened.close()
+
+
+def test_engine_search_from_segment():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        write(tmp, "a.txt", "<title>Alpha</title><p>data data analysis</p>")
+        write(tmp, "b.txt", "<p>data science pipeline</p>")
+
+        built = SearchEngine(tmp)
+        built.build_index()
+        path = os.path.join(out, "index.seg")
+        built.write_segment(path)
+
+        served = SearchEngine(tmp)
+        served.open_segment(path)
+        try:
+            assert served.search("data") == built.search("data")
+            assert served.search("pipe") == built.search("pipe")
+            assert served.prefix_search("an") == ["analysis"]
+            assert served.titles["a.txt"] == "Alpha"
+        finally:
+            served.index.close()
+
+
+def test_segment_index_is_read_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.seg")
+        write_segment(path, {"data": {"a.txt": 1}}, {})
+
+        opened = InvertedIndex.open_segment(path)
+        try:
+            with pytest.raises(RuntimeError):
+                opened.add_document("b.txt", ["data"])
+        finally:
+            opened.close()
+
+
+def test_invalid_segments_are_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = write(tmp, "empty.seg", "")
+        with pytest.raises(SegmentError):
+            SegmentReader(empty)
+
+        foreign = write(tmp, "foreign.seg", "x" * 100)
+        with pytest.raises(SegmentError):
+            SegmentReader(foreign)
+
+        path = os.path.join(tmp, "index.seg")
+        write_segment(path, {"data": {"a.txt": 1}}, {})
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:-1])
+        with pytest.raises(SegmentError):
+            SegmentReader(path)
@@ -0,0 +1,160 @@
+"""
+Tests for the asyncio HTTP query service.
+
+Covers:
+- /search, /prefix and /stats JSON responses
+- keep-alive: several requests over one connection
+- Connection: close is honoured
+- 400 / 404 / 405 errors
+- 503 when the query pool is saturated
+- concurrent clients all get answers
+"""
+
+import asyncio
+import http.client
+import json
+import threading
+from contextlib import contextmanager
+
+from search_engine import SearchEngine
+from server import SearchServer
+
+
+def make_engine():
+    # Helper: small in-memory engine
+    engine = SearchEngine("unused")
+    engine.add_document("a.txt", "machine learning data", "Learning")
+    engine.add_document("b.txt", "data science data", "Science")
+    engine.add_document("c.txt", "database systems", "Databases")
+    return engine
+
+
+@contextmanager
+def running_server(engine, **options):
+    # Helper: serve from an event loop in a background thread
+    loop = asyncio.new_event_loop()
+    server = SearchServer(engine, port=0, **options)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+def get(conn, path, headers=None):
+    # Helper: GET path, return (status, parsed JSON, response)
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read()), response
+
+
+def test_search_prefix_and_stats():
+    engine = make_engine()
+    with running_server(engine) as server:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+        status, body, _ = get(conn, "/search?q=data&k=1")
+        assert status == 200
+        assert body["query"] == "data"
+        assert body["results"] == [{"doc": "b.txt", "title": "Science", "score": 2}]
+
+        status, body, _ = get(conn, "/search?q=machine+OR+systems&scorer=bm25")
+        assert sorted(row["doc"] for row in body["results"]) == ["a.txt", "c.txt"]
+
+        status, body, _ = get(conn, "/prefix?q=dat&limit=2")
+        assert status == 200
+        assert body["completions"] == ["data", "database"]
+
+        status, body, _ = get(conn, "/stats")
+        assert status == 200
+        assert body["documents"] == 3
+        assert body["terms"] == len(engine.index.index)
+        assert body["server"]["requests"] == 4
+        assert body["cache"]["misses"] >= 2
+        conn.close()
+
+
+def test_keep_alive_reuses_connection():
+    with running_server(make_engine()) as server:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        get(conn, "/search?q=data")
+        sock = conn.sock
+        for _ in range(3):
+            status, _, response = get(conn, "/search?q=science")
+            assert status == 200
+            assert response.getheader("Connection") == "keep-alive"
+        assert conn.sock is sock
+
+        _, body, _ = get(conn, "/stats")
+        assert body["server"]["connections"] == 1
+        conn.close()
+
+
+def test_connection_close_is_honoured():
+    with running_server(make_engine()) as server:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        status, _, response = get(conn, "/stats", {"Connection": "close"})
+        assert status == 200
+        assert response.getheader("Connection") == "close"
+        assert response.will_close
+        conn.close()
+
+
+def test_error_responses():
+    with running_server(make_engine()) as server:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+
+        assert get(conn, "/search")[0] == 400
+        assert get(conn, "/search?q=data&k=-1")[0] == 400
+        status, body, _ = get(conn, "/search?q=data&scorer=nope")
+        assert status == 400 and "unknown scorer" in body["error"]
+        # Phrase query on an index without positions
+        assert get(conn, '/search?q="machine+learning"')[0] == 400
+        assert get(conn, "/nowhere")[0] == 404
+
+        conn.request("POST", "/search?q=data", body=b"ignored")
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 405
+
+        # The connection survives the errors
+        assert get(conn, "/search?q=data")[0] == 200
+        assert server.errors == 6
+        conn.close()
+
+
+def test_saturated_pool_answers_503():
+    with running_server(make_engine(), max_pending=0) as server:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+        status, body, _ = get(conn, "/search?q=data")
+        assert status == 503
+        # /stats does not need the pool
+        assert get(conn, "/stats")[1]["server"]["rejected"] == 1
+        conn.close()
+
+
+def test_concurrent_clients():
+    with running_server(make_engine(), workers=2) as server:
+        failures = []
+
+        def client():
+            conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            for i in range(20):
+                status, body, _ = get(conn, "/search?q=data" if i % 2 else "/prefix?q=d")
+                if status != 200:
+                    failures.append(status)
+            conn.close()
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        assert failures == []
+        assert server.requests == 160
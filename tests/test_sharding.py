@@ -0,0 +1,201 @@
+"""
+Tests for the sharded search coordinator.
+
+Covers:
+- documents are hash-partitioned and a folder build spreads its pages
+- search results (scores, ties, corrections, phrase and boolean
+  queries) equal those of one engine over the whole collection
+- terms with equal document frequency add up scores in the same order
+  on every shard (boolean queries keep identical float scores)
+- prefix_search merges completions by global document frequency, even
+  when the best term is not any shard's best
+- a stalled shard is left out after the timeout and recovers afterwards
+- a dead shard is left out instead of failing the query
+"""
+
+import os
+import random
+import signal
+import tempfile
+import time
+
+import pytest
+
+from scoring import BM25Scorer
+from search_engine import SearchEngine
+from sharding import ShardedSearchEngine, shard_of
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a file in the temporary data folder
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def names_on(shard, shards, count):
+    # Helper: `count` document names owned by shard
+    names = []
+    i = 0
+    while len(names) < count:
+        name = f"doc{i}"
+        if shard_of(name, shards) == shard:
+            names.append(name)
+        i += 1
+    return names
+
+
+def random_pages(seed=0, docs=200):
+    # Helper: skewed random corpus with shared prefixes
+    rng = random.Random(seed)
+    vocab = [stem + suffix for stem in ("mach", "learn", "data", "deep", "graph")
+             for suffix in ("", "ing", "er", "s")]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    return {f"d{i:03d}": " ".join(rng.choices(vocab, weights, k=rng.randint(1, 25)))
+            for i in range(docs)}
+
+
+def test_shard_of_is_stable_and_spreads():
+    assert shard_of("page.html", 4) == shard_of("page.html", 4)
+    counts = [0] * 4
+    for i in range(1000):
+        counts[shard_of(f"doc{i}.html", 4)] += 1
+    assert min(counts) > 150
+
+
+def test_build_index_from_folder():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(12):
+            write(tmpdir, f"p{i}.html",
+                  f"<html><title>Page {i}</title><body>common word{i}</body></html>")
+        with ShardedSearchEngine(tmpdir, shards=3) as sharded:
+            sharded.build_index()
+            stats = sharded.stats()
+            assert stats["documents"] == 12
+            assert [s["documents"] for s in stats["per_shard"]] == [
+                sum(shard_of(f"p{i}.html", 3) == shard for i in range(12))
+                for shard in range(3)
+            ]
+            assert [doc for doc, _, _ in sharded.search("common")] == \
+                sorted(f"p{i}.html" for i in range(12))
+            assert sharded.search("word7") == [("p7.html", "Page 7", 1)]
+
+
+def test_results_match_single_engine():
+    pages = random_pages()
+    single = SearchEngine("unused", positional=True)
+    for doc_id, text in pages.items():
+        single.add_document(doc_id, text)
+
+    rng = random.Random(1)
+    words = sorted({word for text in pages.values() for word in text.split()})
+    queries = [" ".join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(40)]
+    # Prefix and fuzzy corrections, unknown words, phrases, boolean queries
+    queries += ["mac", "lerning", "zzzz", '"mach learn"', "data NEAR/3 deep",
+                "mach OR graph -deep", "(data OR learning) machs", "-mach"]
+
+    with ShardedSearchEngine("unused", shards=3, positional=True) as sharded:
+        for doc_id, text in pages.items():
+            sharded.add_document(doc_id, text)
+
+        for scorer in ("frequency", "tfidf", BM25Scorer(k1=2.0, b=0.3)):
+            for top_k in (None, 1, 5):
+                for query in queries:
+                    # Identical, including float scores and tie order
+                    assert sharded.search(query, top_k=top_k, scorer=scorer) == \
+                        single.search(query, top_k=top_k, scorer=scorer)
+        assert sharded.missing_shards == ()
+
+        for prefix in ("m", "d", "le", "x"):
+            for limit in (None, 1, 3):
+                assert sharded.prefix_search(prefix, limit) == \
+                    single.prefix_search(prefix, limit)
+
+        # Deletes go to the owning shard
+        assert sharded.delete_document("d000")
+        assert not sharded.delete_document("d000")
+        assert "d000" not in [doc for doc, _, _ in sharded.search("mach")]
+
+
+def test_equal_doc_freq_terms_score_identically():
+    # Few words with random repeats: many equal document frequencies,
+    # ordered differently on each shard
+    rng = random.Random(4)
+    vocab = ["alpha", "beta", "gamma", "delta", "omega"]
+    pages = {}
+    for i in range(40):
+        words = rng.sample(vocab, rng.randint(1, 5))
+        pages[f"p{i:02d}"] = " ".join(word for word in words
+                                      for _ in range(rng.randint(1, 4)))
+    single = SearchEngine("unused")
+    for doc_id, text in pages.items():
+        single.add_document(doc_id, text)
+
+    with ShardedSearchEngine("unused", shards=3) as sharded:
+        for doc_id, text in pages.items():
+            sharded.add_document(doc_id, text)
+        for scorer in ("tfidf", "bm25"):
+            for query in ("(alpha OR omega) beta gamma delta",
+                          "gamma OR alpha beta delta", "alpha beta gamma delta"):
+                assert sharded.search(query, scorer=scorer) == \
+                    single.search(query, scorer=scorer)
+
+
+def test_prefix_best_term_not_first_on_any_shard():
+    left, right = names_on(0, 2, 3), names_on(1, 2, 3)
+    with ShardedSearchEngine("unused", shards=2) as sharded:
+        # pc is second on both shards but first overall (4 documents)
+        for doc_id, text in zip(left, ["pa pc", "pa pc", "pa"]):
+            sharded.add_document(doc_id, text)
+        for doc_id, text in zip(right, ["pb pc", "pb pc", "pb"]):
+            sharded.add_document(doc_id, text)
+        assert sharded.prefix_search("p", limit=1) == ["pc"]
+        assert sharded.prefix_search("p", limit=3) == ["pc", "pa", "pb"]
+
+
+def test_positional_queries_need_positions():
+    with ShardedSearchEngine("unused", shards=1) as sharded:
+        sharded.add_document("a", "machine learning")
+        with pytest.raises(ValueError):
+            sharded.search('"machine learning"')
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGSTOP"), reason="needs SIGSTOP")
+def test_stalled_shard_is_left_out():
+    left, right = names_on(0, 2, 1), names_on(1, 2, 1)
+    with ShardedSearchEngine("unused", shards=2, timeout=0.5) as sharded:
+        sharded.add_document(left[0], "shared")
+        sharded.add_document(right[0], "shared")
+        assert len(sharded.search("shared")) == 2
+
+        pid = sharded._processes[1].pid
+        os.kill(pid, signal.SIGSTOP)
+        try:
+            start = time.monotonic()
+            results = sharded.search("shared")
+            assert time.monotonic() - start < 5
+            assert [doc for doc, _, _ in results] == left
+            assert sharded.missing_shards == (1,)
+            assert sharded.timeouts == 1
+        finally:
+            os.kill(pid, signal.SIGCONT)
+
+        # The late answers are dropped; the next query sees both shards
+        assert len(sharded.search("shared")) == 2
+        assert sharded.missing_shards == ()
+
+
+def test_dead_shard_is_left_out():
+    left, right = names_on(0, 2, 1), names_on(1, 2, 1)
+    with ShardedSearchEngine("unused", shards=2) as sharded:
+        sharded.add_document(left[0], "shared")
+        sharded.add_document(right[0], "shared")
+
+        process = sharded._processes[1]
+        process.kill()
+        process.join()
+        for _ in range(2):   # the second send hits the closed pipe
+            results = sharded.search("shared")
+            assert [doc for doc, _, _ in results] == left
+            assert sharded.missing_shards == (1,)
@@ -0,0 +1,150 @@
+"""
+Tests for binary index snapshots.
+
+Covers:
+- save + load round trip through SearchEngine
+- search and prefix results identical after loading
+- stale snapshots (corpus changed) are rejected and rebuilt
+- pages edited through the API before saving are restored from the
+  folder when the snapshot is loaded by build_index (and by refresh)
+- corrupt / truncated / foreign files are rejected
+"""
+
+import tempfile
+import os
+import pytest
+from search_engine import SearchEngine
+from snapshot import SnapshotError, load_snapshot, save_snapshot
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def build_site(tmp):
+    write(tmp, "a.txt", "<title>Alpha</title><p>machine learning data data</p>")
+    write(tmp, "b.txt", "<p>deep learning models</p>")
+
+
+def test_snapshot_round_trip_preserves_results():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        build_site(tmp)
+        snap = os.path.join(out, "index.snap")
+
+        built = SearchEngine(tmp, snapshot_path=snap)
+        built.build_index()
+        assert os.path.exists(snap)
+
+        loaded = SearchEngine(tmp)
+        assert loaded.load_snapshot(snap)
+
+        assert loaded.titles == built.titles
+        assert loaded.search("learning") == built.search("learning")
+        assert loaded.prefix_search("d") == built.prefix_search("d")
+
+
+def test_build_index_uses_valid_snapshot(capsys):
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        build_site(tmp)
+        snap = os.path.join(out, "index.snap")
+
+        SearchEngine(tmp, snapshot_path=snap).build_index()
+        capsys.readouterr()
+
+        engine = SearchEngine(tmp, snapshot_path=snap)
+        engine.build_index()
+
+        assert "loaded from snapshot" in capsys.readouterr().out
+        assert engine.search("alpha")[0][1] == "Alpha"
+
+
+def test_stale_snapshot_is_rebuilt(capsys):
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        build_site(tmp)
+        snap = os.path.join(out, "index.snap")
+        SearchEngine(tmp, snapshot_path=snap).build_index()
+
+        # Adding a page changes the corpus fingerprint
+        write(tmp, "c.txt", "<p>quantum computing</p>")
+        capsys.readouterr()
+
+        engine = SearchEngine(tmp, snapshot_path=snap)
+        engine.build_index()
+
+        assert "successfully built" in capsys.readouterr().out
+        assert engine.search("quantum")[0][0] == "c.txt"
+
+
+def test_api_edits_are_not_taken_for_folder_pages():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        build_site(tmp)
+        snap = os.path.join(out, "index.snap")
+        engine = SearchEngine(tmp, snapshot_path=snap)
+        engine.build_index()
+
+        engine.delete_document("a.txt")
+        engine.update_document("b.txt", "replaced text")
+        engine.add_document("extra", "extra document")
+        engine.save_snapshot(snap)
+
+        loaded = SearchEngine(tmp, snapshot_path=snap)
+        loaded.build_index()
+        assert loaded.titles["a.txt"] == "Alpha"
+        assert [doc for doc, _, _ in loaded.search("deep")] == ["b.txt"]
+        assert loaded.search("replaced") == []
+        # Documents that are not folder pages are kept
+        assert loaded.search("extra")[0][0] == "extra"
+
+        # refresh() restores them in the live engine too
+        changes = engine.refresh()
+        assert sorted(changes.added) == ["a.txt", "b.txt"]
+        assert engine.search("learning") == loaded.search("learning")
+
+
+def test_corrupt_snapshot_is_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = os.path.join(tmp, "index.snap")
+        save_snapshot(snap, {"postings": {"data": {"a.txt": 1}}}, b"\0" * 16)
+
+        with open(snap, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+
+        with pytest.raises(SnapshotError):
+            load_snapshot(snap)
+
+
+def test_truncated_and_foreign_files_are_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = os.path.join(tmp, "index.snap")
+        save_snapshot(snap, {"postings": {}}, b"\0" * 16)
+
+        with open(snap, "rb") as f:
+            data = f.read()
+        with open(snap, "wb") as f:
+            f.write(data[:-2])
+        with pytest.raises(SnapshotError):
+            load_snapshot(snap)
+
+        foreign = write(tmp, "notes.txt", "just some text, not a snapshot")
+        with pytest.raises(SnapshotError):
+            load_snapshot(foreign)
+
+        with pytest.raises(SnapshotError):
+            load_snapshot(os.path.join(tmp, "missing.snap"))
+
+
+def test_engine_falls_back_when_snapshot_is_bad():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        build_site(tmp)
+        snap = write(out, "index.snap", "garbage")
+
+        engine = SearchEngine(tmp)
+        assert engine.load_snapshot(snap) is False
+        assert engine.titles == {}
@@ -9,9 +9,11 @@ Checks:
 - mixed-case queries
 - repeated-word normalization
 - handling empty input
+- chunked / lazy tokenization with iter_tokens
 """
 
-from tokenizer import clean_text, tokenize
+import types
+from tokenizer import clean_text, iter_tokens, tokenize
 
 
 def test_clean_text_basic():
@@ -57,3 +59,28 @@ def test_tokenize_repeated_words():
 def test_tokenize_empty_string():
     # Empty input -> no tokens
     assert tokenize("") == []
+
+
+def test_iter_tokens_is_lazy():
+    # iter_tokens returns a generator, not a list
+    assert isinstance(iter_tokens(["data science"]), types.GeneratorType)
+
+
+def test_iter_tokens_matches_tokenize_for_every_chunking():
+    # Words split across any chunk boundary are reassembled
+    text = "The state-of-the-art MACHINE learning, and data-science!  AI"
+    expected = tokenize(text)
+
+    for size in range(1, len(text) + 1):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert list(iter_tokens(chunks)) == expected
+
+
+def test_iter_tokens_stopword_split_across_chunks():
+    # "the" + "ory" is one word, not a stop word
+    assert list(iter_tokens(["the", "ory of ", "the"])) == ["theory"]
+
+
+def test_iter_tokens_empty_chunks():
+    assert list(iter_tokens([])) == []
+    assert list(iter_tokens(["", "  ", ""])) == []
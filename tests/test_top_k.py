@@ -0,0 +1,74 @@
+"""
+Tests for top-k retrieval.
+
+Covers:
+- top_k results equal the first k of the full ranking (random corpora)
+- ties keep ascending document order
+- top_k <= 0 and missing terms return nothing
+- SearchEngine.search passes top_k through
+"""
+
+import tempfile
+import os
+import random
+from inverted_index import InvertedIndex
+from search_engine import SearchEngine
+
+
+def write(tmpdir, filename, content):
+    # Helper: create a test page inside the temporary directory
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def test_top_k_matches_full_ranking():
+    # Small vocabulary gives many ties and many shared documents
+    rng = random.Random(3)
+    vocab = ["data", "science", "learning", "model", "graph"]
+
+    for _ in range(30):
+        index = InvertedIndex()
+        for i in range(rng.randint(1, 60)):
+            tokens = rng.choices(vocab, [8, 4, 2, 1, 1], k=rng.randint(1, 12))
+            index.add_document(f"doc{i:03d}.txt", tokens)
+
+        for _ in range(10):
+            query = rng.choices(vocab, k=rng.randint(1, 3))
+            full = list(index.search(query).items())
+            for k in (1, 2, 5, 100):
+                assert list(index.search(query, top_k=k).items()) == full[:k]
+
+
+def test_top_k_ties_keep_document_order():
+    index = InvertedIndex()
+    for name in ["d.txt", "b.txt", "a.txt", "c.txt"]:
+        index.add_document(name, ["data"])
+    index.add_document("e.txt", ["data", "data"])
+
+    assert list(index.search(["data"], top_k=3)) == ["e.txt", "a.txt", "b.txt"]
+
+
+def test_top_k_edge_cases():
+    index = InvertedIndex()
+    index.add_document("a.txt", ["data"])
+
+    assert index.search(["data"], top_k=0) == {}
+    assert index.search(["data", "missing"], top_k=5) == {}
+    assert index.search([], top_k=5) == {}
+
+
+def test_engine_search_top_k():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>learning</p>")
+        write(tmp, "b.txt", "<p>learning learning learning</p>")
+        write(tmp, "c.txt", "<p>learning learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        assert engine.search("learning", top_k=2) == [
+            ("b.txt", "b.txt", 3), ("c.txt", "c.txt", 2)
+        ]
+        assert len(engine.search("learning")) == 3
@@ -0,0 +1,152 @@
+"""
+Tests for the radix-tree Trie.
+
+Covers:
+- insert / search_exact / search_prefix against a plain set of terms
+- from_sorted builds the same tree contents as repeated insert
+- from_sorted rejects unsorted input
+- delete merges single-child nodes and reuses freed node ids
+- indexes restored from snapshots / built in bulk get a full Trie
+- iter_prefix is lazy, ordered, non-recursive and supports offsets
+- len() and count_prefix() track inserts and deletes
+"""
+
+import random
+import pytest
+from inverted_index import InvertedIndex
+from trie import Trie
+
+
+def random_terms(rng, count):
+    # Tiny alphabet -> many shared prefixes and edge splits
+    return {
+        "".join(rng.choices("abc", k=rng.randint(1, 7)))
+        for _ in range(count)
+    }
+
+
+def test_matches_set_semantics():
+    rng = random.Random(5)
+    for _ in range(50):
+        terms = random_terms(rng, rng.randint(0, 60))
+        trie = Trie()
+        for term in rng.sample(sorted(terms), len(terms)):
+            trie.insert(term)
+
+        assert trie.search_prefix("") == sorted(terms)
+        for prefix in ["a", "ab", "abc", "ba", "cc", "abcab"]:
+            assert trie.search_prefix(prefix) == sorted(
+                term for term in terms if term.startswith(prefix)
+            )
+        for probe in ["a", "ab", "abc", "bca", "cccccccc"]:
+            assert trie.search_exact(probe) == (probe in terms)
+
+
+def test_from_sorted_equals_inserts():
+    rng = random.Random(9)
+    terms = sorted(random_terms(rng, 300))
+
+    bulk = Trie.from_sorted(terms)
+    single = Trie()
+    for term in terms:
+        single.insert(term)
+
+    assert bulk.search_prefix("") == single.search_prefix("") == terms
+    assert len(bulk.labels) == len(single.labels)
+    assert all(bulk.search_exact(term) for term in terms)
+    assert not bulk.search_exact(terms[0][:-1] + "z")
+
+
+def test_from_sorted_rejects_unsorted_terms():
+    assert Trie.from_sorted(["data", "data", "science"]).search_prefix("") == [
+        "data", "science"
+    ]
+    with pytest.raises(ValueError):
+        Trie.from_sorted(["science", "data"])
+
+
+def test_delete_merges_and_reuses_nodes():
+    trie = Trie()
+    for term in ["romane", "romanus", "romulus"]:
+        trie.insert(term)
+    nodes = len(trie.labels)
+
+    assert trie.delete("romanus")
+    # "an" + "e" collapse back into a single edge; freed labels are ""
+    assert sorted(filter(None, trie.labels)) == ["ane", "rom", "ulus"]
+    assert trie.search_prefix("rom") == ["romane", "romulus"]
+    assert trie.search_exact("romane")
+    assert not trie.search_exact("roman")
+
+    trie.insert("romanus")
+    assert len(trie.labels) == nodes
+    assert trie.search_prefix("roma") == ["romane", "romanus"]
+
+
+def test_prefix_ending_inside_an_edge():
+    trie = Trie.from_sorted(["database", "datasets"])
+    assert trie.search_prefix("dat") == ["database", "datasets"]
+    assert trie.search_prefix("datab") == ["database"]
+    assert trie.search_prefix("databx") == []
+    assert not trie.search_exact("data")
+
+
+def test_bulk_load_builds_trie_once():
+    index = InvertedIndex()
+    with index.bulk_load():
+        index.add_document("a.txt", ["science", "data"])
+        assert index.trie is None
+        index.add_document("b.txt", ["database"])
+
+    assert index.trie.search_prefix("") == ["data", "database", "science"]
+
+    restored = InvertedIndex.from_state(index.to_state())
+    assert restored.trie.search_prefix("dat") == ["data", "database"]
+
+
+def test_iter_prefix_is_lazy_and_ordered():
+    trie = Trie.from_sorted(["data", "database", "datasets", "date", "science"])
+
+    terms = trie.iter_prefix("dat")
+    assert next(terms) == "data"
+    assert list(terms) == ["database", "datasets", "date"]
+    assert list(trie.iter_prefix("x")) == []
+
+
+def test_long_terms_do_not_hit_recursion_limit():
+    # One character per level used to mean one recursive call per level
+    trie = Trie()
+    for n in range(1, 3000, 7):
+        trie.insert("a" * n + "b")
+
+    assert len(trie.search_prefix("a")) == len(range(1, 3000, 7))
+    assert trie.search_prefix("a" * 2991) == ["a" * 2997 + "b"]
+
+
+def test_counts_and_paging_follow_edits():
+    rng = random.Random(2)
+    terms = set()
+    trie = Trie()
+
+    for _ in range(500):
+        term = "".join(rng.choices("abc", k=rng.randint(1, 5)))
+        if rng.random() < 0.6:
+            trie.insert(term)
+            terms.add(term)
+        else:
+            trie.delete(term)
+            terms.discard(term)
+
+        assert len(trie) == len(terms)
+        prefix = "".join(rng.choices("abc", k=rng.randint(0, 2)))
+        expected = sorted(term for term in terms if term.startswith(prefix))
+        assert trie.count_prefix(prefix) == len(expected)
+
+        offset = rng.randint(0, len(expected) + 1)
+        assert list(trie.iter_prefix(prefix, offset)) == expected[offset:]
+
+    bulk = Trie.from_sorted(sorted(terms))
+    assert len(bulk) == len(terms)
+    for offset in range(len(terms) + 1):
+        assert next(bulk.iter_prefix("", offset), None) == \
+            (sorted(terms)[offset] if offset < len(terms) else None)
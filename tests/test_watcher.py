@@ -0,0 +1,179 @@
+"""
+Tests for change detection and incremental refresh.
+
+Covers:
+- scan_folder reports added / modified / deleted pages
+- touched-but-identical pages are not reported as modified
+- a full build does not hash pages; the first refresh hashes the
+  unchanged ones
+- SearchEngine.refresh re-indexes only changed pages
+- building again drops pages removed from the folder
+- manifest survives a snapshot round trip
+- background DirectoryWatcher applies changes
+"""
+
+import tempfile
+import os
+import time
+from search_engine import SearchEngine
+from watcher import scan_folder
+import search_engine
+import watcher
+
+
+def write(tmpdir, filename, content, mtime_ns=None):
+    # Helper: create a test page, optionally with a fixed mtime
+    path = os.path.join(tmpdir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def test_scan_folder_detects_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "alpha", mtime_ns=1_000)
+        write(tmp, "b.txt", "beta", mtime_ns=1_000)
+
+        first = scan_folder(tmp, ["a.txt", "b.txt"], {})
+        assert first.added == ["a.txt", "b.txt"]
+        assert first.modified == [] and first.deleted == []
+
+        write(tmp, "a.txt", "alpha changed", mtime_ns=2_000)
+        os.remove(os.path.join(tmp, "b.txt"))
+        write(tmp, "c.txt", "gamma", mtime_ns=2_000)
+
+        second = scan_folder(tmp, ["a.txt", "c.txt"], first.manifest)
+        assert second.added == ["c.txt"]
+        assert second.modified == ["a.txt"]
+        assert second.deleted == ["b.txt"]
+
+
+def test_touched_file_with_same_content_is_not_modified():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "alpha", mtime_ns=1_000)
+        first = scan_folder(tmp, ["a.txt"], {})
+
+        write(tmp, "a.txt", "alpha", mtime_ns=5_000)
+        second = scan_folder(tmp, ["a.txt"], first.manifest)
+
+        assert second.modified == []
+        assert second.manifest["a.txt"][0] == 5_000
+
+
+def test_build_hashes_pages_lazily(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>alpha</p>", mtime_ns=1_000)
+        write(tmp, "b.txt", "<p>beta</p>", mtime_ns=1_000)
+
+        hashed = []
+        real_digest = watcher.file_digest
+        monkeypatch.setattr(
+            watcher, "file_digest",
+            lambda path: hashed.append(os.path.basename(path)) or real_digest(path)
+        )
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+        assert hashed == []
+        assert engine.manifest["a.txt"] == (1_000, 12, None)
+
+        # Touched before it was ever hashed: re-indexed to be safe
+        write(tmp, "a.txt", "<p>alpha</p>", mtime_ns=2_000)
+        changes = engine.refresh()
+        assert changes.modified == ["a.txt"]
+        assert sorted(hashed) == ["a.txt", "b.txt"]
+
+        # Now hashed: a touch alone is not a change
+        write(tmp, "b.txt", "<p>beta</p>", mtime_ns=3_000)
+        assert engine.refresh().modified == []
+        assert [doc for doc, _, _ in engine.search("alpha")] == ["a.txt"]
+
+
+def test_rebuild_removes_deleted_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>alpha</p>")
+        write(tmp, "b.txt", "<p>gamma</p>")
+        engine = SearchEngine(tmp)
+        engine.build_index()
+        engine.add_document("extra", "gamma extra")
+
+        os.remove(os.path.join(tmp, "b.txt"))
+        engine.build_index()
+        assert [doc for doc, _, _ in engine.search("gamma")] == ["extra"]
+        assert sorted(engine.manifest) == ["a.txt"]
+
+        # Nothing left over for refresh to find
+        changes = engine.refresh()
+        assert changes.added == changes.modified == changes.deleted == []
+
+
+def test_refresh_reindexes_only_changed_pages(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>machine learning</p>", mtime_ns=1_000)
+        write(tmp, "b.txt", "<p>deep learning</p>", mtime_ns=1_000)
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        parsed = []
+        real_load_page = search_engine.load_page
+        monkeypatch.setattr(
+            search_engine, "load_page",
+            lambda path, *args: parsed.append(os.path.basename(path))
+            or real_load_page(path, *args)
+        )
+
+        write(tmp, "b.txt", "<p>quantum computing</p>", mtime_ns=2_000)
+        write(tmp, "c.txt", "<p>quantum learning</p>", mtime_ns=2_000)
+        os.remove(os.path.join(tmp, "a.txt"))
+
+        changes = engine.refresh()
+
+        assert sorted(parsed) == ["b.txt", "c.txt"]
+        assert changes.deleted == ["a.txt"]
+        assert engine.search("machine") == []
+        assert sorted(doc for doc, _, _ in engine.search("quantum")) == ["b.txt", "c.txt"]
+
+        # Nothing changed -> nothing re-parsed
+        parsed.clear()
+        engine.refresh()
+        assert parsed == []
+
+
+def test_manifest_is_stored_in_snapshot():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as out:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+        snap = os.path.join(out, "index.snap")
+
+        built = SearchEngine(tmp, snapshot_path=snap)
+        built.build_index()
+
+        loaded = SearchEngine(tmp)
+        assert loaded.load_snapshot(snap)
+        assert loaded.manifest == built.manifest
+
+        changes = loaded.refresh()
+        assert changes.added == changes.modified == changes.deleted == []
+
+
+def test_background_watcher_applies_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, "a.txt", "<p>machine learning</p>")
+
+        engine = SearchEngine(tmp)
+        engine.build_index()
+
+        watcher = engine.watch(interval=0.01)
+        try:
+            write(tmp, "b.txt", "<p>quantum computing</p>")
+
+            deadline = time.monotonic() + 5
+            while not engine.search("quantum") and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+
+        assert watcher.last_error is None
+        assert engine.search("quantum")[0][0] == "b.txt"